@@ -0,0 +1,228 @@
+"""
+Near-duplicate answer cache for farmer chat questions.
+
+Questions are normalized (NFC, lowercase, punctuation and filler words
+removed) and shingled into character 3-grams, which works the same for
+Latin, Devanagari and Odia script. A MinHash signature split into LSH
+bands finds candidate questions asked before in the same bucket
+(language, crop, crop stage); a candidate is a hit when the Jaccard
+similarity of the shingle sets reaches the threshold.
+
+Questions about prices, markets or selling depend on the farmer's live
+data and bypass the cache. Fertilizer and soil questions are
+additionally bucketed by the farmer's soil advice. A shared answer is
+generated from shared_advice() only, so nothing outside its bucket key
+(the farmer's name, district, sowing date or live prices) reaches
+another farmer. Entries expire after
+ANSWER_CACHE_TTL and the least recently used are evicted beyond
+ANSWER_CACHE_MAX_ENTRIES.
+"""
+import os
+import re
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict, defaultdict
+from itertools import count
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+import numpy as np
+
+from app.ai.knowledge import expand_query
+from app.ai.knowledge_index import STOPWORDS
+
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(24 * 3600)))  # seconds
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "5000"))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.8"))  # Jaccard similarity
+NUM_PERM = 64
+BANDS = 16  # 4 rows per band: ~0.8 similarity is found with high probability
+SHINGLE = 3
+
+# Filler words in Hindi/Odia questions (English ones come from the retrieval stopwords)
+FILLER_WORDS = STOPWORDS | {
+    "का", "की", "के", "है", "हैं", "क्या", "में", "को", "से", "मेरे", "मेरी", "मुझे", "कैसे", "कब", "कितना", "बताइए", "बताओ",
+    "ର", "କଣ", "କି", "ମୋର", "କେମିତି", "କେବେ",
+}
+
+# Questions about live prices and selling are answered from this farmer's market data
+PERSONAL_TERMS = {"price", "rate", "market", "mandi", "sell", "selling", "bhav", "profit"}
+PERSONAL_WORDS = ("दाम", "भाव", "कीमत", "बेच", "मंडी", "बाजार", "ଦର", "ବିକ୍ରି", "ବଜାର", "₹")
+# Answers to these depend on the farmer's soil report
+SOIL_TERMS = {"fertilizer", "urea", "dap", "mop", "npk", "nitrogen", "phosphorus", "potassium", "soil", "manure", "zinc"}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.RandomState(20240611)
+_PERM_A = _rng.randint(1, 1 << 29, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 29, size=NUM_PERM).astype(np.uint64)
+
+
+def normalize_question(text: str) -> str:
+    text = unicodedata.normalize("NFC", text).lower()
+    # Drop punctuation and symbols (including the danda) but keep combining marks
+    text = "".join(" " if unicodedata.category(ch)[0] in "PS" else ch for ch in text)
+    return " ".join(w for w in text.split() if w not in FILLER_WORDS)
+
+
+def shingles(text: str) -> Set[str]:
+    if len(text) <= SHINGLE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+
+
+def minhash(shingle_set: Set[str]) -> np.ndarray:
+    """NUM_PERM minimum hash values of the shingle set."""
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingle_set],
+        dtype=np.uint64,
+    )
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+
+def _bands(signature: np.ndarray):
+    rows = NUM_PERM // BANDS
+    for band in range(BANDS):
+        yield band, signature[band * rows:(band + 1) * rows].tobytes()
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _words(question: str) -> Set[str]:
+    return set(re.findall(r"[a-z]+", expand_query(question)))
+
+
+def is_personal(question: str) -> bool:
+    """True for questions about live prices/selling, which must not share answers."""
+    words = _words(question)
+    if "msp" in words:
+        return False  # MSP is a published fixed price
+    return bool(words & PERSONAL_TERMS) or any(w in question for w in PERSONAL_WORDS)
+
+
+def shared_advice(question: str, structured_advice: dict) -> dict:
+    """The advisory fields an answer shared through the cache may use; all are in its bucket."""
+    advice = {"crop_stage": structured_advice.get("crop_stage")}
+    if _words(question) & SOIL_TERMS:
+        advice["soil_advice"] = list(structured_advice.get("soil_advice") or ())
+    return advice
+
+
+def answer_bucket(question: str, language: str, crop: str, structured_advice: dict) -> Optional[Tuple]:
+    """Cache bucket for a question, or None if it must bypass the cache."""
+    if is_personal(question):
+        return None
+    advice = shared_advice(question, structured_advice)
+    bucket: Tuple[Hashable, ...] = (language, (crop or "").lower(), advice["crop_stage"])
+    if "soil_advice" in advice:
+        bucket += (tuple(advice["soil_advice"]),)
+    return bucket
+
+
+class AnswerCache:
+    """In-memory MinHash-LSH cache of answers, per bucket, with TTL and LRU eviction."""
+
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        ttl: float = ANSWER_CACHE_TTL,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()
+        self._bands: Dict[tuple, Set[int]] = defaultdict(set)
+        self._ids = count()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "expired": 0, "evictions": 0}
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        for band in entry["bands"]:
+            ids = self._bands[band]
+            ids.discard(entry_id)
+            if not ids:
+                del self._bands[band]
+
+    def _keys(self, bucket: Tuple, signature: np.ndarray):
+        return [(bucket, band, value) for band, value in _bands(signature)]
+
+    def lookup(self, question: str, bucket: Optional[Tuple]) -> Optional[str]:
+        """Answer to a near-duplicate question in the bucket; None (a miss or bypass) otherwise."""
+        if bucket is None:
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+
+        shingle_set = shingles(normalize_question(question))
+        if not shingle_set:
+            return None
+        keys = self._keys(bucket, minhash(shingle_set))
+        now = time.time()
+
+        with self._lock:
+            candidates = set().union(*(self._bands.get(key, ()) for key in keys))
+            best, best_score = None, 0.0
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if now - entry["created_at"] > self.ttl:
+                    self._remove(entry_id)
+                    self._stats["expired"] += 1
+                    continue
+                score = jaccard(shingle_set, entry["shingles"])
+                if score > best_score:
+                    best, best_score = entry_id, score
+
+            if best is None or best_score < self.threshold:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(best)
+            self._stats["hits"] += 1
+            return self._entries[best]["answer"]
+
+    def store(self, question: str, bucket: Optional[Tuple], answer: str) -> None:
+        if bucket is None or not answer:
+            return
+        shingle_set = shingles(normalize_question(question))
+        if not shingle_set:
+            return
+        keys = self._keys(bucket, minhash(shingle_set))
+
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = {
+                "shingles": shingle_set,
+                "answer": answer,
+                "bands": keys,
+                "created_at": time.time(),
+            }
+            for key in keys:
+                self._bands[key].add(entry_id)
+            self._stats["stores"] += 1
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+            }
+
+
+answer_cache = AnswerCache()
+
+
+def answer_cache_stats() -> dict:
+    return answer_cache.stats()
@@ -2,6 +2,9 @@ import os
 from typing import Optional
 from google import genai
 
+from app.ai.prompts import LANGUAGE_NAMES
+from app.ai.response_cache import ResponseCache, canonical_key
+
 
 # Initialize Gemini client safely
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -14,53 +17,55 @@ if GEMINI_API_KEY:
         client = None
 
 
-LANGUAGE_NAMES = {
-    "en": "English",
-    "hi": "Hindi (हिन्दी)",
-    "or": "Odia (ଓଡ଼ିଆ)",
-}
+MODEL = "gemini-3-flash-preview"
+PROMPT_VERSION = 1  # bump when the prompt text changes
+# Share cached advisories across this many days since sowing (0 = exact day)
+ADVISORY_DAY_BUCKET = int(os.getenv("ADVISORY_DAY_BUCKET", "0"))
 
+advisory_cache = ResponseCache()
 
-def enhance_advisory(structured_advice: dict, language: str = "en") -> Optional[str]:
-    """
-    Enhances structured advisory using Gemini.
-    If Gemini fails for ANY reason, returns None.
-    This guarantees backend stability.
-    """
+def _days_label(days, bucket: int = None):
+    """Days since sowing, or the bucket it falls in so nearby days share a prompt."""
+    bucket = ADVISORY_DAY_BUCKET if bucket is None else bucket
+    if bucket <= 1 or not isinstance(days, int):
+        return days
+    low = days // bucket * bucket
+    return f"{low}-{low + bucket - 1}"
 
-    # 🚨 If client not initialized, skip enhancement
-    if not client:
-        return None
 
-    # Resolve full language name for clear Gemini instructions
-    lang_name = LANGUAGE_NAMES.get(language, "English")
+def advisory_inputs(structured_advice: dict, language: str = "en", day_bucket: int = None) -> dict:
+    """Everything the enhancement prompt depends on."""
+    return {
+        "crop_stage": structured_advice.get("crop_stage"),
+        "days": _days_label(structured_advice.get("days_since_sowing"), day_bucket),
+        "soil_advice": structured_advice.get("soil_advice", []),
+        "market_trend": structured_advice.get("market_trend"),
+        "market_advice": structured_advice.get("market_advice"),
+        "language": LANGUAGE_NAMES.get(language, "English"),
+    }
 
-    try:
-        crop_stage = structured_advice.get("crop_stage")
-        days = structured_advice.get("days_since_sowing")
-        soil_advice = structured_advice.get("soil_advice", [])
-        market_trend = structured_advice.get("market_trend")
-        market_advice = structured_advice.get("market_advice")
 
-        context_prompt = f"""
+def _generate(inputs: dict) -> Optional[str]:
+    context_prompt = f"""
 You are an agricultural advisory assistant.
 
 Farmer data:
-- Crop stage: {crop_stage}
-- Days since sowing: {days}
-- Soil advice: {soil_advice}
-- Market trend: {market_trend}
-- Market advice: {market_advice}
+- Crop stage: {inputs["crop_stage"]}
+- Days since sowing: {inputs["days"]}
+- Soil advice: {inputs["soil_advice"]}
+- Market trend: {inputs["market_trend"]}
+- Market advice: {inputs["market_advice"]}
 
-You MUST respond entirely in {lang_name}. Use the native script of that language.
+You MUST respond entirely in {inputs["language"]}. Use the native script of that language.
 
 Generate a practical, easy-to-understand advisory message.
 Keep it structured and farmer-friendly.
 Do not use markdown formatting.
 """
 
+    try:
         response = client.models.generate_content(
-            model="gemini-3-flash-preview",
+            model=MODEL,
             contents=context_prompt
         )
 
@@ -74,3 +79,33 @@ Do not use markdown formatting.
         # 🚨 NEVER crash backend because of Gemini
         print("Gemini enhancement failed:", str(e))
         return None
+
+
+def enhance_advisory(structured_advice: dict, language: str = "en", market_version: str = "") -> Optional[str]:
+    """
+    Enhances structured advisory using Gemini.
+    If Gemini fails for ANY reason, returns None.
+    This guarantees backend stability.
+
+    Responses are cached on the prompt inputs and the market data version
+    (response_cache.data_version of the price file, which covers its path
+    and contents): each crop's file keeps its own entries, and a changed
+    file misses the advisories written from the old one.
+    """
+
+    # 🚨 If client not initialized, skip enhancement
+    if not client:
+        return None
+
+    try:
+        inputs = advisory_inputs(structured_advice, language)
+        key = canonical_key({"model": MODEL, "prompt": PROMPT_VERSION, "market": market_version, "inputs": inputs})
+    except Exception as e:
+        print("Gemini enhancement failed:", str(e))
+        return None
+
+    return advisory_cache.get_or_create(key, lambda: _generate(inputs), version=market_version)
+
+
+def advisory_cache_stats() -> dict:
+    return advisory_cache.stats()
@@ -0,0 +1,232 @@
+"""
+Static agricultural knowledge base used to ground the chat assistant.
+
+The markdown is split into its "## " sections, which
+app.ai.knowledge_index chunks and indexes so prompts carry only the
+parts a question needs. QUERY_SYNONYMS maps Hindi/Odia and alternative
+question words onto the English terms of the index.
+"""
+import re
+from typing import Dict, List, NamedTuple
+
+# ─── Comprehensive Agricultural Knowledge Base ───
+AGRI_KNOWLEDGE = """
+## MSP (Minimum Support Price) — Rabi 2024-25 Season
+| Crop          | MSP (₹/quintal) |
+|---------------|------------------|
+| Wheat         | 2,275            |
+| Barley        | 1,850            |
+| Gram (Chana)  | 5,440            |
+| Masur (Lentil)| 6,425            |
+| Rapeseed/Mustard | 5,650         |
+| Safflower     | 5,800            |
+
+## MSP — Kharif 2024-25 Season
+| Crop          | MSP (₹/quintal) |
+|---------------|------------------|
+| Paddy (Common)| 2,300            |
+| Paddy (Grade A)| 2,320           |
+| Jowar (Hybrid)| 3,371            |
+| Jowar (Maldandi)| 3,421          |
+| Bajra         | 2,500            |
+| Ragi          | 3,846            |
+| Maize         | 2,225            |
+| Tur (Arhar)   | 7,000            |
+| Moong         | 8,558            |
+| Urad          | 6,950            |
+| Cotton (Medium)| 6,620           |
+| Cotton (Long) | 7,020            |
+| Groundnut     | 6,377            |
+| Sunflower     | 6,760            |
+| Soybean (Yellow)| 4,892          |
+| Sesamum       | 8,635            |
+| Niger Seed    | 7,734            |
+
+## Government Schemes for Farmers
+1. **PM-KISAN (Pradhan Mantri Kisan Samman Nidhi)**
+   - ₹6,000/year in 3 installments of ₹2,000 each
+   - Direct transfer to bank account
+   - For all land-holding farmer families
+   - Apply at: pmkisan.gov.in
+
+2. **PM Fasal Bima Yojana (PMFBY)** — Crop Insurance
+   - Premium: 2% for Kharif, 1.5% for Rabi, 5% for commercial/horticultural crops
+   - Covers natural calamities, pests, diseases
+   - Enroll before sowing deadline through banks/CSCs
+   - Claims within 72 hours of crop loss
+
+3. **Kisan Credit Card (KCC)**
+   - Short-term crop loans at 4% interest (with subsidy)
+   - Credit limit based on landholding and crop
+   - Can be used for crop production, post-harvest, and allied activities
+   - Apply at any bank branch
+
+4. **eNAM (National Agriculture Market)**
+   - Online trading platform for agricultural commodities
+   - Compare prices across mandis nationwide
+   - Transparent bidding process
+   - Reduces middlemen
+
+5. **Soil Health Card Scheme**
+   - Free soil testing every 2 years
+   - Recommendations for nutrient management
+   - Available at local Krishi Vigyan Kendra (KVK)
+
+6. **PM Kisan MAN-DHAN Yojana** — Pension Scheme
+   - ₹3,000/month pension after age 60
+   - Monthly contribution: ₹55-200 (based on entry age)
+   - For small and marginal farmers (land up to 2 hectares)
+
+7. **Paramparagat Krishi Vikas Yojana (PKVY)** — Organic Farming
+   - ₹50,000/hectare for 3 years for organic farming
+   - Cluster-based approach
+
+## Fertilizer Guidelines by Crop Stage
+### Wheat
+- **Sowing**: Apply full dose of Phosphorus (DAP) and Potassium (MOP) as basal dose. Use 60 kg DAP + 40 kg MOP per acre.
+- **Germination (8-21 days)**: No additional fertilizer needed. Ensure adequate moisture.
+- **Tillering (22-45 days)**: First top-dressing of Nitrogen — apply 30-35 kg Urea per acre.
+- **Flowering (46-75 days)**: Second top-dressing of Nitrogen — apply 25-30 kg Urea per acre. Foliar spray of micronutrients (Zinc, Iron) if deficiency seen.
+- **Maturity (76-110 days)**: No fertilizer application. Avoid excess nitrogen.
+- **Harvest (111+ days)**: No fertilizer needed.
+
+### General NPK Guidelines
+- Nitrogen (N): Promotes leaf and stem growth. Apply in splits.
+- Phosphorus (P): Promotes root development and flowering. Apply at sowing.
+- Potassium (K): Strengthens plants against disease. Apply at sowing.
+
+## Irrigation Best Practices
+### Wheat
+- **Crown Root Initiation (21-25 days)**: Most critical irrigation. Missing this reduces yield by 20-25%.
+- **Tillering (40-45 days)**: Important for tiller development.
+- **Late Jointing (60-65 days)**: Essential for stem elongation.
+- **Flowering (80-85 days)**: Critical for grain formation.
+- **Milking (100-105 days)**: Important for grain filling.
+- **Dough Stage (110-115 days)**: Last irrigation. Stop watering 15-20 days before harvest.
+- **Total irrigations needed**: 4-6 depending on soil type and rainfall.
+
+## Storage & Post-Harvest Tips
+1. **Moisture content**: Dry grain to 12-14% moisture before storage.
+2. **Storage structures**: Use pucca godowns, metal bins, or hermetic bags.
+3. **Pest control**: Use aluminum phosphide tablets (1 tablet per quintal) for fumigation.
+4. **Government storage**: FCI godowns, CWC warehouses available at subsidized rates.
+5. **Warehouse receipt**: Get warehouse receipt for pledged loan against stored produce.
+6. **Sell timing**: Check mandi prices daily. Sell when price is above MSP and moving average.
+
+## Common Crop Diseases (Wheat)
+| Disease        | Symptoms                          | Treatment                           |
+|----------------|-----------------------------------|-------------------------------------|
+| Yellow Rust     | Yellow stripes on leaves          | Spray Propiconazole 25EC (1ml/L)   |
+| Brown Rust      | Brown oval pustules on leaves     | Spray Mancozeb 75WP (2.5g/L)      |
+| Karnal Bunt     | Black powder in grains            | Treat seeds with Carboxin (2g/kg)  |
+| Powdery Mildew  | White powdery growth on leaves    | Spray Sulphur WP 80 (3g/L)        |
+| Loose Smut      | Black spores replace grain head   | Treat seeds with Carbendazim       |
+
+## Pest Management (Wheat)
+| Pest            | Damage                            | Control                             |
+|-----------------|-----------------------------------|-------------------------------------|
+| Aphid           | Sucks sap, yellowing leaves       | Spray Imidacloprid (0.5ml/L)       |
+| Termite         | Root damage, wilting              | Apply Chlorpyrifos in soil         |
+| Pink Stem Borer | Hollow stems, dead hearts         | Spray Quinalphos (2ml/L)           |
+| Army Worm       | Defoliates crop rapidly           | Spray Cypermethrin (1ml/L)         |
+
+## Weather Advisory Guidelines
+- **Frost alert**: Cover young crops with straw mulch during December-January frost.
+- **Heat wave**: Irrigate immediately if temperature exceeds 35°C during grain filling.
+- **Hailstorm damage**: File PMFBY claim within 72 hours. Document damage with photos.
+- **Excess rain**: Ensure proper drainage. Apply fungicide within 48 hours.
+"""
+
+
+class Section(NamedTuple):
+    title: str
+    text: str  # heading line included
+
+
+def _split_sections(markdown: str) -> List[Section]:
+    sections = []
+    for block in re.split(r"\n(?=## )", markdown.strip()):
+        title = block.splitlines()[0].lstrip("#").strip()
+        sections.append(Section(title, block.strip()))
+    return sections
+
+
+SECTIONS: List[Section] = _split_sections(AGRI_KNOWLEDGE)
+
+# Words in questions (Hindi, Odia, alternative English) and the index terms they mean
+QUERY_SYNONYMS: Dict[str, str] = {
+    # MSP
+    "minimum support price": "msp",
+    "support price": "msp",
+    "एमएसपी": "msp",
+    "समर्थन मूल्य": "msp",
+    "ସହାୟକ ମୂଲ୍ୟ": "msp",
+    # Crops
+    "rice": "paddy",
+    "गेहूं": "wheat",
+    "गेहूँ": "wheat",
+    "धान": "paddy",
+    "चना": "gram",
+    "मसूर": "masur",
+    "सरसों": "mustard",
+    "जौ": "barley",
+    "मक्का": "maize",
+    "बाजरा": "bajra",
+    "ज्वार": "jowar",
+    "अरहर": "arhar",
+    "मूंग": "moong",
+    "उड़द": "urad",
+    "कपास": "cotton",
+    "मूंगफली": "groundnut",
+    "सोयाबीन": "soybean",
+    "ଗହମ": "wheat",
+    "ଧାନ": "paddy",
+    "ମକା": "maize",
+    "ବାଦାମ": "groundnut",
+    # Topics
+    "fertiliser": "fertilizer",
+    "खाद": "fertilizer",
+    "उर्वरक": "fertilizer",
+    "यूरिया": "urea",
+    "ସାର": "fertilizer",
+    "water": "irrigation",
+    "सिंचाई": "irrigation",
+    "पानी": "irrigation",
+    "ଜଳସେଚନ": "irrigation",
+    "ପାଣି": "irrigation",
+    "yojana": "scheme",
+    "योजना": "scheme",
+    "ଯୋଜନା": "scheme",
+    "bima": "insurance",
+    "बीमा": "insurance",
+    "ऋण": "loan credit",
+    "पेंशन": "pension",
+    "insect": "pest",
+    "कीट": "pest",
+    "दीमक": "termite",
+    "ପୋକ": "pest",
+    "रोग": "disease",
+    "ରୋଗ": "disease",
+    "मौसम": "weather",
+    "पाला": "frost",
+    "बारिश": "rain",
+    "ପାଗ": "weather",
+    "store": "storage",
+    "भंडारण": "storage",
+    "गोदाम": "godown warehouse",
+    "बेच": "sell",
+}
+
+
+def _mentions(question: str, word: str) -> bool:
+    if word.isascii():
+        # Whole words, so "rice" doesn't match "price"
+        return re.search(r"\b" + re.escape(word) + r"\b", question) is not None
+    return word in question
+
+
+def expand_query(question: str) -> str:
+    """The question plus the index terms its non-English or alternative words stand for."""
+    q = question.lower()
+    extra = [terms for word, terms in QUERY_SYNONYMS.items() if _mentions(q, word)]
+    return " ".join([q] + extra)
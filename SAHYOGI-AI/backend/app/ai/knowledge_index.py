@@ -0,0 +1,242 @@
+"""
+Offline BM25 retrieval over the agricultural knowledge base.
+
+Each knowledge section is cut into small chunks: one per table row (with
+the table header kept for context), per "### " subsection, or per list
+item. The chunks are held in an in-memory inverted index that is built
+at import time. chat_with_context inlines only the top-k chunks for a
+question.
+
+MSP lookups, and (in English) questions that name one government scheme,
+are answered straight from the knowledge base, with no LLM call.
+"""
+import re
+import math
+from collections import Counter, defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.ai.knowledge import SECTIONS, expand_query
+
+TOP_K = 4
+# Chunks scoring below this fraction of the best hit are dropped as noise
+MIN_RELATIVE_SCORE = 0.3
+# Longer questions are left to the LLM even when the top hit is a fact
+DIRECT_ANSWER_MAX_WORDS = 12
+# Hits within this fraction of the best one count as competing matches
+DIRECT_ANSWER_MARGIN = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i",
+    "in", "is", "it", "me", "much", "my", "of", "on", "or", "should", "tell", "the", "this", "to",
+    "what", "when", "which", "who", "why", "will", "with", "you", "your", "get", "about", "now",
+}
+
+
+class Chunk(NamedTuple):
+    section: int   # index into SECTIONS
+    position: int  # order within the section
+    title: str
+    header: str    # table header lines, repeated once when rendered
+    body: str
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, stopwords dropped, cut to a 6-character stem."""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return [w[:6] for w in words if w not in STOPWORDS]
+
+
+def _chunk_section(index: int, title: str, text: str) -> List[Chunk]:
+    lines = text.splitlines()[1:]  # drop the "## " heading
+    chunks: List[Chunk] = []
+
+    if any(line.startswith("### ") for line in lines):
+        current: List[str] = []
+        for line in lines:
+            if line.startswith("### ") and current:
+                chunks.append("\n".join(current))
+                current = []
+            if line.strip():
+                current.append(line)
+        if current:
+            chunks.append("\n".join(current))
+        return [Chunk(index, i, title, "", body) for i, body in enumerate(chunks)]
+
+    table = [line for line in lines if line.startswith("|")]
+    if table:
+        header = "\n".join(table[:2])
+        return [Chunk(index, i, title, header, row) for i, row in enumerate(table[2:])]
+
+    current = []
+    for line in lines:
+        if re.match(r"(\d+\.|-) ", line) and current:
+            chunks.append("\n".join(current))
+            current = []
+        if line.strip():
+            current.append(line)
+    if current:
+        chunks.append("\n".join(current))
+    return [Chunk(index, i, title, "", body) for i, body in enumerate(chunks)]
+
+
+def build_chunks() -> List[Chunk]:
+    chunks = []
+    for index, section in enumerate(SECTIONS):
+        chunks.extend(_chunk_section(index, section.title, section.text))
+    return chunks
+
+
+class KnowledgeIndex:
+    """BM25 (k1, b) over chunk title + header + body."""
+
+    def __init__(self, chunks: List[Chunk], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths: List[int] = []
+
+        for doc_id, chunk in enumerate(chunks):
+            terms = tokenize(f"{chunk.title} {chunk.header} {chunk.body}")
+            self.lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self.postings[term].append((doc_id, tf))
+
+        n = len(chunks)
+        self.avg_length = sum(self.lengths) / n if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def search(self, question: str, k: int = TOP_K) -> List[Tuple[Chunk, float]]:
+        """Top-k chunks for the question (synonyms expanded), best first."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(expand_query(question))):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        if not scores:
+            return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+        floor = ranked[0][1] * MIN_RELATIVE_SCORE
+        return [(self.chunks[doc_id], score) for doc_id, score in ranked if score >= floor]
+
+
+def render_chunks(chunks: List[Chunk]) -> str:
+    """Chunks as markdown, grouped under their section headings in knowledge-base order."""
+    by_section: Dict[int, List[Chunk]] = defaultdict(list)
+    for chunk in sorted(set(chunks), key=lambda c: (c.section, c.position)):
+        by_section[chunk.section].append(chunk)
+
+    parts = []
+    for section_chunks in by_section.values():
+        first = section_chunks[0]
+        lines = [f"## {first.title}"]
+        if first.header:
+            lines.append(first.header)
+        lines.extend(chunk.body for chunk in section_chunks)
+        parts.append("\n".join(lines))
+    return "\n\n".join(parts)
+
+
+INDEX = KnowledgeIndex(build_chunks())
+
+
+def retrieve(question: str, k: int = TOP_K) -> List[Chunk]:
+    return [chunk for chunk, _ in INDEX.search(question, k)]
+
+
+# ---------- Direct answers ----------
+
+# Words in crop names that name a variety, not the crop
+_VARIANT_WORDS = {"common", "grade", "a", "hybrid", "maldandi", "medium", "long", "yellow", "seed"}
+
+MSP_TEMPLATES = {
+    "en": "The MSP for {crop} ({season}) is ₹{price} per quintal.",
+    "hi": "{crop} का न्यूनतम समर्थन मूल्य (MSP) ({season}) ₹{price} प्रति क्विंटल है।",
+    "or": "{crop} ର ସର୍ବନିମ୍ନ ସହାୟକ ମୂଲ୍ୟ (MSP) ({season}) କ୍ୱିଣ୍ଟାଲ ପିଛା ₹{price}।",
+}
+
+# Scheme chunk marker (in its first line) → question phrases that name it
+SCHEME_ALIASES = {
+    "PM-KISAN": ["pm-kisan", "pm kisan", "pmkisan", "kisan samman"],
+    "PMFBY": ["pmfby", "fasal bima", "crop insurance"],
+    "Kisan Credit Card": ["kisan credit card", "kcc"],
+    "eNAM": ["enam", "e-nam"],
+    "Soil Health Card": ["soil health card"],
+    "MAN-DHAN": ["man-dhan", "mandhan", "maan dhan"],
+    "PKVY": ["pkvy", "paramparagat"],
+}
+
+
+def _msp_rows() -> List[dict]:
+    rows = []
+    for chunk in INDEX.chunks:
+        if not chunk.title.startswith("MSP") or not chunk.header:
+            continue
+        cells = [c.strip() for c in chunk.body.strip("|").split("|")]
+        season = re.search(r"(Rabi|Kharif) \d{4}-\d{2}", chunk.title)
+        rows.append({
+            "crop": cells[0],
+            "price": cells[1],
+            "season": season.group(0) if season else chunk.title,
+            "names": set(re.findall(r"[a-z]+", cells[0].lower())) - _VARIANT_WORDS,
+        })
+    return rows
+
+
+MSP_ROWS = _msp_rows()
+
+
+def _msp_answer(words: set, language: str) -> Optional[str]:
+    if "msp" not in words:
+        return None
+    rows = [row for row in MSP_ROWS if row["names"] & words]
+    if not rows:
+        return None
+    template = MSP_TEMPLATES.get(language, MSP_TEMPLATES["en"])
+    return " ".join(template.format(**row) for row in rows)
+
+
+def _scheme_answer(question: str, top: Chunk) -> Optional[str]:
+    q = question.lower()
+    named = {scheme for scheme, aliases in SCHEME_ALIASES.items() if any(a in q for a in aliases)}
+    if "MAN-DHAN" in named:
+        named.discard("PM-KISAN")  # "PM Kisan MAN-DHAN" also contains "pm kisan"
+    if len(named) != 1:
+        return None
+    scheme = named.pop()
+    if not top.title.startswith("Government Schemes") or scheme not in top.body.splitlines()[0]:
+        return None
+    # Plain text for chat and TTS
+    lines = [re.sub(r"^\s*(\d+\.|-)\s*", "", line).replace("**", "") for line in top.body.splitlines()]
+    return lines[0] + ": " + "; ".join(lines[1:]) + "."
+
+
+def answer_directly(question: str, language: str = "en") -> Optional[str]:
+    """
+    Answer a short factual question from the knowledge base, or None to
+    leave it to the LLM. Covers MSP lookups (all languages) and, in
+    English, questions about one named scheme.
+    """
+    if len(question.split()) > DIRECT_ANSWER_MAX_WORDS:
+        return None
+
+    hits = INDEX.search(question, k=TOP_K)
+    if not hits:
+        return None
+    close = [chunk for chunk, score in hits if score >= hits[0][1] * DIRECT_ANSWER_MARGIN]
+
+    # Every close match must be an MSP row, so "MSP of wheat, should I sell now?" goes to the LLM
+    if all(chunk.title.startswith("MSP") for chunk in close):
+        words = set(re.findall(r"[a-z]+", expand_query(question)))
+        return _msp_answer(words, language)
+
+    if language == "en":
+        return _scheme_answer(question, hits[0][0])
+    return None
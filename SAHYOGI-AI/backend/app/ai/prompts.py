@@ -0,0 +1,158 @@
+"""
+Prompt assembly for the chat assistant.
+
+A chat prompt is a static prefix (assistant role + knowledge base) and a
+per-request part (farmer data, instructions, question). The prefix is
+built once here; gemini_chat either keeps it in Gemini's context cache
+and sends only the per-request part, or inlines just the knowledge
+chunks retrieved for the question (app.ai.knowledge_index). Prompt
+sizes are recorded per request so the savings show up at /health/prompts.
+"""
+import threading
+from collections import Counter, deque
+from typing import Optional
+
+from app.ai.knowledge import AGRI_KNOWLEDGE
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "hi": "Hindi (हिन्दी)",
+    "or": "Odia (ଓଡ଼ିଆ)",
+}
+
+CHAT_PREAMBLE = """You are SAHYOGI, an expert AI agricultural assistant for Indian farmers.
+You have deep knowledge of Indian agriculture, government schemes, MSP rates, fertilizers,
+irrigation, pest management, crop diseases, weather advisories, and market analysis.
+"""
+
+# Built once: what goes into the provider-side context cache
+STATIC_PREFIX = f"{CHAT_PREAMBLE}\n{AGRI_KNOWLEDGE}"
+
+# Prompt lines per field; fields a caller leaves out are left out of the prompt
+FARMER_FIELDS = [("name", "Name"), ("crop", "Crop"), ("district", "District"), ("sowing_date", "Sowing Date")]
+ADVICE_FIELDS = [
+    ("crop_stage", "Crop Stage"),
+    ("days_since_sowing", "Days Since Sowing"),
+    ("soil_advice", "Soil Advice"),
+    ("market_trend", "Market Trend"),
+    ("market_advice", "Market Advice"),
+]
+
+
+def farmer_data_block(
+    structured_advice: dict,
+    market_data: Optional[dict] = None,
+    farmer_info: Optional[dict] = None,
+) -> str:
+    # Build farmer context section
+    farmer_context = ""
+    if farmer_info:
+        profile = "\n".join(f"- {label}: {farmer_info[key]}" for key, label in FARMER_FIELDS if key in farmer_info)
+        farmer_context = f"""
+Farmer Profile:
+{profile}
+"""
+
+    # Build market data section
+    market_context = ""
+    if market_data:
+        market_context = f"""
+Live Market Data:
+- Current Market Price: ₹{market_data.get('current_price', 'N/A')}/quintal
+- 7-Day Moving Average: ₹{market_data.get('moving_average_7', 'N/A')}/quintal
+- 7-Day Price Projection: ₹{market_data.get('projection_7_days', 'N/A')}/quintal
+- 14-Day Price Projection: ₹{market_data.get('projection_14_days', 'N/A')}/quintal
+- Market Trend: {market_data.get('trend_direction', 'N/A')}
+- Price Volatility: ₹{market_data.get('volatility', 'N/A')} std dev
+"""
+
+    advice = "\n".join(
+        f"- {label}: {structured_advice[key]}" for key, label in ADVICE_FIELDS if key in structured_advice
+    )
+
+    return f"""--- FARMER-SPECIFIC DATA ---
+{farmer_context}
+Crop Advisory Data:
+{advice}
+{market_context}
+--- END OF DATA ---"""
+
+
+def build_chat_prompt(
+    structured_advice: dict,
+    question: str,
+    language: str = "en",
+    market_data: Optional[dict] = None,
+    farmer_info: Optional[dict] = None,
+    knowledge: Optional[str] = None,
+) -> str:
+    """
+    The chat prompt. With `knowledge=None` the static prefix is assumed to
+    be in the model's cached context and is left out; otherwise the given
+    knowledge text is inlined after the preamble.
+    """
+    lang_name = LANGUAGE_NAMES.get(language, "English")
+
+    prefix = ""
+    if knowledge is not None:
+        prefix = f"{CHAT_PREAMBLE}\n{knowledge}\n\n"
+
+    return f"""{prefix}{farmer_data_block(structured_advice, market_data, farmer_info)}
+
+INSTRUCTIONS:
+1. Use the farmer-specific data above to personalize your response.
+2. Use the agricultural knowledge base to answer general questions about MSP, schemes, fertilizers, diseases, pests, irrigation, storage, etc.
+3. When discussing prices, always reference the actual market data provided above.
+4. You MUST respond entirely in {lang_name}. Use the native script of that language. Use practical, action-oriented language.
+5. If the farmer asks about MSP, provide the exact MSP rate from the knowledge base.
+6. If asked about government schemes, explain eligibility, benefits, and how to apply.
+7. Keep responses concise but informative. Use bullet points where helpful.
+8. Do NOT use any markdown formatting like *, **, #, or backticks. Use plain text only.
+
+Farmer's Question: {question}
+"""
+
+
+# ---------- Prompt size tracking ----------
+
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "prompt_chars": 0, "knowledge_chars_saved": 0, "prompt_tokens": 0, "cached_tokens": 0}
+_modes: Counter = Counter()
+_recent = deque(maxlen=50)
+
+
+def record_prompt(mode: str, prompt: str, knowledge_chars: int, usage=None) -> dict:
+    """
+    Record one chat request's prompt: `mode` is "cached", "retrieved",
+    "full" or "direct" (answered without an LLM call); `knowledge_chars`
+    is how much knowledge text was inlined. `usage` is the provider's
+    usage metadata, if any.
+    """
+    entry = {
+        "mode": mode,
+        "prompt_chars": len(prompt),
+        "knowledge_chars": knowledge_chars,
+        "prompt_tokens": getattr(usage, "prompt_token_count", None),
+        "cached_tokens": getattr(usage, "cached_content_token_count", None),
+    }
+    with _stats_lock:
+        _stats["requests"] += 1
+        _stats["prompt_chars"] += entry["prompt_chars"]
+        _stats["knowledge_chars_saved"] += len(AGRI_KNOWLEDGE) - knowledge_chars
+        _stats["prompt_tokens"] += entry["prompt_tokens"] or 0
+        _stats["cached_tokens"] += entry["cached_tokens"] or 0
+        _modes[mode] += 1
+        _recent.append(entry)
+    return entry
+
+
+def prompt_stats() -> dict:
+    with _stats_lock:
+        requests = _stats["requests"]
+        return {
+            **_stats,
+            "avg_prompt_chars": round(_stats["prompt_chars"] / requests) if requests else 0,
+            "static_prefix_chars": len(STATIC_PREFIX),
+            "modes": dict(_modes),
+            "recent": list(_recent),
+        }
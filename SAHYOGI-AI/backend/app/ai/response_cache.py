@@ -0,0 +1,214 @@
+"""
+Persistent SQLite cache for LLM responses.
+
+Entries are keyed on a canonical hash of the prompt inputs, which should
+include the identity and version of the data the prompt was built from
+(for advisories, the market price file's fingerprint), so entries built
+from different files live side by side. Each row is also tagged with that
+version: a lookup under another version is a miss, and the row is left
+for TTL or LRU trimming to remove. Entries expire after LLM_CACHE_TTL
+and the table is trimmed to LLM_CACHE_MAX_ENTRIES least-recently-used
+rows. The file is shared by all workers (WAL mode), so a response
+generated by one worker is reused by the others and survives restarts.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from app.services.cache import file_fingerprint
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", str(BACKEND_DIR / "cache" / "llm_responses.sqlite3"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+# After a failed create(), misses on that key return None for this long (seconds)
+LLM_CACHE_NEGATIVE_TTL = float(os.getenv("LLM_CACHE_NEGATIVE_TTL", "30"))
+# Trim down to this fraction of the limit so eviction doesn't run on every write
+LLM_CACHE_LOW_WATERMARK = 0.9
+
+
+def canonical_key(payload: Any) -> str:
+    """SHA-256 of the payload as sorted, compact JSON."""
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def data_version(path: str) -> str:
+    """Short version tag of a data file's current contents ('' if it is missing)."""
+    try:
+        return canonical_key(list(file_fingerprint(path)))[:16]
+    except OSError:
+        return ""
+
+
+class ResponseCache:
+    """String responses in SQLite, with version tags, TTL and LRU trimming."""
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        ttl: float = LLM_CACHE_TTL,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        negative_ttl: float = LLM_CACHE_NEGATIVE_TTL,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # key -> {"event", "value", "error"} of the create() in progress
+        self._inflight: Dict[str, dict] = {}
+        # key -> (version, time) of the last failed create()
+        self._failed: Dict[str, tuple] = {}
+        self._stats = {
+            "hits": 0, "misses": 0, "stale": 0, "stores": 0, "evictions": 0, "errors": 0,
+            "shared": 0, "negative_hits": 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " version TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str, version: str = "") -> Optional[str]:
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT version, value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self._stats["misses"] += 1
+                    return None
+                if now - row[2] > self.ttl:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._stats["stale"] += 1
+                    self._stats["misses"] += 1
+                    return None
+                if row[0] != version:
+                    # Another caller's data version; not ours to delete
+                    self._stats["stale"] += 1
+                    self._stats["misses"] += 1
+                    return None
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                self._stats["hits"] += 1
+                return row[1]
+        except sqlite3.Error as e:
+            # A broken cache only costs an LLM call
+            self._stats["errors"] += 1
+            print(f"LLM cache read failed: {str(e)}")
+            return None
+
+    def put(self, key: str, value: str, version: str = "") -> None:
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, version, value, created_at, last_used)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, version, value, now, now),
+                )
+                self._stats["stores"] += 1
+                count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                if count > self.max_entries:
+                    keep = int(self.max_entries * LLM_CACHE_LOW_WATERMARK)
+                    cur = conn.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        " SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                        (count - keep,),
+                    )
+                    self._stats["evictions"] += cur.rowcount
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            print(f"LLM cache write failed: {str(e)}")
+
+    def get_or_create(self, key: str, create: Callable[[], Optional[str]], version: str = "") -> Optional[str]:
+        """
+        Cached value, or the result of `create()` stored under `key`.
+
+        Concurrent misses on one key call `create` once and all get its
+        result (or its exception). None is not cached, but a failure is
+        remembered for `negative_ttl` seconds so an outage doesn't turn
+        every miss into another doomed call.
+        """
+        value = self.get(key, version)
+        if value is not None:
+            return value
+
+        with self._lock:
+            failed = self._failed.get(key)
+            if failed is not None:
+                if failed[0] == version and time.time() - failed[1] < self.negative_ttl:
+                    self._stats["negative_hits"] += 1
+                    return None
+                del self._failed[key]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = {"event": threading.Event(), "value": None, "error": None}
+
+        if not leader:
+            flight["event"].wait()
+            with self._lock:
+                self._stats["shared"] += 1
+            if flight["error"] is not None:
+                raise flight["error"]
+            return flight["value"]
+
+        try:
+            flight["value"] = create()
+            if flight["value"] is not None:
+                self.put(key, flight["value"], version)
+            return flight["value"]
+        except Exception as e:
+            flight["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if flight["value"] is None and self.negative_ttl > 0:
+                    self._failed[key] = (version, time.time())
+            flight["event"].set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM responses")
+            self._failed.clear()
+
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        try:
+            with self._lock:
+                entries = self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        return {
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "negative_ttl_seconds": self.negative_ttl,
+        }
@@ -1,41 +1,733 @@
+"""
+Text-to-speech behind pluggable engines, with a content-addressed audio cache.
+
+Engines are tried in TTS_ENGINES order (default: the offline pyttsx3
+engine, then gTTS over the network as a fallback). The local engine runs
+in a small process pool because pyttsx3 drivers are neither thread-safe
+nor non-blocking.
+
+Audio is stored under audio/ as <sha256(engine, language, normalized text)>.<ext>,
+so identical narratives are synthesized once and later requests return
+the existing file immediately. Templated narratives can instead be
+rendered segment by segment and stitched, so only never-seen phrases
+(usually just a number) need synthesis, or streamed sentence by sentence
+as each clip finishes. The directory is kept under
+AUDIO_CACHE_MAX_BYTES by deleting least-recently-used files.
+"""
 from gtts import gTTS
 from pathlib import Path
-import uuid
+import os
+import re
+import shutil
 import time
-from typing import Optional
+import wave
+import struct
+import hashlib
+import mimetypes
+import threading
+import uuid
+import unicodedata
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Tuple
 
+AUDIO_DIR = Path("audio")
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+# Evict down to this fraction of the limit so eviction doesn't run on every write
+AUDIO_CACHE_LOW_WATERMARK = 0.9
+TTS_ENGINES = os.getenv("TTS_ENGINES", "pyttsx3,gtts")
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "2"))
+TTS_TIMEOUT = float(os.getenv("TTS_TIMEOUT", "30"))  # seconds a local synthesis may run
+TTS_STREAM_WORKERS = int(os.getenv("TTS_STREAM_WORKERS", "4"))
+# How long an engine that failed to start is skipped before trying it again
+ENGINE_RETRY_AFTER = 300
 
-def generate_audio(text: str, language: str, max_retries: int = 3) -> Optional[str]:
+# gTTS language mapping
+LANGUAGE_MAP = {
+    "en": "en",
+    "hi": "hi",
+    "or": "hi"  # gTTS doesn't support Odia — fallback to Hindi voice
+}
+
+# Striped locks: same key → same lock, without one lock object per text ever seen.
+# Held only to check the cache and publish a file, never while synthesizing.
+_key_locks = [threading.Lock() for _ in range(64)]
+_inflight: Dict[str, threading.Event] = {}  # key → set when its render finishes
+_size_lock = threading.Lock()
+_cached_bytes: Optional[int] = None
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stitched": 0, "fallbacks": 0, "evicted_files": 0, "evicted_bytes": 0}
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += n
+
+
+def normalize_text(text: str) -> str:
+    """NFC-normalize and collapse whitespace so cosmetic differences share audio."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def audio_cache_key(text: str, tts_lang: str, engine: str = "gtts") -> str:
+    payload = "\0".join((engine, tts_lang, normalize_text(text)))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def audio_media_type(path: str) -> str:
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+# ---------- Engines ----------
+
+class EngineDown(Exception):
+    """The engine can't serve any request right now (driver missing, worker pool broken)."""
+
+
+class TTSEngine:
     """
-    Generate audio from text using gTTS.
-    Returns file path on success, None on failure.
-    Retries up to max_retries times on network errors.
+    A speech synthesizer. Subclasses set `name` and `extension` and
+    implement `voice_for` and `synthesize`.
     """
 
-    # gTTS language mapping
-    LANGUAGE_MAP = {
-        "en": "en",
-        "hi": "hi",
-        "or": "hi"  # gTTS doesn't support Odia — fallback to Hindi voice
-    }
+    name = ""
+    extension = ""
+    network = False  # network engines get retries with backoff
 
-    tts_lang = LANGUAGE_MAP.get(language, "en")
+    def voice_for(self, language: str) -> Optional[str]:
+        """Engine voice/language code for an app language, or None if unsupported."""
+        raise NotImplementedError
 
-    audio_folder = Path("audio")
-    audio_folder.mkdir(exist_ok=True)
+    def synthesize(self, text: str, voice: str, file_path: Path) -> None:
+        """Raise LookupError if the voice can't be used, EngineDown if nothing can be synthesized."""
+        raise NotImplementedError
 
-    filename = f"{uuid.uuid4()}.mp3"
-    file_path = audio_folder / filename
+    def available(self) -> bool:
+        return True
 
-    for attempt in range(max_retries):
+
+class GTTSEngine(TTSEngine):
+    """Google Translate TTS over the network (MP3)."""
+
+    name = "gtts"
+    extension = "mp3"
+    network = True
+
+    def voice_for(self, language: str) -> Optional[str]:
+        return LANGUAGE_MAP.get(language, "en")
+
+    def synthesize(self, text: str, voice: str, file_path: Path) -> None:
+        tts = gTTS(text=text, lang=voice)
+        tts.save(str(file_path))
+
+
+# pyttsx3 state inside each worker process
+_worker_engine = None
+_worker_voices: Dict[str, Optional[str]] = {}
+
+
+def _pyttsx3_synthesize(text: str, language: str, path: str) -> None:
+    """Runs in a TTS worker process: speak `text` into a WAV file."""
+    global _worker_engine
+    if _worker_engine is None:
         try:
-            tts = gTTS(text=text, lang=tts_lang)
-            tts.save(str(file_path))
-            return str(file_path)
+            import pyttsx3
+            _worker_engine = pyttsx3.init()
         except Exception as e:
-            print(f"TTS attempt {attempt + 1}/{max_retries} failed: {str(e)}")
-            if attempt < max_retries - 1:
-                time.sleep(1)  # Wait 1 second before retry
+            raise EngineDown(f"pyttsx3 driver unavailable: {str(e)}")
+
+    if language not in _worker_voices:
+        match = None
+        for voice in _worker_engine.getProperty("voices"):
+            codes = [
+                c.decode("utf-8", "ignore") if isinstance(c, bytes) else str(c)
+                for c in (voice.languages or [])
+            ]
+            ids = [voice.id.split("/")[-1].split("\\")[-1].lower()]
+            if any(c.strip("\x05").lower().startswith(language) for c in codes + ids):
+                match = voice.id
+                break
+        _worker_voices[language] = match
+
+    voice_id = _worker_voices[language]
+    if voice_id is None:
+        raise LookupError(f"No local voice for language '{language}'")
+
+    _worker_engine.setProperty("voice", voice_id)
+    _worker_engine.save_to_file(text, path)
+    _worker_engine.runAndWait()
+
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        raise RuntimeError("Local TTS produced no audio")
+
+
+class LocalPoolEngine(TTSEngine):
+    """
+    Offline engine whose synthesis function runs in a process pool.
+
+    At most `workers` syntheses are submitted at a time, so each starts
+    as soon as it is submitted and `timeout` covers only its own run, not
+    the wait for a free worker. A synthesis that overruns fails alone and
+    keeps its worker until it finishes; the pool is replaced only once it
+    is broken or every worker is stuck.
+    """
+
+    network = False
+
+    def __init__(self, worker, workers: int = TTS_WORKERS, timeout: float = TTS_TIMEOUT):
+        self.worker = worker
+        self.workers = workers
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(workers)
+        self._stuck: set = set()  # futures of timed-out syntheses still holding a worker
+        self._pool_lock = threading.Lock()
+        self._unsupported: set = set()
+
+    def _submit(self, *args) -> Future:
+        """Submit to the pool once a worker is free; the slot is returned when the call ends."""
+        with self._pool_lock:
+            slots = self._slots
+        slots.acquire()
+        try:
+            with self._pool_lock:
+                if self._pool is None:
+                    # spawn: worker processes must not inherit the server's threads
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                future = self._pool.submit(self.worker, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def _timed_out(self, future: Future) -> bool:
+        """Track a synthesis that overran; True if now every worker is stuck."""
+        with self._pool_lock:
+            if future.done():
+                return False
+            self._stuck.add(future)
+            stuck = len(self._stuck)
+        future.add_done_callback(self._unstuck)
+        return stuck >= self.workers
+
+    def _unstuck(self, future: Future) -> None:
+        with self._pool_lock:
+            self._stuck.discard(future)
+
+    def voice_for(self, language: str) -> Optional[str]:
+        return None if language in self._unsupported else language
+
+    def synthesize(self, text: str, voice: str, file_path: Path) -> None:
+        try:
+            future = self._submit(text, voice, str(file_path))
+        except BrokenProcessPool as e:
+            self._replace()
+            raise EngineDown(f"{self.name} worker pool broken: {str(e)}")
+        try:
+            future.result(timeout=self.timeout)
+        except LookupError:
+            self._unsupported.add(voice)
+            raise
+        except BrokenProcessPool as e:
+            self._replace()
+            raise EngineDown(f"{self.name} worker pool broken: {str(e)}")
+        except FutureTimeout:
+            if self._timed_out(future):
+                self._replace()
+                raise EngineDown(f"all {self.name} workers stuck past {self.timeout}s")
+            raise TimeoutError(f"{self.name} synthesis took over {self.timeout}s")
+
+    def _replace(self) -> None:
+        """Drop a broken or stuck pool; the next synthesis starts fresh workers."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+            self._slots = threading.BoundedSemaphore(self.workers)
+            self._stuck = set()
+
+    def shutdown(self) -> None:
+        self._replace()
+
+
+class Pyttsx3Engine(LocalPoolEngine):
+    """Offline pyttsx3 (SAPI5 / NSSpeech / eSpeak) voices (WAV)."""
+
+    name = "pyttsx3"
+    extension = "wav"
+
+    def __init__(self, **kwargs):
+        super().__init__(_pyttsx3_synthesize, **kwargs)
+
+    def available(self) -> bool:
+        try:
+            import pyttsx3  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+
+ENGINES: Dict[str, TTSEngine] = {
+    "pyttsx3": Pyttsx3Engine(),
+    "gtts": GTTSEngine(),
+}
+_engine_down_until: Dict[str, float] = {}
+
+
+def register_engine(engine: TTSEngine) -> None:
+    ENGINES[engine.name] = engine
+
+
+def engine_chain(names: Optional[str] = None) -> List[TTSEngine]:
+    """Configured engines, in preference order, that are installed and not backed off."""
+    now = time.monotonic()
+    chain = []
+    for name in (names or TTS_ENGINES).split(","):
+        engine = ENGINES.get(name.strip())
+        if engine is None or _engine_down_until.get(engine.name, 0) > now:
+            continue
+        if engine.available():
+            chain.append(engine)
+    return chain
+
+
+def shutdown_tts() -> None:
+    """Stop local engine worker processes and the streaming pool."""
+    for engine in ENGINES.values():
+        if isinstance(engine, LocalPoolEngine):
+            engine.shutdown()
+    if _stream_executor is not None:
+        _stream_executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------- Audio cache ----------
+
+def _lock_for(key: str) -> threading.Lock:
+    return _key_locks[int(key[:8], 16) % len(_key_locks)]
+
+
+def _directory_size() -> int:
+    total = 0
+    for entry in os.scandir(AUDIO_DIR):
+        if entry.is_file() and not entry.name.endswith(".part"):
+            total += entry.stat().st_size
+    return total
+
+
+def enforce_audio_cache_limit(max_bytes: Optional[int] = None) -> int:
+    """
+    Delete least-recently-used audio files until the directory is under
+    the low watermark. Returns the number of files removed.
+    """
+    global _cached_bytes
+    max_bytes = AUDIO_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    with _size_lock:
+        entries = []
+        total = 0
+        for entry in os.scandir(AUDIO_DIR):
+            if entry.is_file() and not entry.name.endswith(".part"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+
+        removed = 0
+        if total > max_bytes:
+            target = max_bytes * AUDIO_CACHE_LOW_WATERMARK
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                total -= size
+                removed += 1
+                _count("evicted_files")
+                _count("evicted_bytes", size)
+
+        _cached_bytes = total
+    return removed
+
+
+def _account(size: int) -> None:
+    """Track directory size incrementally; evict once it passes the limit."""
+    global _cached_bytes
+    with _size_lock:
+        if _cached_bytes is None:
+            _cached_bytes = _directory_size()
+        else:
+            _cached_bytes += size
+        over = _cached_bytes > AUDIO_CACHE_MAX_BYTES
+    if over:
+        enforce_audio_cache_limit()
+
+
+def audio_cache_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    return {
+        **stats,
+        "bytes": _cached_bytes,
+        "max_bytes": AUDIO_CACHE_MAX_BYTES,
+        "engines": [engine.name for engine in engine_chain()],
+    }
+
+
+def _cached_path(key: str, engine: TTSEngine) -> Path:
+    return AUDIO_DIR / f"{key}.{engine.extension}"
+
+
+def _part_path(file_path: Path) -> Path:
+    """Unique temp file next to the target, so renders never share one."""
+    return file_path.with_name(f"{file_path.name}.{uuid.uuid4().hex[:8]}.part")
+
+
+def _claim(key: str, file_path: Path) -> Optional[threading.Event]:
+    """
+    None if file_path is cached (possibly after waiting for another thread
+    rendering the same key); otherwise an event the caller must pass to
+    _release once it has rendered or given up.
+    """
+    while True:
+        with _lock_for(key):
+            if _touch_if_cached(file_path):
+                return None
+            pending = _inflight.get(key)
+            if pending is None:
+                claim = _inflight[key] = threading.Event()
+                return claim
+        pending.wait()
+
+
+def _release(key: str, claim: threading.Event) -> None:
+    with _lock_for(key):
+        _inflight.pop(key, None)
+    claim.set()
+
+
+def _publish(key: str, tmp_path: Path, file_path: Path) -> None:
+    with _lock_for(key):
+        os.replace(tmp_path, file_path)
+    _account(file_path.stat().st_size)
+
+
+def _touch_if_cached(file_path: Path) -> bool:
+    try:
+        os.utime(file_path)  # mark as recently used for eviction
+    except FileNotFoundError:
+        return False
+    _count("hits")
+    return True
+
+
+def _render(engine: TTSEngine, text: str, language: str, max_retries: int) -> Optional[str]:
+    """Cached synthesis of `text` with one engine. None if the engine can't produce it."""
+    voice = engine.voice_for(language)
+    if voice is None:
+        return None
+
+    key = audio_cache_key(text, voice, engine.name)
+    file_path = _cached_path(key, engine)
+
+    # Concurrent requests for the same narrative synthesize it once
+    claim = _claim(key, file_path)
+    if claim is None:
+        return str(file_path)
+
+    _count("misses")
+    tmp_path = _part_path(file_path)
+    attempts = max_retries if engine.network else 1
+    try:
+        for attempt in range(attempts):
+            try:
+                engine.synthesize(normalize_text(text), voice, tmp_path)
+                _publish(key, tmp_path, file_path)
+                return str(file_path)
+            except LookupError as e:
+                print(f"TTS engine {engine.name} cannot speak '{language}': {str(e)}")
+                break
+            except EngineDown as e:
+                # Driver missing or worker pool gone: skip the engine for a while
+                print(f"TTS engine {engine.name} down: {str(e)}")
+                _engine_down_until[engine.name] = time.monotonic() + ENGINE_RETRY_AFTER
+                break
+            except Exception as e:
+                # Only this text failed (e.g. a synthesis timeout); the engine stays in use
+                print(f"TTS {engine.name} attempt {attempt + 1}/{attempts} failed: {str(e)}")
+                if attempt < attempts - 1:
+                    time.sleep(1)  # Wait 1 second before retry
+        tmp_path.unlink(missing_ok=True)
+        return None
+    finally:
+        _release(key, claim)
+
+
+def generate_audio(text: str, language: str, max_retries: int = 3) -> Optional[str]:
+    """
+    Generate audio from text with the first engine in the chain that can.
+    Returns file path on success, None on failure.
+    Identical (normalized) text in the same voice returns the cached file.
+    Network engines are retried up to max_retries times.
+    """
+
+    AUDIO_DIR.mkdir(exist_ok=True)
+
+    for position, engine in enumerate(engine_chain()):
+        path = _render(engine, text, language, max_retries)
+        if path:
+            if position:
+                _count("fallbacks")
+            return path
 
     print("TTS failed after all retries — returning without audio")
     return None
+
+
+# ---------- Segment stitching ----------
+
+def _mp3_frames(data: bytes) -> bytes:
+    """MP3 bytes without ID3v2 header / ID3v1 trailer, so clips concatenate cleanly."""
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = 0
+        for b in data[6:10]:
+            size = (size << 7) | (b & 0x7F)  # syncsafe integer
+        data = data[10 + size:]
+    if len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+
+def _concatenate(parts: List[str], extension: str, out_path: Path) -> None:
+    if extension == "wav":
+        with wave.open(str(out_path), "wb") as out:
+            for i, part in enumerate(parts):
+                with wave.open(part, "rb") as clip:
+                    if i == 0:
+                        out.setparams(clip.getparams())
+                    out.writeframes(clip.readframes(clip.getnframes()))
+    else:
+        with open(out_path, "wb") as out:
+            for part in parts:
+                out.write(_mp3_frames(Path(part).read_bytes()))
+
+
+def _stitch_key(engine: TTSEngine, segments: List[str], voice: str) -> str:
+    keys = [audio_cache_key(s, voice, engine.name) for s in segments]
+    return hashlib.sha256("\0".join(["stitch"] + keys).encode("utf-8")).hexdigest()
+
+
+def _stitch(engine: TTSEngine, segments: List[str], language: str, max_retries: int) -> Optional[str]:
+    voice = engine.voice_for(language)
+    if voice is None:
+        return None
+
+    key = _stitch_key(engine, segments, voice)
+    file_path = _cached_path(key, engine)
+
+    with _lock_for(key):
+        if _touch_if_cached(file_path):
+            return str(file_path)
+
+    parts = []
+    for segment in segments:
+        part = _render(engine, segment, language, max_retries)
+        if part is None:
+            return None
+        parts.append(part)
+
+    claim = _claim(key, file_path)
+    if claim is None:
+        return str(file_path)
+    try:
+        tmp_path = _part_path(file_path)
+        try:
+            _concatenate(parts, engine.extension, tmp_path)
+            _publish(key, tmp_path, file_path)
+        except (OSError, wave.Error) as e:
+            # A segment was evicted mid-stitch; the caller falls back to full-text TTS
+            print(f"Audio stitching failed: {str(e)}")
+            tmp_path.unlink(missing_ok=True)
+            return None
+        _count("stitched")
+        return str(file_path)
+    finally:
+        _release(key, claim)
+
+
+def generate_segmented_audio(segments: List[str], language: str, max_retries: int = 3) -> Optional[str]:
+    """
+    Synthesize each segment through the audio cache and concatenate them
+    into one file (itself cached by the segment keys). All segments of a
+    file come from one engine so their formats match. Returns None if no
+    engine can render every segment, so callers can fall back to
+    generate_audio on the full text.
+    """
+    segments = [s for s in segments if normalize_text(s)]
+    if not segments:
+        return None
+
+    AUDIO_DIR.mkdir(exist_ok=True)
+
+    for position, engine in enumerate(engine_chain()):
+        path = _stitch(engine, segments, language, max_retries)
+        if path:
+            if position:
+                _count("fallbacks")
+            return path
+    return None
+
+
+# ---------- Planned paths ----------
+
+def planned_audio_path(text: str, language: str, segments: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Where this narrative's audio will be cached, before it is rendered:
+    the content-addressed path of the stitched `segments` (or of the full
+    text) under the first engine that speaks the language. None if no
+    engine can. Pair with publish_planned once the audio is rendered.
+    """
+    segments = [s for s in segments or [] if normalize_text(s)]
+    for engine in engine_chain():
+        voice = engine.voice_for(language)
+        if voice is None:
+            continue
+        key = _stitch_key(engine, segments, voice) if segments else audio_cache_key(text, voice, engine.name)
+        return str(_cached_path(key, engine))
+    return None
+
+
+def publish_planned(path: Optional[str], planned: Optional[str]) -> Optional[str]:
+    """
+    Copy rendered audio to its planned path when the render fell back
+    (stitching failed, or the planned engine did), so a URL stored before
+    rendering still resolves. Returns the path now holding the audio.
+    """
+    if not path or not planned or path == planned:
+        return path
+    target = Path(planned)
+    if Path(path).suffix != target.suffix:
+        print(f"Audio rendered as {Path(path).suffix}, planned as {target.suffix}: {planned} stays missing")
+        return path
+    tmp_path = _part_path(target)
+    try:
+        shutil.copyfile(path, tmp_path)
+        _publish(target.stem, tmp_path, target)
+    except OSError as e:
+        print(f"Publishing planned audio failed: {str(e)}")
+        tmp_path.unlink(missing_ok=True)
+        return path
+    return planned
+
+
+# ---------- Streaming ----------
+
+_stream_executor: Optional[ThreadPoolExecutor] = None
+_stream_executor_lock = threading.Lock()
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a narrative after sentence-ending punctuation (including the Devanagari danda)."""
+    parts = re.split(r"(?<=[.!?\u0964\u0965])\s+", normalize_text(text))
+    return [p for p in parts if p]
+
+
+def _stream_pool() -> ThreadPoolExecutor:
+    global _stream_executor
+    with _stream_executor_lock:
+        if _stream_executor is None:
+            _stream_executor = ThreadPoolExecutor(max_workers=TTS_STREAM_WORKERS, thread_name_prefix="tts-stream")
+        return _stream_executor
+
+
+def _streaming_wav_header(params) -> bytes:
+    """RIFF header with unknown (maximum) sizes, as used for live WAV streams."""
+    block_align = params.nchannels * params.sampwidth
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+        + b"fmt " + struct.pack(
+            "<IHHIIHH", 16, 1, params.nchannels, params.framerate,
+            params.framerate * block_align, block_align, params.sampwidth * 8,
+        )
+        + b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+
+def _clip_bytes(path: str, extension: str, first: bool) -> bytes:
+    """One clip's payload for a continuous stream (header only on the first WAV clip)."""
+    if extension == "wav":
+        with wave.open(path, "rb") as clip:
+            frames = clip.readframes(clip.getnframes())
+            return (_streaming_wav_header(clip.getparams()) if first else b"") + frames
+    return _mp3_frames(Path(path).read_bytes())
+
+
+def open_audio_stream(
+    chunks: List[str],
+    language: str,
+    max_retries: int = 3,
+    workers: int = TTS_STREAM_WORKERS,
+) -> Optional[Tuple[str, Iterator[bytes]]]:
+    """
+    Stream `chunks` (usually split_sentences of a narrative) as one audio
+    stream. The first chunk is rendered before returning, which picks the
+    engine and so the media type; the rest are rendered `workers` at a
+    time ahead of the reader and yielded in order as each finishes. Each
+    clip goes through the audio cache. Returns (media_type, iterator), or
+    None if no engine can render the first chunk.
+    """
+    chunks = [c for c in chunks if normalize_text(c)]
+    if not chunks:
+        return None
+
+    AUDIO_DIR.mkdir(exist_ok=True)
+
+    for position, engine in enumerate(engine_chain()):
+        first = _render(engine, chunks[0], language, max_retries)
+        if first:
+            if position:
+                _count("fallbacks")
+            break
+    else:
+        return None
+
+    def stream() -> Iterator[bytes]:
+        pool = _stream_pool()
+        rest = iter(chunks[1:])
+        pending = deque()
+
+        def fill():
+            while len(pending) < max(1, workers):
+                chunk = next(rest, None)
+                if chunk is None:
+                    return
+                pending.append(pool.submit(_render, engine, chunk, language, max_retries))
+
+        try:
+            fill()
+            yield _clip_bytes(first, engine.extension, first=True)
+            while pending:
+                path = pending.popleft().result()
+                fill()
+                try:
+                    if path is None:
+                        raise OSError("render failed")
+                    data = _clip_bytes(path, engine.extension, first=False)
+                except (OSError, wave.Error) as e:
+                    # Keep the audio going; a missing sentence beats a cut-off call
+                    print(f"TTS stream: skipping a chunk: {str(e)}")
+                    continue
+                yield data
+        finally:
+            # Client went away: drop work that hasn't started
+            for future in pending:
+                future.cancel()
+
+    return audio_media_type(f"x.{engine.extension}"), stream()
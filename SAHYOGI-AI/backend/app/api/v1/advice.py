@@ -1,13 +1,19 @@
 from fastapi import APIRouter
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from app.models.api_response import success_response, error_response
 from app.core.advice_engine import generate_full_advice
-from app.core.language import format_advice_response
-from app.services.supabase_service import (
-    get_farmer_by_phone,
-    get_soil_by_farmer_id
+from app.core.language import format_advice_response, format_advice_segments
+from app.services.profile_repository import get_profile
+from app.services.executor import run_cpu, run_io
+from app.ai.tts import (
+    audio_media_type,
+    generate_audio,
+    generate_segmented_audio,
+    open_audio_stream,
+    split_sentences,
 )
-from app.ai.tts import generate_audio
+from app.ai.gemini_explainer import enhance_advisory
+from app.ai.response_cache import data_version
 from pathlib import Path
 from datetime import datetime
 
@@ -28,16 +34,8 @@ def get_market_file(crop: str) -> str:
     return str(MARKET_DIR / "wheat_prices.csv")
 
 
-@router.get("/{phone}")
-def get_advice(phone: str):
-
-    farmer = get_farmer_by_phone(phone)
-
-    if not farmer:
-        return error_response("Farmer not found", error="not_found", status_code=404)
-
-    soil = get_soil_by_farmer_id(farmer["id"])
-
+async def build_advice(farmer: dict, soil: dict):
+    """Structured advice for a farmer profile (CPU work off the event loop)."""
     soil_data = {
         "nitrogen": soil.get("nitrogen") if soil else None,
         "phosphorus": soil.get("phosphorus") if soil else None,
@@ -49,15 +47,27 @@ def get_advice(phone: str):
         farmer["sowing_date"], "%Y-%m-%d"
     ).date()
 
-    market_file = get_market_file(farmer["crop"])
-
-    structured_advice = generate_full_advice(
+    return await run_cpu(
+        generate_full_advice,
         crop=farmer["crop"],
         sowing_date=sowing_date,
         soil_data=soil_data,
-        market_file_path=market_file
+        market_file_path=get_market_file(farmer["crop"])
     )
 
+
+@router.get("/{phone}")
+async def get_advice(phone: str):
+
+    profile = await get_profile(phone)
+
+    if not profile:
+        return error_response("Farmer not found", error="not_found", status_code=404)
+
+    farmer, soil = profile
+
+    structured_advice = await build_advice(farmer, soil)
+
     narrative = format_advice_response(
         structured_advice,
         language=farmer.get("language", "en")
@@ -72,43 +82,65 @@ def get_advice(phone: str):
 
 # 🔊 AUDIO ENDPOINT
 @router.get("/{phone}/audio")
-def get_advice_audio(phone: str):
+async def get_advice_audio(phone: str):
 
-    farmer = get_farmer_by_phone(phone)
+    profile = await get_profile(phone)
 
-    if not farmer:
+    if not profile:
         return error_response("Farmer not found", error="not_found", status_code=404)
 
-    soil = get_soil_by_farmer_id(farmer["id"])
-
-    soil_data = {
-        "nitrogen": soil.get("nitrogen") if soil else None,
-        "phosphorus": soil.get("phosphorus") if soil else None,
-        "potassium": soil.get("potassium") if soil else None,
-        "ph": soil.get("ph") if soil else None,
-    }
+    farmer, soil = profile
 
-    sowing_date = datetime.strptime(
-        farmer["sowing_date"], "%Y-%m-%d"
-    ).date()
+    structured_advice = await build_advice(farmer, soil)
 
-    market_file = get_market_file(farmer["crop"])
+    language = farmer.get("language", "en")
 
-    structured_advice = generate_full_advice(
-        crop=farmer["crop"],
-        sowing_date=sowing_date,
-        soil_data=soil_data,
-        market_file_path=market_file
+    # Stitch cached phrase clips; only unseen segments need a TTS call
+    audio_path = await run_io(
+        generate_segmented_audio,
+        format_advice_segments(structured_advice, language),
+        language
     )
 
-    narrative = format_advice_response(
-        structured_advice,
-        language=farmer.get("language", "en")
-    )
+    if not audio_path:
+        narrative = format_advice_response(structured_advice, language=language)
+        audio_path = await run_io(generate_audio, narrative, language)
+
+    if not audio_path:
+        return error_response("Audio generation failed", error="tts_failed", status_code=503)
 
-    audio_path = generate_audio(
-        narrative,
-        farmer.get("language", "en")
+    return FileResponse(audio_path, media_type=audio_media_type(audio_path))
+
+
+# 🔊 STREAMING AUDIO ENDPOINT (first sentence plays while the rest render)
+@router.get("/{phone}/audio/stream")
+async def stream_advice_audio(phone: str):
+
+    profile = await get_profile(phone)
+
+    if not profile:
+        return error_response("Farmer not found", error="not_found", status_code=404)
+
+    farmer, soil = profile
+
+    structured_advice = await build_advice(farmer, soil)
+
+    language = farmer.get("language", "en")
+
+    # Gemini narrative split into sentences, or the cached template phrases
+    enhanced_text = await run_io(
+        enhance_advisory, structured_advice, language, data_version(get_market_file(farmer["crop"]))
     )
+    if enhanced_text:
+        chunks = split_sentences(enhanced_text)
+    else:
+        chunks = format_advice_segments(structured_advice, language)
+
+    opened = await run_io(open_audio_stream, chunks, language)
+
+    if not opened:
+        return error_response("Audio generation failed", error="tts_failed", status_code=503)
 
-    return FileResponse(audio_path, media_type="audio/mpeg")
+    media_type, stream = opened
+    # No Content-Length: sent with chunked transfer encoding as clips finish
+    return StreamingResponse(stream, media_type=media_type)
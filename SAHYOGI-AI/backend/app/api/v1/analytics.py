@@ -1,9 +1,107 @@
-from fastapi import APIRouter
-from app.services.analytics_service import get_analytics_summary
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Optional, Union
+
+from fastapi import APIRouter, Query
+from pydantic import BaseModel
+from app.models.api_response import success_response, error_response
+from app.services.analytics_service import get_analytics_summary, get_call_timeseries
+from app.services.executor import run_io
+from app.services.log_exporter import cancel_export_job, get_export_job, resolve_format, start_export_job
 
 router = APIRouter()
 
+BACKEND_DIR = Path(__file__).resolve().parents[3]
+EXPORT_DIR = Path(os.getenv("CALL_EXPORT_DIR", str(BACKEND_DIR / "exports")))
+
+
+class ExportRequest(BaseModel):
+    start: Optional[Union[datetime, date]] = None
+    end: Optional[Union[datetime, date]] = None
+    format: str = "auto"
+
+
+def _as_datetime(value: Union[date, datetime, None]) -> Optional[datetime]:
+    """Dates mean midnight UTC; naive datetimes are taken as UTC."""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        return datetime.combine(value, time.min, tzinfo=timezone.utc)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
 
 @router.get("/summary")
-def analytics_summary():
-    return get_analytics_summary()
+async def analytics_summary(
+    start: Optional[Union[datetime, date]] = Query(None, description="Window start (inclusive)"),
+    end: Optional[Union[datetime, date]] = Query(None, description="Window end (exclusive)"),
+):
+    return await run_io(get_analytics_summary, _as_datetime(start), _as_datetime(end))
+
+
+@router.get("/timeseries")
+async def analytics_timeseries(
+    start: Optional[Union[datetime, date]] = Query(None, description="Range start (inclusive), default 7 days ago"),
+    end: Optional[Union[datetime, date]] = Query(None, description="Range end (exclusive), default now"),
+    bucket: str = Query("day", pattern="^(hour|day)$"),
+):
+    """Calls per hour or day over a date range."""
+    end_dt = _as_datetime(end) or datetime.now(timezone.utc)
+    start_dt = _as_datetime(start) or end_dt - timedelta(days=7)
+
+    try:
+        series = await run_io(get_call_timeseries, start_dt, end_dt, bucket)
+    except ValueError as e:
+        return error_response(str(e), error="invalid_range", status_code=400)
+
+    return success_response({
+        "bucket": bucket,
+        "start": start_dt.isoformat(),
+        "end": end_dt.isoformat(),
+        "series": series,
+    })
+
+
+@router.post("/export")
+def start_call_export(request: ExportRequest):
+    """
+    Start a background export of calls in [start, end). Repeating the same
+    request resumes an interrupted export into the same directory; without
+    an end it also exports the calls logged since the last run.
+    """
+    start, end = _as_datetime(request.start), _as_datetime(request.end)
+    try:
+        fmt = resolve_format(request.format)
+    except (ValueError, RuntimeError) as e:
+        return error_response(str(e), error="invalid_format", status_code=400)
+
+    name = "calls_{}_{}".format(
+        start.strftime("%Y%m%dT%H%M%S") if start else "begin",
+        end.strftime("%Y%m%dT%H%M%S") if end else "latest",
+    )
+    out_dir = str(EXPORT_DIR / name)
+
+    try:
+        job_id = start_export_job(out_dir, start=start, end=end, format=fmt)
+    except RuntimeError as e:
+        return error_response(str(e), error="export_running", status_code=409)
+
+    return success_response(get_export_job(job_id), message="Export started")
+
+
+@router.get("/export/{job_id}")
+def call_export_status(job_id: str):
+    job = get_export_job(job_id)
+    if job is None:
+        return error_response("Export job not found", error="not_found", status_code=404)
+    return success_response(job)
+
+
+@router.delete("/export/{job_id}")
+def cancel_call_export(job_id: str):
+    """Stop a running export after its current page; re-POST to resume."""
+    if not cancel_export_job(job_id):
+        return error_response("No running export with that id", error="not_found", status_code=404)
+    return success_response(get_export_job(job_id), message="Export cancelling")
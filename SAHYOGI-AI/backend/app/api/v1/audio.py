@@ -1,10 +1,27 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from fastapi.responses import FileResponse
 from pathlib import Path
-from app.models.api_response import error_response
+from app.models.api_response import success_response, error_response
+from app.ai.tts import audio_media_type
+from app.services.audio_jobs import MAX_WAIT, wait_for_audio_job
 
 router = APIRouter()
 
+
+@router.get("/jobs/{job_id}")
+async def get_audio_job(job_id: str, wait: float = Query(0, ge=0, le=MAX_WAIT)):
+    """
+    Status of a background audio job. With `wait`, holds the request
+    until the audio is ready (or `wait` seconds pass).
+    """
+    job = await wait_for_audio_job(job_id, wait)
+
+    if job is None:
+        return error_response("Audio job not found", error="not_found", status_code=404)
+
+    return success_response(job)
+
+
 @router.get("/{filename}")
 def get_audio(filename: str):
     file_path = Path("audio") / filename
@@ -14,7 +31,7 @@ def get_audio(filename: str):
 
     return FileResponse(
         path=str(file_path),
-        media_type="audio/mpeg",
+        media_type=audio_media_type(filename),
         filename=filename
     )
 
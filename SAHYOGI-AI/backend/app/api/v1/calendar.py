@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 from datetime import datetime
 
-from app.services.supabase_service import get_farmer_by_phone
+from app.services.profile_repository import get_profile
 from app.core.crop_calendar import generate_crop_calendar
 from app.models.api_response import success_response, error_response
 
@@ -9,22 +9,24 @@ router = APIRouter()
 
 
 @router.get("/{phone}")
-def get_crop_calendar(phone: str):
+async def get_crop_calendar(phone: str):
     """
     Get a personalized crop calendar for a farmer based on their
     crop type and sowing date.
     """
 
     # Fetch farmer data
-    farmer = get_farmer_by_phone(phone)
+    profile = await get_profile(phone)
 
-    if not farmer:
+    if not profile:
         return error_response(
             message="Farmer not found",
             error="not_found",
             status_code=404
         )
 
+    farmer, _ = profile
+
     # Parse sowing date
     try:
         sowing_date = datetime.strptime(
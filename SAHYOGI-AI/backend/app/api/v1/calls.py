@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from datetime import datetime
@@ -5,22 +6,22 @@ from pathlib import Path
 
 # Core engines
 from app.core.advice_engine import generate_full_advice
-from app.core.language import format_advice_response
+from app.core.language import format_advice_response, format_advice_segments
 from app.core.market_projection import generate_market_projection
 from app.core.risk_engine import calculate_risk_and_sell_confidence, volatility_alert
 from app.core.mandi_engine import mandi_price_comparison, fair_price_indicator
 from app.core.strategy_engine import generate_partial_sell_strategy
 
 # AI
-from app.ai.tts import generate_audio
+from app.ai.tts import generate_audio, generate_segmented_audio, planned_audio_path, publish_planned
 from app.ai.gemini_explainer import enhance_advisory
+from app.ai.response_cache import data_version
 
 # Services
-from app.services.supabase_service import (
-    get_farmer_by_phone,
-    get_soil_by_farmer_id
-)
+from app.services.profile_repository import get_profile
 from app.services.call_logger import log_call
+from app.services.audio_jobs import audio_url_for, submit_audio_job
+from app.services.executor import run_cpu, run_io
 
 
 router = APIRouter()
@@ -35,16 +36,15 @@ class CallRequest(BaseModel):
 
 
 @router.post("/")
-def simulate_call(request: CallRequest):
+async def simulate_call(request: CallRequest):
 
-    # 🔹 1️⃣ Fetch Farmer
-    farmer = get_farmer_by_phone(request.phone)
-    if not farmer:
+    # 🔹 1️⃣ Fetch Farmer + Soil profile
+    profile = await get_profile(request.phone)
+    if not profile:
         raise HTTPException(status_code=404, detail="Farmer not found")
+    farmer, soil = profile
 
-    # 🔹 2️⃣ Fetch Soil
-    soil = get_soil_by_farmer_id(farmer["id"])
-
+    # 🔹 2️⃣ Soil card (fetched with the farmer in one query)
     soil_data = {
         "nitrogen": soil.get("nitrogen") if soil else None,
         "phosphorus": soil.get("phosphorus") if soil else None,
@@ -57,28 +57,25 @@ def simulate_call(request: CallRequest):
         farmer["sowing_date"], "%Y-%m-%d"
     ).date()
 
-    structured_advice = generate_full_advice(
-        crop=farmer["crop"],
-        sowing_date=sowing_date,
-        soil_data=soil_data,
-        market_file_path=str(MARKET_FILE)
+    # 🔹 4️⃣ Market Projection and 6️⃣ Mandi Comparison run alongside
+    structured_advice, market_projection, mandi_comparison = await asyncio.gather(
+        run_cpu(
+            generate_full_advice,
+            crop=farmer["crop"],
+            sowing_date=sowing_date,
+            soil_data=soil_data,
+            market_file_path=str(MARKET_FILE)
+        ),
+        run_cpu(generate_market_projection, str(MARKET_FILE)),
+        run_cpu(mandi_price_comparison, str(MULTI_MANDI_FILE), "Sambalpur"),
     )
 
-    # 🔹 4️⃣ Market Projection
-    market_projection = generate_market_projection(str(MARKET_FILE))
-
     # 🔹 5️⃣ Advanced Risk Engine
     risk_analysis = calculate_risk_and_sell_confidence(
         structured_advice,
         market_projection
     )
 
-    # 🔹 6️⃣ Mandi Comparison
-    mandi_comparison = mandi_price_comparison(
-        str(MULTI_MANDI_FILE),
-        "Sambalpur"
-    )
-
     # 🔹 7️⃣ Fair Price Indicator
     fair_price = fair_price_indicator(
         current_price=market_projection["current_price"],
@@ -104,22 +101,17 @@ def simulate_call(request: CallRequest):
         language=language
     )
 
-    # 🔹 1️⃣1️⃣ Gemini Enhancement (Optional AI polish)
-    enhanced_text = enhance_advisory(structured_advice, language)
+    # 🔹 1️⃣1️⃣ Gemini Enhancement (Optional AI polish, cached per market data version)
+    enhanced_text = await run_io(
+        enhance_advisory, structured_advice, language, data_version(str(MARKET_FILE))
+    )
     if enhanced_text:
         narrative = enhanced_text
 
-    # 🔹 1️⃣2️⃣ Generate Audio
-    audio_url = None
-    try:
-        audio_path = generate_audio(narrative, language)
-        if audio_path:
-            filename = Path(audio_path).name
-            audio_url = f"/api/v1/audio/{filename}"
-    except Exception as e:
-        print(f"Audio generation failed: {str(e)}")
-
-    # 🔹 1️⃣3️⃣ Log Call
+    # 🔹 1️⃣2️⃣ Call Log (non-blocking; the audio is referenced by the
+    # content-addressed file it will be cached as, which the job renders)
+    segments = None if enhanced_text else format_advice_segments(structured_advice, language)
+    planned_path = planned_audio_path(narrative, language, segments)
     log_call(
         farmer_id=farmer["id"],
         phone=farmer["phone"],
@@ -127,15 +119,26 @@ def simulate_call(request: CallRequest):
         crop=farmer["crop"],
         crop_stage=structured_advice["crop_stage"],
         market_trend=structured_advice["market_trend"],
-        audio_path=audio_url,
+        audio_path=audio_url_for(planned_path),
         advisory_snapshot=structured_advice
     )
 
-    # 🔹 1️⃣4️⃣ Final Response
+    # 🔹 1️⃣3️⃣ Queue Audio (templated narratives are stitched from cached phrases)
+    def render_advice_audio():
+        audio_path = None
+        if segments:
+            audio_path = generate_segmented_audio(segments, language)
+        audio_path = audio_path or generate_audio(narrative, language)
+        return publish_planned(audio_path, planned_path)
+
+    audio_job = submit_audio_job(render_advice_audio)
+
+    # 🔹 1️⃣4️⃣ Final Response (audio follows via audio_job.status_url)
     return {
         "message": "Call simulated successfully",
         "farmer": farmer["name"],
-        "audio_file": audio_url,
+        "audio_file": audio_job["audio_url"],
+        "audio_job": audio_job,
         "enhanced_advisory": narrative,
         "summary": structured_advice,
         "market_projection": market_projection,
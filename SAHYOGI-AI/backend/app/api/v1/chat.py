@@ -1,16 +1,20 @@
+import json
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from datetime import datetime
 from pathlib import Path
 
-from app.services.supabase_service import (
-    get_farmer_by_phone,
-    get_soil_by_farmer_id
-)
+from app.services.profile_repository import get_profile
+from app.services.executor import run_cpu, run_io
 from app.core.advice_engine import generate_full_advice
 from app.core.market_projection import generate_market_projection
-from app.ai.gemini_chat import chat_with_context
-from app.ai.tts import generate_audio
+from app.ai.gemini_chat import chat_with_context, stream_chat_with_context
+from app.ai.knowledge_index import answer_directly
+from app.ai.answer_cache import answer_bucket, answer_cache, shared_advice
+from app.ai.prompts import record_prompt
+from app.ai.tts import generate_audio, split_sentences
+from app.services.audio_jobs import submit_audio_job
 from app.models.api_response import success_response, error_response
 
 
@@ -25,22 +29,31 @@ class ChatRequest(BaseModel):
     question: str
 
 
-@router.post("/")
-def chat_with_farmer(request: ChatRequest):
+async def prepare_chat(request: ChatRequest):
+    """
+    Everything before the LLM call. Returns None if the farmer doesn't
+    exist, else a dict with the farmer, language and either the finished
+    `answer` (knowledge base or answer cache) or the `context` arguments
+    for chat_with_context.
+    """
 
-    # 1️⃣ Fetch farmer
-    farmer = get_farmer_by_phone(request.phone)
+    # 1️⃣ Fetch farmer + soil profile
+    profile = await get_profile(request.phone)
 
-    if not farmer:
-        return error_response(
-            message="Farmer not found",
-            error="not_found",
-            status_code=404
-        )
+    if not profile:
+        return None
 
-    # 2️⃣ Fetch soil data
-    soil = get_soil_by_farmer_id(farmer["id"])
+    farmer, soil = profile
+    language = farmer.get("language", "en")
+    chat = {"farmer": farmer, "language": language, "answer": None, "bucket": None, "context": None}
 
+    # 1️⃣a Factual lookups (MSP, a named scheme) come straight from the knowledge base
+    chat["answer"] = answer_directly(request.question, language)
+    if chat["answer"]:
+        record_prompt("direct", "", 0)
+        return chat
+
+    # 2️⃣ Soil data
     soil_data = {
         "nitrogen": soil.get("nitrogen") if soil else None,
         "phosphorus": soil.get("phosphorus") if soil else None,
@@ -54,17 +67,36 @@ def chat_with_farmer(request: ChatRequest):
     ).date()
 
     # 4️⃣ Generate structured advisory
-    structured_advice = generate_full_advice(
+    structured_advice = await run_cpu(
+        generate_full_advice,
         crop=farmer["crop"],
         sowing_date=sowing_date,
         soil_data=soil_data,
         market_file_path=str(MARKET_FILE)
     )
 
+    # 4️⃣a Answer shared with farmers in the same language/crop/stage (skips Gemini)
+    chat["bucket"] = answer_bucket(request.question, language, farmer["crop"], structured_advice)
+    chat["answer"] = answer_cache.lookup(request.question, chat["bucket"])
+    if chat["answer"]:
+        return chat
+
+    if chat["bucket"] is not None:
+        # 4️⃣b The answer will be shared with the whole bucket: give the model only
+        # what the bucket key covers (no name, district, dates or live prices)
+        chat["context"] = {
+            "structured_advice": shared_advice(request.question, structured_advice),
+            "question": request.question,
+            "language": language,
+            "market_data": None,
+            "farmer_info": {"crop": farmer.get("crop", "N/A")},
+        }
+        return chat
+
     # 5️⃣ Generate market projection data for richer context
     market_data = None
     try:
-        market_data = generate_market_projection(str(MARKET_FILE))
+        market_data = await run_cpu(generate_market_projection, str(MARKET_FILE))
     except Exception as e:
         print(f"Market projection failed (non-critical): {e}")
 
@@ -76,35 +108,116 @@ def chat_with_farmer(request: ChatRequest):
         "sowing_date": farmer.get("sowing_date", "N/A"),
     }
 
-    # 7️⃣ AI Chat Response with enriched context
-    language = farmer.get("language", "en")
+    chat["context"] = {
+        "structured_advice": structured_advice,
+        "question": request.question,
+        "language": language,
+        "market_data": market_data,
+        "farmer_info": farmer_info,
+    }
+    return chat
 
-    response_text = chat_with_context(
-        structured_advice=structured_advice,
-        question=request.question,
-        language=language,
-        market_data=market_data,
-        farmer_info=farmer_info,
-    )
 
-    # 8️⃣ Generate Audio (non-blocking — chat works even if TTS fails)
-    audio_url = None
-    try:
-        audio_path = generate_audio(response_text, language)
-        if audio_path:
-            filename = Path(audio_path).name
-            audio_url = f"/api/v1/audio/{filename}"
-    except Exception as e:
-        print(f"Audio generation failed: {str(e)}")
+@router.post("/")
+async def chat_with_farmer(request: ChatRequest):
+
+    chat = await prepare_chat(request)
+
+    if chat is None:
+        return error_response(
+            message="Farmer not found",
+            error="not_found",
+            status_code=404
+        )
+
+    language = chat["language"]
+
+    # 7️⃣ AI Chat Response with enriched context
+    response_text = chat["answer"]
+    if response_text is None:
+        response_text = await run_io(chat_with_context, **chat["context"])
+        answer_cache.store(request.question, chat["bucket"], response_text)
+
+    # 8️⃣ Queue Audio (rendered in the background — poll audio_job.status_url)
+    audio_job = submit_audio_job(generate_audio, response_text, language, pool="chat")
 
     # 9️⃣ Clean API Response
     return success_response(
         message="Chat response generated successfully",
         data={
-            "farmer": farmer["name"],
+            "farmer": chat["farmer"]["name"],
             "question": request.question,
             "text_response": response_text,
-            "audio_file": audio_url
+            "audio_file": audio_job["audio_url"],
+            "audio_job": audio_job
         }
     )
 
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _sentences(text: str):
+    """Sentences of the text so far; line breaks also end a sentence (bulleted answers)."""
+    return [s for line in text.split("\n") for s in split_sentences(line)]
+
+
+@router.post("/stream")
+async def stream_chat_with_farmer(request: ChatRequest):
+    """
+    Server-Sent Events version of the chat endpoint:
+    `meta`, then `token` events as Gemini generates the answer, an `audio`
+    event (with a job to poll) as each sentence completes, and `done` with
+    the full text — or `error`.
+    """
+
+    chat = await prepare_chat(request)
+
+    if chat is None:
+        return error_response(
+            message="Farmer not found",
+            error="not_found",
+            status_code=404
+        )
+
+    language = chat["language"]
+
+    def events():
+        yield _sse("meta", {"farmer": chat["farmer"]["name"], "question": request.question})
+
+        text = ""
+        audio_jobs = []
+
+        def queue_audio(sentences):
+            for sentence in sentences:
+                audio_jobs.append(submit_audio_job(generate_audio, sentence, language, pool="chat"))
+                yield _sse("audio", {"index": len(audio_jobs) - 1, "text": sentence, "audio_job": audio_jobs[-1]})
+
+        try:
+            pieces = [chat["answer"]] if chat["answer"] else stream_chat_with_context(**chat["context"])
+            for piece in pieces:
+                text += piece
+                yield _sse("token", {"text": piece})
+
+                # TTS starts on finished sentences; the last one may still be growing
+                finished = _sentences(text)[:-1]
+                yield from queue_audio(finished[len(audio_jobs):])
+
+            yield from queue_audio(_sentences(text)[len(audio_jobs):])
+        except Exception as e:
+            print(f"Chat stream failed: {str(e)}")
+            yield _sse("error", {"message": "Chat response failed"})
+            return
+
+        if chat["answer"] is None:
+            answer_cache.store(request.question, chat["bucket"], text)
+
+        yield _sse("done", {"text_response": text, "audio_jobs": audio_jobs})
+
+    # Sync generator: Starlette iterates it in a worker thread, off the event loop
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 from pydantic import BaseModel, Field
 from datetime import date
-from app.services.supabase_service import supabase
+from app.services.supabase_service import get_async_client
+from app.services.profile_repository import get_profile, invalidate_profile
 from app.models.api_response import success_response, error_response
 
 router = APIRouter()
@@ -21,22 +22,19 @@ class FarmerRegistration(BaseModel):
 
 
 @router.post("/")
-def register_farmer(data: FarmerRegistration):
+async def register_farmer(data: FarmerRegistration):
 
     # Check if farmer already exists
-    existing = (
-        supabase.table("farmers")
-        .select("*")
-        .eq("phone", data.phone)
-        .execute()
-    )
+    existing = await get_profile(data.phone)
 
-    if existing.data:
+    if existing:
         return error_response("Farmer already exists", error="duplicate", status_code=400)
 
+    client = await get_async_client()
+
     # Insert farmer
-    farmer_response = (
-        supabase.table("farmers")
+    farmer_response = await (
+        client.table("farmers")
         .insert({
             "phone": data.phone,
             "name": data.name,
@@ -50,7 +48,7 @@ def register_farmer(data: FarmerRegistration):
     farmer = farmer_response.data[0]
 
     # Insert soil data
-    supabase.table("soil_health").insert({
+    await client.table("soil_health").insert({
         "farmer_id": farmer["id"],
         "nitrogen": data.nitrogen,
         "phosphorus": data.phosphorus,
@@ -58,22 +56,21 @@ def register_farmer(data: FarmerRegistration):
         "ph": data.ph
     }).execute()
 
+    # Drop any cached profile so the next read sees the new soil card
+    invalidate_profile(data.phone)
+
     return success_response({
         "farmer_id": farmer["id"]
     }, message="Farmer registered successfully")
 
 
 @router.get("/{phone}")
-def get_farmer(phone: str):
+async def get_farmer(phone: str):
 
-    response = (
-        supabase.table("farmers")
-        .select("*")
-        .eq("phone", phone)
-        .execute()
-    )
+    profile = await get_profile(phone)
 
-    if not response.data:
+    if not profile:
         return error_response("Farmer not found", error="not_found", status_code=404)
 
-    return success_response(response.data[0])
+    farmer, _ = profile
+    return success_response(farmer)
@@ -1,5 +1,11 @@
 from fastapi import APIRouter
 from app.models.api_response import success_response
+from app.services.cache import cache_stats
+from app.services.call_logger import call_log_stats
+from app.ai.tts import audio_cache_stats
+from app.ai.gemini_explainer import advisory_cache_stats
+from app.ai.prompts import prompt_stats
+from app.ai.answer_cache import answer_cache_stats
 
 router = APIRouter()
 
@@ -8,3 +14,38 @@ router = APIRouter()
 def health_check():
     return success_response({"status": "Sahyogi backend running"})
 
+
+@router.get("/cache")
+def cache_health():
+    """In-process cache size, limits and hit/miss/eviction counters."""
+    return success_response(cache_stats())
+
+
+@router.get("/call-log")
+def call_log_health():
+    """Call-log queue depth, batch throughput and spill/replay counters."""
+    return success_response(call_log_stats())
+
+
+@router.get("/audio-cache")
+def audio_cache_health():
+    """TTS audio cache hits, misses, size and evictions."""
+    return success_response(audio_cache_stats())
+
+
+@router.get("/llm-cache")
+def llm_cache_health():
+    """Gemini advisory response cache hit rate, size and evictions."""
+    return success_response(advisory_cache_stats())
+
+
+@router.get("/prompts")
+def prompt_health():
+    """Chat prompt sizes: context-cache vs retrieved-knowledge requests and characters saved."""
+    return success_response(prompt_stats())
+
+
+@router.get("/answer-cache")
+def answer_cache_health():
+    """Chat answer cache hit rate, bypasses (price questions) and evictions."""
+    return success_response(answer_cache_stats())
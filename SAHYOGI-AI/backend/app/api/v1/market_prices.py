@@ -2,15 +2,18 @@
 Multi-crop market prices endpoint.
 Returns current prices, trends, and changes for all available crops.
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from pathlib import Path
+from typing import List, Optional
 
 from app.core.market_projection import generate_market_projection
+from app.core.mandi_engine import get_mandi_trends
 
 router = APIRouter()
 
 BASE_DIR = Path(__file__).resolve().parents[4]
 MARKET_DIR = BASE_DIR / "data" / "market_prices"
+MULTI_MANDI_FILE = MARKET_DIR / "wheat_multi_mandi.csv"
 
 # All supported crops
 SUPPORTED_CROPS = ["wheat", "rice", "maize", "cotton", "sugarcane"]
@@ -56,3 +59,9 @@ def get_all_market_prices():
             continue
 
     return {"crops": results}
+
+
+@router.get("/mandi-trends")
+def get_mandi_price_trends(mandi: Optional[List[str]] = Query(None)):
+    """7-day price trend for every mandi, or only those passed as ?mandi=...&mandi=..."""
+    return {"mandi_trends": get_mandi_trends(str(MULTI_MANDI_FILE), mandi)}
@@ -1,12 +1,11 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from pathlib import Path
 from datetime import datetime
 
-from app.services.supabase_service import (
-    get_farmer_by_phone,
-    get_soil_by_farmer_id
-)
+from app.services.profile_repository import get_profile
+from app.services.executor import run_cpu
 
 from app.core.simulation_engine import simulate_sell_decision
 from app.core.advice_engine import generate_full_advice
@@ -34,16 +33,15 @@ class SimulationRequest(BaseModel):
 
 
 @router.post("/")
-def simulate_sell(request: SimulationRequest):
+async def simulate_sell(request: SimulationRequest):
 
-    # 1️⃣ Fetch Farmer
-    farmer = get_farmer_by_phone(request.phone)
-    if not farmer:
+    # 1️⃣ Fetch Farmer + Soil profile
+    profile = await get_profile(request.phone)
+    if not profile:
         raise HTTPException(status_code=404, detail="Farmer not found")
+    farmer, soil = profile
 
-    # 2️⃣ Fetch Soil Data
-    soil = get_soil_by_farmer_id(farmer["id"])
-
+    # 2️⃣ Soil Data (fetched with the farmer in one query)
     soil_data = {
         "nitrogen": soil.get("nitrogen") if soil else None,
         "phosphorus": soil.get("phosphorus") if soil else None,
@@ -59,17 +57,18 @@ def simulate_sell(request: SimulationRequest):
     # 4️⃣ Resolve crop-specific market file
     market_file = get_market_file(farmer["crop"])
 
-    # 5️⃣ Generate Advisory
-    structured_advice = generate_full_advice(
-        crop=farmer["crop"],
-        sowing_date=sowing_date,
-        soil_data=soil_data,
-        market_file_path=market_file
+    # 5️⃣ + 6️⃣ Advisory and Market Projection (in parallel on the engine pool)
+    structured_advice, market_projection = await asyncio.gather(
+        run_cpu(
+            generate_full_advice,
+            crop=farmer["crop"],
+            sowing_date=sowing_date,
+            soil_data=soil_data,
+            market_file_path=market_file
+        ),
+        run_cpu(generate_market_projection, market_file),
     )
 
-    # 6️⃣ Generate Market Projection
-    market_projection = generate_market_projection(market_file)
-
     # 7️⃣ Calculate Base Risk Confidence
     risk = calculate_risk_and_sell_confidence(
         structured_advice,
@@ -79,7 +78,8 @@ def simulate_sell(request: SimulationRequest):
     base_confidence = risk["sell_confidence"]
 
     # 8️⃣ Run Monte Carlo Simulation
-    simulation_result = simulate_sell_decision(
+    simulation_result = await run_cpu(
+        simulate_sell_decision,
         csv_path=market_file,
         sell_after_days=request.sell_after_days,
         base_confidence=base_confidence
@@ -3,7 +3,7 @@ from typing import Dict
 
 from app.core.crop_engine import get_crop_stage
 from app.core.soil_rules import generate_soil_advisory
-from app.core.market_trends import load_market_prices, analyze_market_trend
+from app.core.market_trends import analyze_market_file
 
 
 def generate_full_advice(
@@ -23,12 +23,11 @@ def generate_full_advice(
     # 2️⃣ Soil Advisory
     soil_advice = generate_soil_advisory(soil_data, current_stage)
 
-    # 3️⃣ Market Advisory
-    prices = load_market_prices(market_file_path)
-    market_info = analyze_market_trend(prices)
+    # 3️⃣ Market Advisory (cached per market file version)
+    market_info = analyze_market_file(market_file_path)
 
     # 4️⃣ Current price from data
-    current_price = prices[-1] if prices else None
+    current_price = market_info["current_price"]
 
     # 5️⃣ Combine Output
     return {
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, List
 
 
 # -----------------------------
@@ -62,42 +62,84 @@ def translate_market(trend: str, language: str) -> str:
     return MARKET_TRANSLATIONS.get(language, {}).get(trend, trend)
 
 
+# -----------------------------
+# Narrative Segments (for audio stitching)
+# -----------------------------
+# Fixed phrases of the advisory narrative, split around the variable
+# parts so each phrase can be synthesized once and reused. Both the text
+# advisory and its stitched audio are built from these.
+SEGMENT_TEMPLATES = {
+    "en": {
+        "stage": "You are currently in the {stage} stage",
+        "days_before": "",
+        "days_after": "days since sowing",
+        "stop": ".",
+        "soil": "Soil recommendation:",
+        "market": "Market update:",
+    },
+    "hi": {
+        "stage": "आप वर्तमान में {stage} अवस्था में हैं",
+        "days_before": "बुवाई के",
+        "days_after": "दिन बाद",
+        "stop": "।",
+        "soil": "मिट्टी सलाह:",
+        "market": "बाज़ार स्थिति:",
+    },
+    "or": {
+        "stage": "ଆପଣ ବର୍ତ୍ତମାନ {stage} ଅବସ୍ଥାରେ ଅଛନ୍ତି",
+        "days_before": "ବୁଆଁର",
+        "days_after": "ଦିନ ପରେ",
+        "stop": "।",
+        "soil": "ମାଟି ପରାମର୍ଶ:",
+        "market": "ବଜାର ସୂଚନା:",
+    },
+}
+
+
 def format_advice_response(advice_data: Dict, language: str = "en") -> str:
 
-    crop_stage = advice_data["crop_stage"]
-    days = advice_data["days_since_sowing"]
-    soil_advice = " ".join(advice_data["soil_advice"])
-    market_trend = advice_data["market_trend"]
-
-    translated_stage = translate_stage(crop_stage, language)
-    translated_market = translate_market(market_trend, language)
-
-    # ---------------- ENGLISH ----------------
-    if language == "en":
-        return (
-            f"You are currently in the {translated_stage} stage "
-            f"({days} days since sowing). "
-            f"Soil recommendation: {soil_advice} "
-            f"Market update: {translated_market}"
-        )
-
-    # ---------------- HINDI ----------------
-    elif language == "hi":
-        return (
-            f"आप वर्तमान में {translated_stage} अवस्था में हैं "
-            f"(बुवाई के {days} दिन बाद)। "
-            f"मिट्टी सलाह: {soil_advice} "
-            f"बाज़ार स्थिति: {translated_market}"
-        )
-
-    # ---------------- ODIA ----------------
-    elif language == "or":
-        return (
-            f"ଆପଣ ବର୍ତ୍ତମାନ {translated_stage} ଅବସ୍ଥାରେ ଅଛନ୍ତି "
-            f"(ବୁଆଁର {days} ଦିନ ପରେ)। "
-            f"ମାଟି ପରାମର୍ଶ: {soil_advice} "
-            f"ବଜାର ସୂଚନା: {translated_market}"
-        )
-
-    else:
+    templates = SEGMENT_TEMPLATES.get(language)
+    if templates is None:
         return "Unsupported language."
+
+    translated_stage = translate_stage(advice_data["crop_stage"], language)
+    translated_market = translate_market(advice_data["market_trend"], language)
+    soil_advice = " ".join(advice_data["soil_advice"])
+
+    days = " ".join(
+        part for part in (
+            templates["days_before"],
+            str(advice_data["days_since_sowing"]),
+            templates["days_after"],
+        ) if part
+    )
+
+    return (
+        f"{templates['stage'].format(stage=translated_stage)} "
+        f"({days}){templates['stop']} "
+        f"{templates['soil']} {soil_advice} "
+        f"{templates['market']} {translated_market}"
+    )
+
+
+def format_advice_segments(advice_data: Dict, language: str = "en") -> List[str]:
+    """
+    The narrative of format_advice_response as an ordered list of spoken
+    segments. Every segment except the day count is drawn from a fixed
+    set of phrases per language, so its audio can be cached and reused.
+    """
+    templates = SEGMENT_TEMPLATES.get(language)
+    if templates is None:
+        return [format_advice_response(advice_data, language)]
+
+    segments = [
+        templates["stage"].format(stage=translate_stage(advice_data["crop_stage"], language)),
+        templates["days_before"],
+        str(advice_data["days_since_sowing"]),
+        templates["days_after"],
+        templates["soil"],
+        *advice_data["soil_advice"],
+        templates["market"],
+        translate_market(advice_data["market_trend"], language),
+    ]
+    return [segment for segment in segments if segment]
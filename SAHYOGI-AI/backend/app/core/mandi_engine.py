@@ -2,9 +2,12 @@
 Mandi price comparison engine with historical averages,
 per-mandi trends, and MSP comparison.
 """
+import numpy as np
 import pandas as pd
-from typing import Dict
-from app.services.cache import cached, DEFAULT_CSV_TTL
+from typing import Dict, Iterable, Optional
+from app.services.cache import cached
+from app.services.price_store import open_price_table
+from app.core.mandi_index import get_mandi_index
 
 
 # Real MSP values (₹/quintal) for 2025-26
@@ -17,13 +20,19 @@ MSP_VALUES = {
 }
 
 
-@cached(ttl=DEFAULT_CSV_TTL, key_prefix="mandi_csv")
+@cached(ttl=None, key_prefix="mandi_csv")
 def load_mandi_data(csv_path: str) -> pd.DataFrame:
-    """Load and cache mandi data."""
-    df = pd.read_csv(csv_path)
-    df["date"] = pd.to_datetime(df["date"])
-    df["price"] = pd.to_numeric(df["price"], errors="coerce")
-    return df
+    """
+    Load mandi data from the price store: memory-mapped prices and dates,
+    dictionary-encoded mandi/district columns. Cached until the file changes.
+    """
+    table = open_price_table(csv_path)
+    return pd.DataFrame({
+        "date": table.dates(),
+        "mandi": table.categorical("mandi"),
+        "district": table.categorical("district"),
+        "price": table.price,
+    }, copy=False)
 
 
 def get_latest_prices(df: pd.DataFrame) -> pd.DataFrame:
@@ -49,6 +58,58 @@ def per_mandi_trend(df: pd.DataFrame, mandi_name: str) -> str:
     return "stable"
 
 
+def compute_mandi_trends(df: pd.DataFrame) -> Dict[str, str]:
+    """
+    7-day trend for every mandi in one vectorized pass.
+
+    Same rule as per_mandi_trend: mean of each mandi's last 7 prices vs the
+    7 before them (or its overall mean when it has fewer than 14 rows).
+    A single stable sort by (mandi, date) and one groupby replace the
+    per-mandi filter-and-sort loop.
+    """
+    ordered = df.sort_values(["mandi", "date"], kind="stable")
+    groups = ordered.groupby("mandi", observed=True, sort=False)["price"]
+
+    # Position counted from each mandi's most recent row (0 = latest)
+    from_end = groups.cumcount(ascending=False).to_numpy()
+    mandi = ordered["mandi"]
+    price = ordered["price"]
+
+    counts = groups.size()
+    overall = groups.mean()
+    recent_7 = price[from_end < 7].groupby(mandi[from_end < 7], observed=True).mean()
+    in_prior = (from_end >= 7) & (from_end < 14)
+    prior_7 = price[in_prior].groupby(mandi[in_prior], observed=True).mean()
+
+    recent_7 = recent_7.reindex(counts.index)
+    prior_7 = prior_7.reindex(counts.index).where(counts >= 14, overall)
+    diff_pct = ((recent_7 - prior_7) / prior_7) * 100
+
+    trends = np.select(
+        [counts.to_numpy() < 7, (diff_pct > 1).to_numpy(), (diff_pct < -1).to_numpy()],
+        ["insufficient_data", "rising", "falling"],
+        default="stable",
+    )
+    return dict(zip(map(str, counts.index), trends.tolist()))
+
+
+@cached(ttl=None, key_prefix="mandi_trends")
+def mandi_trends_for_file(csv_path: str) -> Dict[str, str]:
+    """Trends for all mandis in a CSV. Cached until the file changes."""
+    return compute_mandi_trends(load_mandi_data(csv_path))
+
+
+def get_mandi_trends(csv_path: str, mandis: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    Trends for all mandis, or for the chosen subset in the order given.
+    Mandis absent from the data report "insufficient_data".
+    """
+    all_trends = mandi_trends_for_file(csv_path)
+    if mandis is None:
+        return dict(all_trends)
+    return {m: all_trends.get(m, "insufficient_data") for m in mandis}
+
+
 def fair_price_indicator(current_price: float, historical_avg: float, msp: float) -> Dict:
     """Compare current price against historical average and MSP."""
     percent_vs_avg = ((current_price - historical_avg) / historical_avg) * 100
@@ -61,32 +122,51 @@ def fair_price_indicator(current_price: float, historical_avg: float, msp: float
     }
 
 
+def no_mandi_data(msp: float) -> Dict:
+    """Mandi comparison with the same keys when there are no prices to compare."""
+    return {
+        "local_price": None,
+        "district_average": None,
+        "historical_average": None,
+        "best_mandi_price": None,
+        "best_mandi_name": None,
+        "worst_mandi_price": None,
+        "worst_mandi_name": None,
+        "msp": msp,
+        "is_above_msp": None,
+        "mandi_trends": {},
+        "fair_price": None,
+    }
+
+
+@cached(ttl=None, key_prefix="mandi")
 def mandi_price_comparison(csv_path: str, farmer_district: str, crop: str = "wheat") -> Dict:
     """
     Comprehensive mandi comparison with trends and MSP reference.
+    Answered from the precomputed MandiIndex, so lookups do not scan the
+    dataset. Cached until the CSV file changes.
     """
-    df = load_mandi_data(csv_path)
-    latest = get_latest_prices(df)
+    index = get_mandi_index(csv_path)
+
+    # MSP comparison
+    msp = MSP_VALUES.get(crop.lower(), 2275)
 
-    local_mandi = latest[latest["district"] == farmer_district]
+    best, worst = index.best(), index.worst()
+    if best is None or worst is None:
+        # No valid price on the latest date
+        return no_mandi_data(msp)
 
-    district_avg = latest["price"].mean()
-    best_price = latest["price"].max()
-    worst_price = latest["price"].min()
-    best_mandi = latest.loc[latest["price"].idxmax()]["mandi"]
-    worst_mandi = latest.loc[latest["price"].idxmin()]["mandi"]
+    district_avg = index.mean_price()
+    best_price, best_mandi = best
+    worst_price, worst_mandi = worst
 
     # 30-day historical average
-    hist_avg = float(df["price"].mean()) if len(df) > 0 else district_avg
+    hist_avg = index.historical_average if len(index) > 0 else district_avg
 
-    # MSP comparison
-    msp = MSP_VALUES.get(crop.lower(), 2275)
-    local_price = float(local_mandi["price"].iloc[0]) if not local_mandi.empty else None
+    local_price = index.local_price(farmer_district)
 
-    # Per-mandi trends
-    mandi_trends = {}
-    for mandi_name in latest["mandi"].unique():
-        mandi_trends[mandi_name] = per_mandi_trend(df, mandi_name)
+    # Per-mandi trends (vectorized, cached per file version)
+    mandi_trends = get_mandi_trends(csv_path, index.mandis_on())
 
     # Fair price indicator for local mandi
     fair_price = None
@@ -0,0 +1,125 @@
+"""
+Precomputed lookup index over a multi-mandi price file.
+
+Built once per file version from the columnar price store, it turns the
+mandi comparison's full-column scans into array lookups:
+- date → row range (rows are stored in date order)
+- district → mandis
+- per-date prices sorted ascending, plus best/worst rows and averages
+"""
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from app.services.cache import cached
+from app.services.price_store import PriceTable, open_price_table
+
+
+class MandiIndex:
+    """Date, district and price-rank lookups over one mandi price table."""
+
+    def __init__(self, table: PriceTable):
+        self.table = table
+        self.mandi_names: List[str] = table.dictionaries["mandi"]
+        self.district_names: List[str] = table.dictionaries["district"]
+        day = table.day
+        price = table.price
+        mandi = table.codes["mandi"]
+        district = table.codes["district"]
+
+        # Date → row range
+        self.days, self.starts = np.unique(day, return_index=True)
+        self.ends = np.append(self.starts[1:], len(day))
+
+        # Rows sorted by (date, price); NaN prices sort last within a date
+        self.price_order = np.lexsort((price, day))
+        valid = ~np.isnan(price)
+        block_valid = np.add.reduceat(valid.astype(np.int64), self.starts) if len(day) else np.array([], dtype=np.int64)
+        block_sum = np.add.reduceat(np.where(valid, price, 0.0), self.starts) if len(day) else np.array([])
+        self.valid_counts = block_valid
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.mean_prices = block_sum / block_valid
+
+        # Cheapest row: first in ascending order. Dearest row: first row
+        # holding the date's max price (matches pandas idxmax on ties).
+        self.worst_rows = self.price_order[self.starts] if len(day) else np.array([], dtype=np.int64)
+        desc_order = np.lexsort((-price, day))
+        self.best_rows = desc_order[self.starts] if len(day) else np.array([], dtype=np.int64)
+
+        self.historical_average = float(np.nanmean(price)) if valid.any() else float("nan")
+
+        # District → mandis, in order of first appearance
+        self.district_mandis: Dict[str, List[str]] = {}
+        for d_code, m_code in dict.fromkeys(zip(district.tolist(), mandi.tolist())):
+            self.district_mandis.setdefault(self.district_names[d_code], []).append(self.mandi_names[m_code])
+
+        # First row of each district on the latest date (local mandi price)
+        self.latest_local_rows: Dict[str, int] = {}
+        if len(day):
+            for row in range(int(self.starts[-1]), int(self.ends[-1])):
+                self.latest_local_rows.setdefault(self.district_names[district[row]], row)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @property
+    def latest_day(self) -> Optional[int]:
+        return int(self.days[-1]) if len(self.days) else None
+
+    def _block(self, day: Optional[int]) -> Optional[int]:
+        """Position of `day` (default: latest) in self.days, or None."""
+        if day is None:
+            return len(self.days) - 1 if len(self.days) else None
+        pos = int(np.searchsorted(self.days, day))
+        if pos < len(self.days) and self.days[pos] == day:
+            return pos
+        return None
+
+    def rows_for_day(self, day: Optional[int] = None) -> slice:
+        """Row range of one date (default: latest)."""
+        pos = self._block(day)
+        if pos is None:
+            return slice(0, 0)
+        return slice(int(self.starts[pos]), int(self.ends[pos]))
+
+    def sorted_prices(self, day: Optional[int] = None) -> np.ndarray:
+        """Prices on one date in ascending order (NaNs last)."""
+        rows = self.rows_for_day(day)
+        return self.table.price[self.price_order[rows]]
+
+    def mandis_on(self, day: Optional[int] = None) -> List[str]:
+        """Mandis reporting on one date, in file order."""
+        codes = self.table.codes["mandi"][self.rows_for_day(day)]
+        return [self.mandi_names[c] for c in dict.fromkeys(codes.tolist())]
+
+    def mean_price(self, day: Optional[int] = None) -> float:
+        pos = self._block(day)
+        return float(self.mean_prices[pos]) if pos is not None else float("nan")
+
+    def _row_info(self, row: int) -> Tuple[float, str]:
+        return float(self.table.price[row]), self.mandi_names[self.table.codes["mandi"][row]]
+
+    def best(self, day: Optional[int] = None) -> Optional[Tuple[float, str]]:
+        """(price, mandi) of the highest price on a date."""
+        pos = self._block(day)
+        if pos is None or self.valid_counts[pos] == 0:
+            return None
+        return self._row_info(int(self.best_rows[pos]))
+
+    def worst(self, day: Optional[int] = None) -> Optional[Tuple[float, str]]:
+        """(price, mandi) of the lowest price on a date."""
+        pos = self._block(day)
+        if pos is None or self.valid_counts[pos] == 0:
+            return None
+        return self._row_info(int(self.worst_rows[pos]))
+
+    def local_price(self, district: str) -> Optional[float]:
+        """Latest-date price of the first mandi reporting for a district."""
+        row = self.latest_local_rows.get(district)
+        return float(self.table.price[row]) if row is not None else None
+
+
+@cached(ttl=None, key_prefix="mandi_index")
+def get_mandi_index(csv_path: str) -> MandiIndex:
+    """Index for a mandi CSV. Rebuilt only when the file changes."""
+    return MandiIndex(open_price_table(csv_path))
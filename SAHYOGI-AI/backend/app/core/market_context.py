@@ -0,0 +1,108 @@
+"""
+Shared market context: one object per (crop file, version) that lazily
+computes and memoizes the indicators the trend, projection, risk and
+simulation engines all need — EMAs, moving averages, rolling std,
+regression fits and log-return statistics.
+"""
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from typing import Hashable, Optional, Tuple
+
+from app.services.cache import cached, file_fingerprint, register_key_handler
+from app.services.price_store import open_price_table
+
+
+class MarketContext:
+    """
+    Memoized indicators over a date-ordered float64 price array.
+
+    Every accessor caches its result on first use, so engines sharing a
+    context never recompute the same EWM, fit or statistic.
+    """
+
+    def __init__(self, prices, key: Optional[Hashable] = None):
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self._key = key
+        self._memo: dict = {}
+        self._lock = threading.Lock()
+
+    @property
+    def key(self) -> Hashable:
+        """Cache key identity: the file version, or a content hash of the prices."""
+        if self._key is None:
+            digest = hashlib.blake2b(np.ascontiguousarray(self.prices), digest_size=16).hexdigest()
+            self._key = ("prices", len(self.prices), digest)
+        return self._key
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def _memoized(self, name: str, args: tuple, compute):
+        memo_key = (name,) + args
+        value = self._memo.get(memo_key)
+        if value is None:
+            value = compute()
+            with self._lock:
+                value = self._memo.setdefault(memo_key, value)
+        return value
+
+    @property
+    def current_price(self) -> float:
+        return float(self.prices[-1])
+
+    @property
+    def previous_price(self) -> float:
+        return float(self.prices[-2]) if len(self.prices) > 1 else self.current_price
+
+    def recent(self, window: int) -> np.ndarray:
+        """Last `window` prices (fewer if history is shorter)."""
+        return self.prices[-min(window, len(self.prices)):]
+
+    def ema(self, span: int, window: Optional[int] = None) -> np.ndarray:
+        """EWM (adjust=False) series, over the full history or its last `window` prices."""
+        def compute():
+            source = self.prices if window is None else self.recent(window)
+            return pd.Series(source).ewm(span=span, adjust=False).mean().to_numpy()
+        return self._memoized("ema", (span, window), compute)
+
+    def moving_average(self, window: int) -> float:
+        """Simple moving average of the last `window` prices."""
+        return self._memoized("ma", (window,), lambda: float(self.prices[-window:].mean()))
+
+    def std(self, window: Optional[int] = None) -> float:
+        """Sample std (ddof=1) of the last `window` prices, or of all prices."""
+        def compute():
+            source = self.prices if window is None else self.prices[-window:]
+            return float(np.std(source, ddof=1)) if len(source) > 1 else float("nan")
+        return self._memoized("std", (window,), compute)
+
+    def polyfit(self, window: int, degree: int) -> np.ndarray:
+        """Polynomial fit coefficients over the last `window` prices (x = 0..n-1)."""
+        def compute():
+            recent = self.recent(window)
+            return np.polyfit(np.arange(len(recent)), recent, degree)
+        return self._memoized("polyfit", (window, degree), compute)
+
+    def volatility(self, window: int = 14) -> float:
+        """Rolling-window std, falling back to full-history std for short series."""
+        return self.std(window) if len(self.prices) >= window else self.std()
+
+    def log_return_stats(self, window: int = 60) -> Tuple[float, float]:
+        """(mean, std) of daily log returns over the last `window` prices."""
+        def compute():
+            log_returns = np.diff(np.log(self.recent(window)))
+            return float(np.mean(log_returns)), float(np.std(log_returns))
+        return self._memoized("log_returns", (window,), compute)
+
+
+# Cached functions may take a context argument; it is keyed by its identity
+register_key_handler(MarketContext, lambda ctx: ctx.key)
+
+
+@cached(ttl=None, key_prefix="market_context")
+def get_market_context(csv_path: str) -> MarketContext:
+    """Shared context for a market CSV. Rebuilt only when the file changes."""
+    prices = open_price_table(csv_path).price
+    return MarketContext(prices, key=("file",) + file_fingerprint(csv_path))
@@ -5,26 +5,33 @@ and confidence intervals for accurate, fast forecasting.
 import pandas as pd
 import numpy as np
 from typing import Dict
-from app.services.cache import cached, DEFAULT_CSV_TTL
+from app.services.cache import cached, DEFAULT_RESULT_TTL
+from app.services.price_store import open_price_table
+from app.core.market_context import MarketContext, get_market_context
 
 
-@cached(ttl=DEFAULT_CSV_TTL, key_prefix="csv")
+@cached(ttl=None, key_prefix="csv")
 def load_market_data(csv_path: str) -> pd.DataFrame:
-    """Load and cache market data from CSV."""
-    df = pd.read_csv(csv_path)
-    df = df.sort_values("date").reset_index(drop=True)
-    df["price"] = df["price"].astype(float)
-    return df
+    """
+    Load market data as a date-sorted frame over memory-mapped price store
+    columns. Cached until the CSV file changes.
+    """
+    table = open_price_table(csv_path)
+    return pd.DataFrame({"date": table.dates(), "price": table.price}, copy=False)
+
+
+def _context(df: pd.DataFrame) -> MarketContext:
+    return MarketContext(df["price"].to_numpy())
 
 
 def calculate_moving_average(df: pd.DataFrame, window: int = 7) -> float:
     """Simple moving average of last N days."""
-    return float(df["price"].iloc[-window:].mean())
+    return _context(df).moving_average(window)
 
 
 def calculate_ema(df: pd.DataFrame, span: int = 14) -> float:
     """Exponentially Weighted Moving Average — recent-biased."""
-    return float(df["price"].ewm(span=span, adjust=False).mean().iloc[-1])
+    return float(_context(df).ema(span)[-1])
 
 
 def calculate_trend_strength(df: pd.DataFrame, window: int = 30) -> float:
@@ -32,39 +39,36 @@ def calculate_trend_strength(df: pd.DataFrame, window: int = 30) -> float:
     Linear regression slope on recent window only.
     Faster and more responsive than all-time regression.
     """
-    recent = df["price"].values[-min(window, len(df)):]
-    x = np.arange(len(recent))
-    slope, _ = np.polyfit(x, recent, 1)
+    slope, _ = _context(df).polyfit(window, 1)
     return float(slope)
 
 
-def project_future_prices(df: pd.DataFrame, days_ahead: int = 7) -> Dict:
+def project_from_context(ctx: MarketContext, days_ahead: int = 7) -> Dict:
     """
     Project future price using EWM-adjusted recent regression.
-    Returns mean projection + confidence interval.
+    Returns mean projection + confidence interval. The regression fit,
+    EWM and rolling std come from the shared MarketContext, so several
+    horizons reuse them.
     """
-    prices = df["price"].values
-    n = min(30, len(prices))
-    recent = prices[-n:]
-    x = np.arange(n)
+    n = min(30, len(ctx))
 
     # Degree-2 polynomial fits seasonal curvature better
-    coeffs = np.polyfit(x, recent, min(2, n - 1))
-    poly = np.poly1d(coeffs)
+    poly = np.poly1d(ctx.polyfit(30, min(2, n - 1)))
 
     future_x = n + days_ahead
     projected = float(poly(future_x))
 
     # EWM-adjusted: blend regression with EWM trend
-    ewm_price = float(pd.Series(recent).ewm(span=14, adjust=False).mean().iloc[-1])
-    ewm_trend = ewm_price - float(pd.Series(recent).ewm(span=14, adjust=False).mean().iloc[-2])
+    recent_ewm = ctx.ema(14, window=30)
+    ewm_price = float(recent_ewm[-1])
+    ewm_trend = ewm_price - float(recent_ewm[-2])
     ewm_projected = ewm_price + ewm_trend * days_ahead
 
     # Weighted blend: 60% regression, 40% EWM
     blended = 0.6 * projected + 0.4 * ewm_projected
 
     # Confidence interval from rolling std
-    rolling_std = float(pd.Series(recent).rolling(window=min(7, n)).std().iloc[-1])
+    rolling_std = ctx.std(min(7, n))
     confidence_low = blended - 1.96 * rolling_std * np.sqrt(days_ahead / 7)
     confidence_high = blended + 1.96 * rolling_std * np.sqrt(days_ahead / 7)
 
@@ -75,29 +79,38 @@ def project_future_prices(df: pd.DataFrame, days_ahead: int = 7) -> Dict:
     }
 
 
-@cached(ttl=120, key_prefix="projection")
+@cached(ttl=DEFAULT_RESULT_TTL, key_prefix="projection", hash_arrays=True)
+def project_future_prices(df: pd.DataFrame, days_ahead: int = 7) -> Dict:
+    """
+    Project future price using EWM-adjusted recent regression.
+    Returns mean projection + confidence interval.
+    """
+    return project_from_context(_context(df), days_ahead)
+
+
+@cached(ttl=None, key_prefix="projection")
 def generate_market_projection(csv_path: str) -> Dict:
     """
     Full market projection with EWM, moving averages, and confidence intervals.
-    Cached for 2 minutes.
+    Cached until the CSV file changes.
     """
-    df = load_market_data(csv_path)
+    ctx = get_market_context(csv_path)
 
-    current_price = float(df["price"].iloc[-1])
-    prev_price = float(df["price"].iloc[-2]) if len(df) > 1 else current_price
+    current_price = ctx.current_price
+    prev_price = ctx.previous_price
 
     # Moving averages
-    ma_7 = calculate_moving_average(df, 7)
-    ma_14 = calculate_moving_average(df, 14)
-    ma_30 = calculate_moving_average(df, 30)
-    ema_14 = calculate_ema(df, 14)
+    ma_7 = ctx.moving_average(7)
+    ma_14 = ctx.moving_average(14)
+    ma_30 = ctx.moving_average(30)
+    ema_14 = float(ctx.ema(14)[-1])
 
     # Trend
-    slope = calculate_trend_strength(df, 30)
+    slope = float(ctx.polyfit(30, 1)[0])
 
-    # Projections with confidence
-    proj_7 = project_future_prices(df, 7)
-    proj_14 = project_future_prices(df, 14)
+    # Projections with confidence (share one fit and EWM)
+    proj_7 = project_from_context(ctx, 7)
+    proj_14 = project_from_context(ctx, 14)
 
     # Percent changes
     percent_change_7 = ((proj_7["price"] - current_price) / current_price) * 100
@@ -107,7 +120,7 @@ def generate_market_projection(csv_path: str) -> Dict:
     trend_direction = "rising" if slope > 0.5 else ("falling" if slope < -0.5 else "stable")
 
     # Volatility: rolling 14-day std is more responsive
-    volatility = float(df["price"].iloc[-14:].std()) if len(df) >= 14 else float(df["price"].std())
+    volatility = ctx.volatility(14)
 
     return {
         "current_price": current_price,
@@ -2,36 +2,49 @@
 Market trend analysis using EMA crossover signals (MACD-style)
 and momentum indicators for accurate trend detection.
 """
+import numpy as np
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, Optional, Sequence, Union
+from app.services.cache import cached
+from app.core.market_projection import load_market_data
+from app.core.market_context import MarketContext, get_market_context
 
+PriceArray = Union[np.ndarray, Sequence[float]]
 
-def load_market_prices(file_path: str) -> list:
+
+def load_market_prices(file_path: str) -> np.ndarray:
     """
-    Load historical market prices from CSV file.
-    Expected format:
+    Date-ordered float64 prices for a market CSV, as a read-only view of
+    the cached frame from market_projection.load_market_data.
+    Expected CSV format:
     date,price
     2026-01-01,2100
     """
-    df = pd.read_csv(file_path)
-    return df["price"].astype(float).tolist()
+    return load_market_data(file_path)["price"].to_numpy()
 
 
-def compute_ema_series(prices: list, span: int) -> pd.Series:
+def compute_ema_series(prices: PriceArray, span: int) -> pd.Series:
     """Compute EMA series efficiently using pandas."""
-    return pd.Series(prices).ewm(span=span, adjust=False).mean()
+    return pd.Series(np.asarray(prices, dtype=np.float64)).ewm(span=span, adjust=False).mean()
 
 
-def analyze_market_trend(prices: list) -> Dict:
+def analyze_market_trend(prices: PriceArray, context: Optional[MarketContext] = None) -> Dict:
     """
     EMA crossover analysis with momentum for accurate trend detection.
 
+    Accepts a float64 numpy array (lists are converted once). When a shared
+    MarketContext is given, its memoized EMAs are reused.
+
     Uses:
     - Fast EMA (span=12) vs Slow EMA (span=26), similar to MACD
     - Rate of Change (ROC) momentum indicator
     - Trend strength as percentage
     """
-    if len(prices) < 14:
+    ctx = context if context is not None else MarketContext(prices)
+    prices = ctx.prices
+    n = len(prices)
+
+    if n < 14:
         return {
             "trend": "insufficient_data",
             "advice": "Not enough market data to determine trend.",
@@ -39,27 +52,24 @@ def analyze_market_trend(prices: list) -> Dict:
             "momentum": 0,
         }
 
-    series = pd.Series(prices)
-
     # EMA crossover (MACD-style)
-    fast_ema = series.ewm(span=min(12, len(prices) - 1), adjust=False).mean()
-    slow_ema = series.ewm(span=min(26, len(prices) - 1), adjust=False).mean()
+    fast_ema = ctx.ema(min(12, n - 1))
+    slow_ema = ctx.ema(min(26, n - 1))
 
     # Signal: difference between fast and slow EMA
-    signal = float(fast_ema.iloc[-1] - slow_ema.iloc[-1])
-    prev_signal = float(fast_ema.iloc[-2] - slow_ema.iloc[-2])
+    signal = float(fast_ema[-1] - slow_ema[-1])
 
     # Trend strength as % of current price
-    current_price = prices[-1]
+    current_price = float(prices[-1])
     trend_strength = (signal / current_price) * 100 if current_price > 0 else 0
 
     # Momentum: Rate of Change over 7-day and 14-day
-    roc_7 = ((prices[-1] - prices[-min(7, len(prices))]) / prices[-min(7, len(prices))]) * 100
-    roc_14 = ((prices[-1] - prices[-min(14, len(prices))]) / prices[-min(14, len(prices))]) * 100
+    roc_7 = ((prices[-1] - prices[-min(7, n)]) / prices[-min(7, n)]) * 100
+    roc_14 = ((prices[-1] - prices[-min(14, n)]) / prices[-min(14, n)]) * 100
 
     # Short-term and long-term averages for additional context
-    short_avg = series.iloc[-7:].mean()
-    long_avg = series.iloc[-min(30, len(prices)):].mean()
+    short_avg = ctx.moving_average(7)
+    long_avg = ctx.moving_average(min(30, n))
 
     # Determine trend with strength classification
     if signal > 0 and trend_strength > 0.3:
@@ -84,9 +94,21 @@ def analyze_market_trend(prices: list) -> Dict:
         "trend": trend,
         "advice": advice,
         "trend_strength": round(trend_strength, 3),
-        "momentum_7d": round(roc_7, 2),
-        "momentum_14d": round(roc_14, 2),
+        "momentum_7d": round(float(roc_7), 2),
+        "momentum_14d": round(float(roc_14), 2),
         "short_term_avg": round(float(short_avg), 2),
         "long_term_avg": round(float(long_avg), 2),
         "ema_signal": round(signal, 2),
     }
+
+
+@cached(ttl=None, key_prefix="trend")
+def analyze_market_file(file_path: str) -> Dict:
+    """
+    Trend analysis for a market CSV plus its latest price.
+    Cached until the file changes.
+    """
+    ctx = get_market_context(file_path)
+    result = analyze_market_trend(ctx.prices, ctx)
+    result["current_price"] = ctx.current_price if len(ctx) else None
+    return result
@@ -4,7 +4,8 @@ Uses geometric Brownian motion for realistic price path simulation.
 """
 import numpy as np
 from typing import Dict
-from app.core.market_projection import load_market_data
+from app.core.market_context import MarketContext, get_market_context
+from app.services.cache import cached, DEFAULT_RESULT_TTL
 
 
 NUM_SIMULATIONS = 500  # Fast enough (~5ms) yet statistically robust
@@ -19,15 +20,25 @@ def monte_carlo_projection(
     Simulate future price paths using geometric Brownian motion.
 
     Returns mean, P10, P50, P90 projected prices.
-    Vectorized with NumPy for speed.
     """
-    # Calculate daily log returns from recent data
-    recent = prices[-min(60, len(prices)):]
-    log_returns = np.diff(np.log(recent))
+    return monte_carlo_from_context(MarketContext(prices), days_ahead, num_sims)
 
-    mu = np.mean(log_returns)       # drift
-    sigma = np.std(log_returns)     # volatility
-    last_price = float(prices[-1])
+
+@cached(ttl=DEFAULT_RESULT_TTL, key_prefix="montecarlo")
+def monte_carlo_from_context(
+    ctx: MarketContext,
+    days_ahead: int,
+    num_sims: int = NUM_SIMULATIONS
+) -> Dict:
+    """
+    Geometric Brownian motion simulation over a shared MarketContext.
+
+    Vectorized with NumPy for speed. Memoized on the price series identity,
+    so repeated requests within the TTL see the same simulated outcome.
+    """
+    # Drift and volatility of daily log returns from recent data
+    mu, sigma = ctx.log_return_stats(60)
+    last_price = ctx.current_price
 
     # Vectorized simulation: (num_sims x days_ahead) random matrix
     random_shocks = np.random.normal(
@@ -63,13 +74,12 @@ def simulate_sell_decision(
     Uses geometric Brownian motion instead of simple linear extrapolation.
     Provides risk-aware projections with confidence bounds.
     """
-    df = load_market_data(csv_path)
-    prices = df["price"].values
+    ctx = get_market_context(csv_path)
 
-    current_price = float(prices[-1])
+    current_price = ctx.current_price
 
     # Monte Carlo projection
-    mc = monte_carlo_projection(prices, sell_after_days)
+    mc = monte_carlo_from_context(ctx, sell_after_days)
 
     projected_price = mc["mean"]
     percent_change = ((projected_price - current_price) / current_price) * 100
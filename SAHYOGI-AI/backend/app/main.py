@@ -1,3 +1,7 @@
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -11,11 +15,45 @@ from app.api.v1 import disease
 from app.api.v1 import calendar
 from app.api.v1 import market_prices
 from fastapi.staticfiles import StaticFiles
+from app.services.file_watcher import FileWatcher
+from app.services.executor import shutdown_executors
+from app.ai.tts import shutdown_tts
+from app.services.audio_jobs import shutdown_audio_jobs
+from app.services.call_logger import start_call_logging, stop_call_logging
+from app.services.call_aggregates import start_aggregation, stop_aggregation
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+MARKET_DIR = BASE_DIR / "data" / "market_prices"
+
+# Seconds between market data polls; 0 disables the watcher
+MARKET_WATCH_INTERVAL = float(os.getenv("MARKET_WATCH_INTERVAL", "2"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Drop cached market frames and projections as soon as a CSV changes
+    watcher = None
+    if MARKET_WATCH_INTERVAL > 0:
+        watcher = FileWatcher(str(MARKET_DIR), interval=MARKET_WATCH_INTERVAL).start()
+    # Batched call logging; replays any spilled records first
+    start_call_logging()
+    # Rolling analytics counters: load snapshot, catch up, compact periodically
+    start_aggregation()
+    yield
+    if watcher:
+        watcher.stop()
+    stop_call_logging()
+    stop_aggregation()
+    shutdown_executors()
+    shutdown_audio_jobs()
+    shutdown_tts()
+
 
 app = FastAPI(
     title="Sahyogi API",
     description="Voice-first multilingual farming advisory system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # ✅ ADD CORS HERE (after app creation, before routers)
@@ -27,12 +65,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.mount(
-    "/api/v1/audio",
-    StaticFiles(directory="audio"),
-    name="audio"
-)
-
 # Include routers
 app.include_router(advice.router, prefix="/api/v1/advice", tags=["Advice"])
 app.include_router(farmer.router, prefix="/api/v1/farmer", tags=["Farmer"])
@@ -45,4 +77,11 @@ app.include_router(simulation.router, prefix="/api/v1/simulate-sell", tags=["Sim
 app.include_router(disease.router, prefix="/api/v1/disease", tags=["Disease Detection"])
 app.include_router(calendar.router, prefix="/api/v1/calendar", tags=["Crop Calendar"])
 app.include_router(market_prices.router, prefix="/api/v1/market-prices", tags=["Market Prices"])
-app.include_router(pacs.router, prefix="/api/v1/pacs", tags=["PACS"])
\ No newline at end of file
+app.include_router(pacs.router, prefix="/api/v1/pacs", tags=["PACS"])
+
+# Mounted after the routers so /api/v1/audio/jobs/* reaches the audio router
+app.mount(
+    "/api/v1/audio",
+    StaticFiles(directory="audio"),
+    name="audio"
+)
\ No newline at end of file
@@ -1,64 +1,161 @@
-from app.services.supabase_service import supabase
+"""
+Analytics over the calls table.
+
+The all-time dashboard summary comes from the rolling call aggregates.
+Range queries stream only the columns they need, with the time window
+filtered by Supabase and rows fetched in keyset-paginated pages, so
+memory stays flat however large the table grows.
+"""
 from collections import Counter
-from datetime import datetime, timedelta
-from dateutil import parser
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.services.call_aggregates import (
+    AGGREGATE_COLUMNS,
+    CallAggregates,
+    CallCursor,
+    aggregates_ready,
+    ensure_aggregates,
+    parse_timestamp,
+)
+
+PAGE_SIZE = 1000
+BUCKETS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+MAX_BUCKETS = 24 * 93  # ~3 months of hourly points
+
+
+def _utc(value: datetime) -> datetime:
+    """Naive datetimes are taken as UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def iso_utc(value: Optional[datetime]) -> Optional[str]:
+    """ISO-8601 UTC timestamp, as used in created_at filters."""
+    return _utc(value).isoformat() if value is not None else None
+
+
+def iter_calls(
+    columns: Sequence[str],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    page_size: int = PAGE_SIZE,
+    client=None,
+) -> Iterator[dict]:
+    """
+    Stream call rows in (created_at, id) order.
+
+    Only `columns` are selected, and the [start, end) window is filtered
+    server-side. Pages continue from the last (created_at, id) seen rather
+    than an offset, so each page is an index range scan and rows sharing a
+    timestamp are never skipped.
+    """
+    if client is None:
+        from app.services.supabase_service import supabase
+        client = supabase
+
+    select = ",".join(dict.fromkeys(list(columns) + ["id", "created_at"]))
+    cursor: Optional[Tuple[str, str]] = None
 
+    while True:
+        query = client.table("calls").select(select)
+        if start is not None:
+            query = query.gte("created_at", iso_utc(start))
+        if end is not None:
+            query = query.lt("created_at", iso_utc(end))
+        if cursor is not None:
+            last_at, last_id = cursor
+            # Quoted: timestamps contain ':' and '+'
+            query = query.or_(f'created_at.gt."{last_at}",and(created_at.eq."{last_at}",id.gt."{last_id}")')
 
-def get_analytics_summary():
+        rows = (
+            query.order("created_at")
+            .order("id")
+            .limit(page_size)
+            .execute()
+            .data
+        ) or []
 
-    response = supabase.table("calls").select("*").execute()
-    calls = response.data if response.data else []
+        yield from rows
+        if len(rows) < page_size:
+            return
+        cursor = (rows[-1]["created_at"], rows[-1]["id"])
 
-    total_calls = len(calls)
 
-    languages = Counter()
-    crops = Counter()
-    stages = Counter()
-    trends = Counter()
-    hourly_distribution = Counter()
+def iter_new_calls(
+    columns: Sequence[str],
+    cursor: CallCursor,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    page_size: int = PAGE_SIZE,
+    client=None,
+) -> Iterator[dict]:
+    """
+    Call rows in [start, end) that `cursor` hasn't read, in (created_at, id)
+    order. Re-reads the cursor's late window and skips the ids it has seen;
+    the caller advances the cursor past each row it keeps.
+    """
+    since = cursor.since()
+    if since is not None and (start is None or since > _utc(start)):
+        start = since
+    for row in iter_calls(columns, start=start, end=end, page_size=page_size, client=client):
+        if cursor.is_new(row):
+            yield row
 
-    now = datetime.utcnow()
-    today = now.date()
-    week_ago = now - timedelta(days=7)
-    month_ago = now - timedelta(days=30)
 
-    calls_today = 0
-    calls_this_week = 0
-    calls_this_month = 0
+def get_analytics_summary(start: Optional[datetime] = None, end: Optional[datetime] = None, client=None):
+    """
+    Dashboard summary. All-time figures come from the rolling aggregates;
+    a [start, end) range streams just that window's projected rows.
+    """
+    if start is None and end is None:
+        # ready is False (and the counts incomplete) until the aggregates have
+        # caught up with the calls table
+        return {**ensure_aggregates().summary(), "ready": aggregates_ready()}
 
-    for call in calls:
-        languages[call.get("language")] += 1
-        crops[call.get("crop")] += 1
-        stages[call.get("crop_stage")] += 1
-        trends[call.get("market_trend")] += 1
+    window = CallAggregates()
+    window.record_many(iter_calls(AGGREGATE_COLUMNS.split(","), start=start, end=end, client=client))
+    # "Today" is the last day inside the window
+    return {**window.summary(now=_utc(end) - timedelta(microseconds=1) if end else None), "ready": True}
 
-        created_at = call.get("created_at")
-        if created_at:
-            dt = parser.parse(created_at)
 
-            hourly_distribution[dt.hour] += 1
+def _floor(dt: datetime, bucket: str) -> datetime:
+    if bucket == "day":
+        return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    return dt.replace(minute=0, second=0, microsecond=0)
 
-            if dt.date() == today:
-                calls_today += 1
 
-            if dt >= week_ago:
-                calls_this_week += 1
+def get_call_timeseries(
+    start: datetime,
+    end: datetime,
+    bucket: str = "day",
+    client=None,
+) -> List[Dict]:
+    """
+    Call counts per hour or day over [start, end), zero-filled.
+    Only created_at is fetched for the window.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of {sorted(BUCKETS)}")
+    start, end = _utc(start), _utc(end)
+    if end <= start:
+        raise ValueError("end must be after start")
 
-            if dt >= month_ago:
-                calls_this_month += 1
+    step = BUCKETS[bucket]
+    first = _floor(start, bucket)
+    if (end - first) / step > MAX_BUCKETS:
+        raise ValueError(f"range too large for {bucket} buckets (max {MAX_BUCKETS})")
 
-    peak_hour = None
-    if hourly_distribution:
-        peak_hour = hourly_distribution.most_common(1)[0][0]
+    counts: Counter = Counter()
+    for row in iter_calls(["created_at"], start=start, end=end, client=client):
+        dt = parse_timestamp(row.get("created_at"))
+        if dt is not None:
+            counts[_floor(dt, bucket)] += 1
 
-    return {
-        "total_calls": total_calls,
-        "calls_today": calls_today,
-        "calls_this_week": calls_this_week,
-        "calls_this_month": calls_this_month,
-        "peak_call_hour": peak_hour,
-        "calls_by_language": dict(languages),
-        "calls_by_crop": dict(crops),
-        "crop_stage_distribution": dict(stages),
-        "market_trend_distribution": dict(trends),
-    }
+    series = []
+    point = first
+    while point < end:
+        series.append({"bucket_start": point.isoformat(), "calls": counts.get(point, 0)})
+        point += step
+    return series
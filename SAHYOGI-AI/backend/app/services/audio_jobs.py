@@ -0,0 +1,123 @@
+"""
+Background audio rendering.
+
+Routers return their text response immediately and hand synthesis to a
+small worker pool; clients follow the job at /api/v1/audio/jobs/{id},
+which long-polls until the file is ready. Chat renders (one job per
+sentence when streaming) get their own pool so a long answer never
+queues IVR call audio behind it.
+"""
+import os
+import time
+import uuid
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+AUDIO_WORKERS = int(os.getenv("AUDIO_WORKERS", "2"))
+CHAT_AUDIO_WORKERS = int(os.getenv("CHAT_AUDIO_WORKERS", "2"))
+AUDIO_JOB_TTL = float(os.getenv("AUDIO_JOB_TTL", "900"))  # seconds a finished job stays queryable
+MAX_WAIT = 30.0  # longest long-poll, seconds
+
+_executors = {
+    "calls": ThreadPoolExecutor(max_workers=AUDIO_WORKERS, thread_name_prefix="audio"),
+    "chat": ThreadPoolExecutor(max_workers=CHAT_AUDIO_WORKERS, thread_name_prefix="chat-audio"),
+}
+_jobs: Dict[str, dict] = {}
+_futures: Dict[str, Future] = {}
+_lock = threading.Lock()
+
+
+def audio_url_for(path: Optional[str]) -> Optional[str]:
+    """Public URL of a file in the audio directory."""
+    return f"/api/v1/audio/{Path(path).name}" if path else None
+
+
+def job_status_url(job_id: str) -> str:
+    return f"/api/v1/audio/jobs/{job_id}"
+
+
+def _prune(now: float) -> None:
+    expired = [
+        job_id for job_id, job in _jobs.items()
+        if job["finished_at"] is not None and now - job["finished_at"] > AUDIO_JOB_TTL
+    ]
+    for job_id in expired:
+        _jobs.pop(job_id, None)
+        _futures.pop(job_id, None)
+
+
+def _run(job: dict, render: Callable[..., Optional[str]], args: tuple, kwargs: dict) -> Optional[str]:
+    job["status"] = "running"
+    try:
+        path = render(*args, **kwargs)
+    except Exception as e:
+        print(f"Audio job {job['id']} failed: {str(e)}")
+        path = None
+        job["error"] = str(e)
+
+    job["audio_url"] = audio_url_for(path)
+    job["status"] = "ready" if path else "failed"
+    job["finished_at"] = time.time()
+    return job["audio_url"]
+
+
+def submit_audio_job(
+    render: Callable[..., Optional[str]],
+    *args,
+    pool: str = "calls",
+    **kwargs,
+) -> dict:
+    """
+    Queue `render(*args, **kwargs)`, which returns an audio file path (or
+    None), on the "calls" or "chat" worker pool. Returns the job's public
+    status dict.
+    """
+    executor = _executors[pool]
+    now = time.time()
+    job = {
+        "id": uuid.uuid4().hex,
+        "status": "queued",
+        "audio_url": None,
+        "error": None,
+        "created_at": now,
+        "finished_at": None,
+    }
+    with _lock:
+        _prune(now)
+        _jobs[job["id"]] = job
+        _futures[job["id"]] = executor.submit(_run, job, render, args, kwargs)
+    return job_status(job["id"])
+
+
+def job_status(job_id: str) -> Optional[dict]:
+    job = _jobs.get(job_id)
+    if job is None:
+        return None
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "audio_url": job["audio_url"],
+        "error": job["error"],
+        "status_url": job_status_url(job["id"]),
+    }
+
+
+async def wait_for_audio_job(job_id: str, timeout: float = 0) -> Optional[dict]:
+    """Status of a job, waiting up to `timeout` seconds for it to finish."""
+    future = _futures.get(job_id)
+    if future is not None and timeout > 0 and not future.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), min(timeout, MAX_WAIT))
+        except asyncio.TimeoutError:
+            pass
+    return job_status(job_id)
+
+
+def shutdown_audio_jobs() -> None:
+    # Jobs only render audio (calls are logged before their job is queued),
+    # so queued renders can be dropped
+    for executor in _executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
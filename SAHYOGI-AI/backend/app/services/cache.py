@@ -1,61 +1,521 @@
 """
-TTL-based in-memory cache for CSV loads and computed results.
+Bounded, thread-safe in-memory cache for CSV loads and computed results.
 Eliminates redundant disk I/O on repeated requests.
+
+Entries are kept in LRU order and bounded by entry count and approximate
+byte size. Expired entries are dropped lazily on read and by an amortized
+sweep that runs at most once every SWEEP_INTERVAL seconds. Concurrent
+misses for the same key in `cached` are coalesced (single-flight): one
+caller computes while the others wait for its result. With `stale_ttl`,
+an expired value keeps being served for that long while a single
+background refresh recomputes it.
+
+Keys built by `cached` are tuples rather than strings: primitives are
+used as-is, CSV paths are replaced by a (path, inode, mtime, size)
+fingerprint, and numpy arrays / pandas objects are content-hashed when
+the decorator opts in with hash_arrays=True. Extra types can be taught
+to the key builder with `register_key_handler`.
+
+Entries computed from a CSV path are tagged with that file, as is every
+cached value computed while they were being computed. `invalidate_file`
+drops all of them at once, which is what the market data watcher calls
+when a file changes. File-keyed entries can use ttl=None and live until
+the file changes or LRU evicts them.
 """
+import os
+import sys
+import math
 import time
-from typing import Any, Optional, Callable
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+from pathlib import PurePath
+from typing import Any, Optional, Callable, Hashable, Iterable
 from functools import wraps
 
-_cache: dict[str, dict] = {}
-
 DEFAULT_CSV_TTL = 300       # 5 minutes for CSV data
 DEFAULT_RESULT_TTL = 120    # 2 minutes for computed results
 
+MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+SWEEP_INTERVAL = 30         # seconds between expiry sweeps
+
+_MISSING = object()
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "stale_until", "size", "files")
+
+    def __init__(
+        self,
+        value: Any,
+        expires_at: float,
+        stale_until: float,
+        size: int,
+        files: frozenset = frozenset(),
+    ):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.size = size
+        self.files = files
+
+
+class _Flight:
+    """An in-progress computation that concurrent callers wait on."""
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> Any:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class UncacheableKey(TypeError):
+    """Raised by a key builder when an argument cannot be turned into a key."""
+
+
+_cache: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+_lock = threading.RLock()
+_flights: dict[Hashable, _Flight] = {}
+_key_handlers: list[tuple[type, Callable[[Any], Hashable]]] = []
+_file_index: dict[str, set] = {}
+_compute_context = threading.local()
+_total_bytes = 0
+_last_sweep = time.monotonic()
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0,
+    "expirations": 0,
+    "coalesced": 0,
+    "stale_served": 0,
+    "refreshes": 0,
+    "uncacheable": 0,
+}
+
+
+def _estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a cached value in bytes."""
+    memory_usage = getattr(value, "memory_usage", None)
+    if callable(memory_usage):
+        # pandas DataFrame / Series
+        try:
+            usage = memory_usage(deep=True)
+            return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+        except TypeError:
+            pass
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        # numpy arrays
+        return nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            _estimate_size(k) + _estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+# ─── Key Building ───
+
+_PRIMITIVES = (type(None), bool, int, float, complex, bytes, date)
+
+
+def file_fingerprint(path: str) -> tuple:
+    """Identity of a file's current contents: (path, inode, mtime_ns, size)."""
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def register_key_handler(type_: type, handler: Callable[[Any], Hashable]) -> None:
+    """Teach the default key builder how to turn instances of type_ into a hashable key part."""
+    _key_handlers.append((type_, handler))
+
+
+def _hash_buffer(data: Any) -> str:
+    return hashlib.blake2b(memoryview(data), digest_size=16).hexdigest()
+
+
+def _array_key(value: Any) -> Hashable:
+    """Content hash of a numpy array or pandas Series/DataFrame."""
+    import numpy as np
+
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise UncacheableKey("object-dtype arrays cannot be hashed")
+        arr = np.ascontiguousarray(value)
+        return ("ndarray", arr.dtype.str, arr.shape, _hash_buffer(arr))
+
+    import pandas as pd
+
+    hashed = pd.util.hash_pandas_object(value, index=True).values
+    if isinstance(value, pd.DataFrame):
+        return ("frame", tuple(value.columns), value.shape, _hash_buffer(hashed))
+    return ("series", value.name, value.shape, _hash_buffer(hashed))
+
+
+def _is_array_like(value: Any) -> bool:
+    module = type(value).__module__
+    return module.startswith("numpy") or module.startswith("pandas")
+
+
+def _key_part(value: Any, hash_arrays: bool) -> Hashable:
+    if isinstance(value, str):
+        if value.lower().endswith(".csv") and os.path.isfile(value):
+            return ("file",) + file_fingerprint(value)
+        return value
+    if isinstance(value, _PRIMITIVES):
+        return value
+    if isinstance(value, PurePath):
+        return _key_part(str(value), hash_arrays)
+    if isinstance(value, (tuple, list)):
+        return (type(value).__name__,) + tuple(_key_part(v, hash_arrays) for v in value)
+    if isinstance(value, dict):
+        return ("dict",) + tuple(
+            sorted((k, _key_part(v, hash_arrays)) for k, v in value.items())
+        )
+    for type_, handler in _key_handlers:
+        if isinstance(value, type_):
+            return handler(value)
+    if _is_array_like(value):
+        if not hash_arrays:
+            raise UncacheableKey(f"{type(value).__name__} argument needs hash_arrays=True")
+        return _array_key(value)
+    if type(value).__hash__ not in (None, object.__hash__):
+        # Value types with their own equality/hash (enums, frozen dataclasses, ...)
+        return value
+    raise UncacheableKey(f"cannot build a cache key from {type(value).__name__}")
+
+
+def default_key_builder(args: tuple, kwargs: dict, hash_arrays: bool = False) -> Hashable:
+    """Build a hashable key from call arguments without stringifying them."""
+    return (
+        tuple(_key_part(a, hash_arrays) for a in args),
+        tuple(sorted((k, _key_part(v, hash_arrays)) for k, v in kwargs.items())),
+    )
+
+
+def _files_in_key(part: Any, found: set) -> set:
+    """Collect the paths of all file fingerprints inside a built key."""
+    if isinstance(part, tuple):
+        if len(part) == 5 and part[0] == "file":
+            found.add(part[1])
+        else:
+            for p in part:
+                _files_in_key(p, found)
+    return found
 
-def get_cached(key: str) -> Optional[Any]:
+
+def _current_files() -> frozenset:
+    """Files the value being computed on this thread depends on."""
+    stack = getattr(_compute_context, "files", None)
+    return stack[-1] if stack else frozenset()
+
+
+def _key_label(key: Hashable) -> str:
+    """Readable form of a key, used for prefix invalidation."""
+    if isinstance(key, tuple) and len(key) >= 2:
+        return f"{key[0]}:{key[1]}"
+    return str(key)
+
+
+def _remove(key: Hashable) -> None:
+    """Drop an entry. Caller must hold _lock."""
+    global _total_bytes
+    entry = _cache.pop(key, None)
+    if entry is not None:
+        _total_bytes -= entry.size
+        for path in entry.files:
+            keys = _file_index.get(path)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del _file_index[path]
+
+
+def _evict_overflow() -> None:
+    """Evict least-recently-used entries until within limits. Caller must hold _lock."""
+    while _cache and (len(_cache) > MAX_ENTRIES or _total_bytes > MAX_BYTES):
+        key = next(iter(_cache))
+        _remove(key)
+        _stats["evictions"] += 1
+
+
+def _sweep_expired(now: float) -> None:
+    """Drop all entries past their stale window. Caller must hold _lock."""
+    global _last_sweep
+    _last_sweep = now
+    expired = [k for k, e in _cache.items() if now > e.stale_until]
+    for k in expired:
+        _remove(k)
+    _stats["expirations"] += len(expired)
+
+
+def _maybe_sweep(now: float) -> None:
+    """Run the expiry sweep if SWEEP_INTERVAL has elapsed. Caller must hold _lock."""
+    if now - _last_sweep >= SWEEP_INTERVAL:
+        _sweep_expired(now)
+
+
+def _lookup_entry(key: Hashable, record: bool = True) -> tuple[Any, Optional[str]]:
+    """
+    Return (value, state) where state is "fresh", "stale" or None on a miss.
+    Stale entries are past their TTL but still inside their stale window.
+    """
+    now = time.monotonic()
+    with _lock:
+        _maybe_sweep(now)
+        entry = _cache.get(key)
+        if entry is not None and now > entry.stale_until:
+            _remove(key)
+            _stats["expirations"] += 1
+            entry = None
+        if entry is None:
+            if record:
+                _stats["misses"] += 1
+            return _MISSING, None
+        _cache.move_to_end(key)
+        if now > entry.expires_at:
+            if record:
+                _stats["stale_served"] += 1
+            return entry.value, "stale"
+        if record:
+            _stats["hits"] += 1
+        return entry.value, "fresh"
+
+
+def _single_flight(
+    key: Hashable,
+    compute: Callable[[], Any],
+    ttl: Optional[int],
+    stale_ttl: int,
+    files: frozenset = frozenset(),
+) -> Any:
+    """
+    Run compute() once per key at a time; concurrent callers share its outcome.
+    Values cached by nested calls inside compute() inherit `files`.
+    """
+    with _lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            # A previous leader may have stored the value while we were missing
+            value, state = _lookup_entry(key, record=False)
+            if state == "fresh":
+                return value
+            flight = _flights[key] = _Flight()
+        else:
+            _stats["coalesced"] += 1
+
+    if not leader:
+        return flight.wait()
+
+    stack = getattr(_compute_context, "files", None)
+    if stack is None:
+        stack = _compute_context.files = []
+    files = files | _current_files()
+    stack.append(files)
+    try:
+        flight.result = compute()
+        set_cached(key, flight.result, ttl, stale_ttl, files=files)
+        return flight.result
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        stack.pop()
+        with _lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+def _refresh_in_background(
+    key: Hashable,
+    compute: Callable[[], Any],
+    ttl: Optional[int],
+    stale_ttl: int,
+    files: frozenset = frozenset(),
+) -> None:
+    """Start a background recompute of a stale entry unless one is already running."""
+    with _lock:
+        if key in _flights:
+            return
+        _stats["refreshes"] += 1
+
+    def run():
+        try:
+            _single_flight(key, compute, ttl, stale_ttl, files)
+        except Exception as e:
+            print(f"Background cache refresh failed for {key}: {str(e)}")
+
+    threading.Thread(target=run, name="cache-refresh", daemon=True).start()
+
+
+def get_cached(key: Hashable) -> Optional[Any]:
     """Get a value from cache if it exists and hasn't expired."""
-    entry = _cache.get(key)
-    if entry is None:
-        return None
-    if time.time() > entry["expires_at"]:
-        del _cache[key]
-        return None
-    return entry["value"]
+    value, state = _lookup_entry(key)
+    return value if state == "fresh" else None
+
+
+def set_cached(
+    key: Hashable,
+    value: Any,
+    ttl: Optional[int] = DEFAULT_RESULT_TTL,
+    stale_ttl: int = 0,
+    files: Iterable[str] = (),
+) -> None:
+    """
+    Store a value in cache with TTL (None = no expiry). With stale_ttl the
+    entry survives that much longer for stale-while-revalidate reads
+    through `cached`. `files` tags the entry for `invalidate_file`.
+    Values larger than MAX_BYTES are not stored.
+    """
+    global _total_bytes
+    size = _estimate_size(value)
+    now = time.monotonic()
+    expires_at = now + ttl if ttl is not None else math.inf
+    files = frozenset(os.path.abspath(f) for f in files) | _current_files()
+    with _lock:
+        _remove(key)
+        if size > MAX_BYTES:
+            return
+        _cache[key] = _Entry(value, expires_at, expires_at + stale_ttl, size, files)
+        _total_bytes += size
+        for path in files:
+            _file_index.setdefault(path, set()).add(key)
+        _maybe_sweep(now)
+        _evict_overflow()
 
 
-def set_cached(key: str, value: Any, ttl: int = DEFAULT_RESULT_TTL) -> None:
-    """Store a value in cache with TTL."""
-    _cache[key] = {
-        "value": value,
-        "expires_at": time.time() + ttl
-    }
+def cached(
+    ttl: Optional[int] = DEFAULT_RESULT_TTL,
+    key_prefix: str = "",
+    stale_ttl: int = 0,
+    hash_arrays: bool = False,
+    key_builder: Optional[Callable[[tuple, dict], Hashable]] = None,
+):
+    """
+    Decorator for caching function results based on arguments.
 
+    Concurrent misses for the same arguments run the function once and
+    share its result (or exception). With stale_ttl > 0, an expired result
+    is returned immediately for up to stale_ttl seconds while one
+    background refresh recomputes it.
 
-def cached(ttl: int = DEFAULT_RESULT_TTL, key_prefix: str = ""):
-    """Decorator for caching function results based on arguments."""
+    hash_arrays=True lets numpy/pandas arguments take part in the key by
+    content hash. key_builder(args, kwargs) replaces the default key
+    builder entirely. Calls whose arguments cannot be keyed run uncached.
+
+    Entries keyed on a CSV fingerprint are tagged with that file; with
+    ttl=None they never expire and are only replaced when the file changes.
+    """
     def decorator(func: Callable):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Build cache key from prefix + function name + args
-            cache_key = f"{key_prefix}:{func.__name__}:{str(args)}:{str(sorted(kwargs.items()))}"
-            result = get_cached(cache_key)
-            if result is not None:
-                return result
-            result = func(*args, **kwargs)
-            set_cached(cache_key, result, ttl)
-            return result
+            try:
+                if key_builder is not None:
+                    arg_key = key_builder(args, kwargs)
+                else:
+                    arg_key = default_key_builder(args, kwargs, hash_arrays)
+            except UncacheableKey:
+                with _lock:
+                    _stats["uncacheable"] += 1
+                return func(*args, **kwargs)
+            cache_key = (key_prefix, func.__name__, arg_key)
+            files = frozenset(_files_in_key(arg_key, set()))
+
+            value, state = _lookup_entry(cache_key)
+            if state == "fresh":
+                return value
+
+            def compute():
+                return func(*args, **kwargs)
+
+            if state == "stale":
+                _refresh_in_background(cache_key, compute, ttl, stale_ttl, files)
+                return value
+            return _single_flight(cache_key, compute, ttl, stale_ttl, files)
         return wrapper
     return decorator
 
 
+def invalidate_key(key: Hashable) -> bool:
+    """Invalidate a single entry. Returns whether it was present."""
+    with _lock:
+        present = key in _cache
+        _remove(key)
+    return present
+
+
 def invalidate_prefix(prefix: str) -> int:
     """Invalidate all cache entries matching a prefix. Returns count cleared."""
-    keys_to_delete = [k for k in _cache if k.startswith(prefix)]
-    for k in keys_to_delete:
-        del _cache[k]
+    with _lock:
+        keys_to_delete = [k for k in _cache if _key_label(k).startswith(prefix)]
+        for k in keys_to_delete:
+            _remove(k)
+    return len(keys_to_delete)
+
+
+def invalidate_file(path: str) -> int:
+    """
+    Invalidate every entry computed from `path`, including values derived
+    from it by nested cached calls. Returns count cleared.
+    """
+    with _lock:
+        keys_to_delete = list(_file_index.get(os.path.abspath(path), ()))
+        for k in keys_to_delete:
+            _remove(k)
     return len(keys_to_delete)
 
 
 def clear_cache() -> None:
     """Clear entire cache."""
-    _cache.clear()
+    global _total_bytes
+    with _lock:
+        _cache.clear()
+        _file_index.clear()
+        _total_bytes = 0
+
+
+def configure_cache(max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+    """Adjust cache limits at runtime, evicting immediately if now over."""
+    global MAX_ENTRIES, MAX_BYTES
+    with _lock:
+        if max_entries is not None:
+            MAX_ENTRIES = max_entries
+        if max_bytes is not None:
+            MAX_BYTES = max_bytes
+        _evict_overflow()
+
+
+def cache_stats() -> dict:
+    """Snapshot of cache size, limits and hit/miss/eviction counters."""
+    with _lock:
+        lookups = _stats["hits"] + _stats["stale_served"] + _stats["misses"]
+        served = _stats["hits"] + _stats["stale_served"]
+        return {
+            "entries": len(_cache),
+            "bytes": _total_bytes,
+            "max_entries": MAX_ENTRIES,
+            "max_bytes": MAX_BYTES,
+            "in_flight": len(_flights),
+            "tracked_files": len(_file_index),
+            **_stats,
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+        }
+
+
+def reset_cache_stats() -> None:
+    """Zero the hit/miss/eviction counters."""
+    with _lock:
+        for k in _stats:
+            _stats[k] = 0
@@ -0,0 +1,370 @@
+"""
+Rolling call aggregates for the analytics dashboard.
+
+Counters per language, crop, crop stage, market trend and hour of day,
+plus per-hour totals for the recent windows, are folded from the calls
+table: each process reads only the rows its CallCursor hasn't seen, at
+most every ANALYTICS_REFRESH_INTERVAL seconds. Because the table is the
+only source, every uvicorn worker reports the same counts, a few seconds
+behind the call log at most.
+
+Compaction drops hour buckets older than ANALYTICS_RETENTION_DAYS (they
+are already in the all-time counters) and persists a snapshot, so a
+restart only reads the calls logged since.
+"""
+import os
+import json
+import time
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+SNAPSHOT_PATH = os.getenv("ANALYTICS_SNAPSHOT_PATH", str(BACKEND_DIR / "spool" / "call_aggregates.json"))
+RETENTION_DAYS = int(os.getenv("ANALYTICS_RETENTION_DAYS", "35"))
+COMPACT_INTERVAL = float(os.getenv("ANALYTICS_COMPACT_INTERVAL", "300"))  # seconds
+REFRESH_INTERVAL = float(os.getenv("ANALYTICS_REFRESH_INTERVAL", "5"))  # seconds
+# How late a row may reach the calls table and still be read (seconds)
+LATE_WINDOW = float(os.getenv("CALL_LOG_LATE_WINDOW", "3600"))
+SNAPSHOT_VERSION = 3
+
+DIMENSIONS = {
+    "language": "calls_by_language",
+    "crop": "calls_by_crop",
+    "crop_stage": "crop_stage_distribution",
+    "market_trend": "market_trend_distribution",
+}
+# Columns needed to rebuild the aggregates from the calls table
+AGGREGATE_COLUMNS = ",".join(list(DIMENSIONS) + ["created_at"])
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """UTC datetime from an ISO timestamp (naive values are taken as UTC)."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _hour_key(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H")
+
+
+class CallCursor:
+    """
+    Incremental read position over the calls table.
+
+    created_at is stamped when a call is queued, so batched rows, rows
+    replayed from the spill file and other workers' rows can be inserted
+    after rows stamped later. A read therefore starts `window` seconds
+    before the newest created_at seen and skips the ids already read in
+    that window: a row inserted up to `window` late is read exactly once.
+    """
+
+    def __init__(self, latest: Optional[str] = None, seen: Optional[Dict[str, str]] = None, window: float = LATE_WINDOW):
+        self.window = window
+        self.latest = latest            # newest created_at read
+        self.seen = dict(seen or {})    # id → created_at of rows read within the window
+
+    def since(self) -> Optional[datetime]:
+        """Earliest created_at an unread row can have (None: read everything)."""
+        latest = parse_timestamp(self.latest)
+        return latest - timedelta(seconds=self.window) if latest else None
+
+    def is_new(self, row: dict) -> bool:
+        return str(row.get("id")) not in self.seen
+
+    def advance(self, row: dict) -> None:
+        """Mark a row as read."""
+        dt = parse_timestamp(row.get("created_at"))
+        if dt is None or row.get("id") is None:
+            return
+        self.seen[str(row["id"])] = row["created_at"]
+        if self.latest is None or dt > parse_timestamp(self.latest):
+            self.latest = row["created_at"]
+
+    def prune(self) -> None:
+        """Forget ids that fell out of the window (no read returns them again)."""
+        cutoff = self.since()
+        if cutoff is not None:
+            self.seen = {i: at for i, at in self.seen.items() if parse_timestamp(at) >= cutoff}
+
+    def to_dict(self) -> dict:
+        return {"latest": self.latest, "seen": dict(self.seen)}
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict], window: float = LATE_WINDOW) -> "CallCursor":
+        data = data or {}
+        return cls(data.get("latest"), data.get("seen"), window)
+
+
+class CallAggregates:
+    """Thread-safe rolling counters over logged calls."""
+
+    def __init__(self, retention_days: int = RETENTION_DAYS):
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self.total = 0
+        self.dimensions: Dict[str, Counter] = {d: Counter() for d in DIMENSIONS}
+        self.hours: Counter = Counter()    # hour of day → calls
+        self.buckets: Counter = Counter()  # "YYYY-MM-DDTHH" → calls, within retention
+        self.cursor = CallCursor()
+
+    def record(self, call: dict) -> None:
+        """Count one call row (the same shape as a calls-table row)."""
+        dt = parse_timestamp(call.get("created_at"))
+        with self._lock:
+            self.total += 1
+            for dim, counter in self.dimensions.items():
+                counter[call.get(dim)] += 1
+            if dt is not None:
+                self.hours[dt.hour] += 1
+                self.buckets[_hour_key(dt)] += 1
+
+    def record_many(self, calls: Iterable[dict]) -> int:
+        count = 0
+        for call in calls:
+            self.record(call)
+            count += 1
+        return count
+
+    def catch_up(self, rows: Iterable[dict]) -> int:
+        """Count the rows the cursor hasn't read yet, advancing it past each. Returns rows counted."""
+        count = 0
+        for row in rows:
+            if not self.cursor.is_new(row):
+                continue
+            self.record(row)
+            with self._lock:
+                self.cursor.advance(row)
+            count += 1
+        with self._lock:
+            self.cursor.prune()
+        return count
+
+    def _calls_since(self, cutoff: datetime) -> int:
+        """Calls in hour buckets from the one containing `cutoff` on."""
+        start = _hour_key(cutoff)
+        return sum(n for hour, n in self.buckets.items() if hour >= start)
+
+    def summary(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Dashboard summary. "Today" is the UTC calendar day; the week and
+        month are rolling 7×24 h and 30×24 h windows, at hour resolution.
+        Cost depends on the retention window, not on call volume.
+        """
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            peak_hour = self.hours.most_common(1)[0][0] if self.hours else None
+            today = now.date().isoformat()
+            result = {
+                "total_calls": self.total,
+                "calls_today": sum(n for hour, n in self.buckets.items() if hour.startswith(today)),
+                "calls_this_week": self._calls_since(now - timedelta(days=7)),
+                "calls_this_month": self._calls_since(now - timedelta(days=30)),
+                "peak_call_hour": peak_hour,
+            }
+            for dim, field in DIMENSIONS.items():
+                result[field] = dict(self.dimensions[dim])
+        return result
+
+    def compact(self, now: Optional[datetime] = None) -> int:
+        """Drop hour buckets older than the retention window. Returns buckets removed."""
+        now = now or datetime.now(timezone.utc)
+        cutoff = _hour_key(now - timedelta(days=self.retention_days))
+        with self._lock:
+            old = [hour for hour in self.buckets if hour < cutoff]
+            for hour in old:
+                del self.buckets[hour]
+        return len(old)
+
+    # ---------- Snapshot ----------
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "version": SNAPSHOT_VERSION,
+                "total": self.total,
+                # JSON keys are strings; None (missing field) is stored as ""
+                "dimensions": {
+                    dim: {("" if k is None else k): v for k, v in counter.items()}
+                    for dim, counter in self.dimensions.items()
+                },
+                "hours": {str(h): n for h, n in self.hours.items()},
+                "buckets": dict(self.buckets),
+                "cursor": self.cursor.to_dict(),
+            }
+
+    @classmethod
+    def from_dict(cls, data: dict, retention_days: int = RETENTION_DAYS) -> "CallAggregates":
+        agg = cls(retention_days=retention_days)
+        agg.total = data.get("total", 0)
+        for dim in DIMENSIONS:
+            counts = data.get("dimensions", {}).get(dim, {})
+            agg.dimensions[dim] = Counter({(None if k == "" else k): v for k, v in counts.items()})
+        agg.hours = Counter({int(h): n for h, n in data.get("hours", {}).items()})
+        agg.buckets = Counter(data.get("buckets", {}))
+        agg.cursor = CallCursor.from_dict(data.get("cursor"))
+        return agg
+
+    def save(self, path: str = SNAPSHOT_PATH) -> None:
+        """Atomically write the snapshot (workers sharing the path each write a whole file)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = SNAPSHOT_PATH) -> Optional["CallAggregates"]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if data.get("version") != SNAPSHOT_VERSION:
+            return None  # rebuilt from the calls table
+        return cls.from_dict(data)
+
+
+_aggregates = CallAggregates()
+_refresh_lock = threading.Lock()
+_ready = threading.Event()
+_last_refresh = 0.0
+_stop = threading.Event()
+_compactor: Optional[threading.Thread] = None
+_bootstrapper: Optional[threading.Thread] = None
+_bootstrap_lock = threading.Lock()
+_last_bootstrap = 0.0
+
+
+def get_aggregates() -> CallAggregates:
+    return _aggregates
+
+
+def aggregates_ready() -> bool:
+    """True once the snapshot is loaded and caught up with the calls table."""
+    return _ready.is_set()
+
+
+def _fetch_calls_after(cursor: CallCursor) -> Iterable[dict]:
+    """Calls the cursor hasn't read, projected to the aggregate columns."""
+    from app.services.analytics_service import iter_new_calls
+    return iter_new_calls(AGGREGATE_COLUMNS.split(","), cursor)
+
+
+def bootstrap_aggregates(path: str = SNAPSHOT_PATH, fetch=_fetch_calls_after) -> Optional[CallAggregates]:
+    """
+    Load the snapshot, catch up from the calls table and make it the live
+    aggregate. Returns None (leaving the live counters in place) if the
+    catch-up fails, so an incomplete snapshot is never persisted.
+    """
+    global _aggregates, _last_refresh
+    snapshot = CallAggregates.load(path) or CallAggregates()
+    try:
+        snapshot.catch_up(fetch(snapshot.cursor))
+    except Exception as e:
+        print(f"Analytics catch-up failed: {str(e)}")
+        return None
+
+    _aggregates = snapshot
+    _last_refresh = time.monotonic()
+    _ready.set()
+    return snapshot
+
+
+def refresh_aggregates(fetch=_fetch_calls_after, max_age: float = REFRESH_INTERVAL) -> int:
+    """Read calls logged since the last refresh, if it is older than max_age. Returns rows read."""
+    global _last_refresh
+    with _refresh_lock:
+        if not _ready.is_set() or time.monotonic() - _last_refresh < max_age:
+            return 0
+        try:
+            # The cursor advances row by row, so a failure part-way loses nothing
+            return _aggregates.catch_up(fetch(_aggregates.cursor))
+        except Exception as e:
+            print(f"Analytics refresh failed: {str(e)}")
+            return 0
+        finally:
+            _last_refresh = time.monotonic()
+
+
+def _bootstrap() -> None:
+    global _last_bootstrap
+    with _refresh_lock:
+        if not _ready.is_set():
+            _last_bootstrap = time.monotonic()
+            bootstrap_aggregates(SNAPSHOT_PATH, fetch=_fetch_calls_after)
+
+
+def _bootstrap_in_background() -> None:
+    """Start a bootstrap thread unless one is running or the last attempt was just now."""
+    global _bootstrapper
+    with _bootstrap_lock:
+        if _bootstrapper is not None and _bootstrapper.is_alive():
+            return
+        if _last_bootstrap and time.monotonic() - _last_bootstrap < REFRESH_INTERVAL:
+            return
+        _bootstrapper = threading.Thread(target=_bootstrap, name="call-aggregates-bootstrap", daemon=True)
+        _bootstrapper.start()
+
+
+def ensure_aggregates() -> CallAggregates:
+    """
+    Keep up with the calls table without blocking the caller: until the
+    first bootstrap succeeds it runs in the background (retried after
+    failures) and the live aggregate is returned empty. Check
+    aggregates_ready() before trusting the counts.
+    """
+    if not _ready.is_set():
+        _bootstrap_in_background()
+        return _aggregates
+    refresh_aggregates()
+    return _aggregates
+
+
+def compact_and_save(path: str = SNAPSHOT_PATH) -> None:
+    if not _ready.is_set():
+        return
+    _aggregates.compact()
+    try:
+        _aggregates.save(path)
+    except OSError as e:
+        print(f"Analytics snapshot failed: {str(e)}")
+
+
+def _run(interval: float) -> None:
+    _bootstrap()
+    while not _stop.wait(interval):
+        _bootstrap()
+        refresh_aggregates()
+        compact_and_save()
+
+
+def start_aggregation(interval: float = COMPACT_INTERVAL) -> None:
+    """Bootstrap in the background, then compact and snapshot every `interval` seconds."""
+    global _compactor
+    if _compactor is None:
+        _stop.clear()
+        _compactor = threading.Thread(target=_run, args=(interval,), name="call-aggregates", daemon=True)
+        _compactor.start()
+
+
+def stop_aggregation() -> None:
+    global _compactor
+    _stop.set()
+    if _compactor is not None:
+        _compactor.join(timeout=5)
+        _compactor = None
+    compact_and_save()
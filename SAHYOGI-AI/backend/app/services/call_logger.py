@@ -1,4 +1,425 @@
-from app.services.supabase_service import supabase
+"""
+Background call-log pipeline.
+
+`log_call` only enqueues the record; a worker thread inserts queued calls
+into Supabase in batches (every CALL_LOG_BATCH_SIZE records or
+CALL_LOG_FLUSH_INTERVAL seconds, whichever comes first). Batches that
+cannot be written, and records arriving while the queue is full, are
+appended to a local JSONL spill file that is replayed on startup and
+again once the database accepts inserts.
+
+A batch the database rejects (bad data rather than an outage) is retried
+row by row; rows that are still rejected go to a dead-letter file next
+to the spill file instead of blocking the rest. Several worker processes
+can share one spill path: appends take an exclusive file lock, and only
+the process holding the replay lock replays.
+"""
+import os
+import json
+import time
+import queue
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+BATCH_SIZE = int(os.getenv("CALL_LOG_BATCH_SIZE", "50"))
+FLUSH_INTERVAL = float(os.getenv("CALL_LOG_FLUSH_INTERVAL", "1.0"))  # seconds
+MAX_QUEUE = int(os.getenv("CALL_LOG_MAX_QUEUE", "10000"))
+REPLAY_INTERVAL = float(os.getenv("CALL_LOG_REPLAY_INTERVAL", "30"))  # seconds
+SPILL_PATH = os.getenv("CALL_LOG_SPILL_PATH", str(BACKEND_DIR / "spool" / "calls.jsonl"))
+
+# SQLSTATE classes meaning the rows themselves were refused:
+# data exception, integrity constraint violation, undefined column/table
+REJECTED_SQLSTATES = ("22", "23", "42")
+# PostgREST request/schema errors (e.g. PGRST204: unknown column)
+REJECTED_PGRST = ("PGRST1", "PGRST2")
+
+
+def rejects_rows(error: Exception) -> bool:
+    """True if an insert failed because of the rows, not because the database is unreachable."""
+    if isinstance(error, (TypeError, ValueError)):
+        return True  # not serializable
+    code = str(getattr(error, "code", "") or "")
+    return code[:2] in REJECTED_SQLSTATES or code.startswith(REJECTED_PGRST)
+
+
+@contextmanager
+def _file_lock(path: str, blocking: bool = True):
+    """Exclusive lock on `path` shared by all processes. Yields whether it was acquired."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a+b") as f:
+        fd = f.fileno()
+        acquired = False
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                    acquired = True
+                except BlockingIOError:
+                    pass
+            else:
+                f.seek(0)
+                while not acquired:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                        acquired = True
+                    except OSError:
+                        if not blocking:
+                            break
+                        time.sleep(0.01)
+            yield acquired
+        finally:
+            if acquired:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class CallLogPipeline:
+    """
+    Bounded queue plus a flushing worker thread.
+
+    `client` is anything exposing the Supabase table API
+    (`client.table("calls").insert(rows).execute()`); it defaults to the
+    shared service-role client, imported on first use.
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_queue: int = MAX_QUEUE,
+        spill_path: str = SPILL_PATH,
+        replay_interval: float = REPLAY_INTERVAL,
+        dead_letter_path: Optional[str] = None,
+    ):
+        self._client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.dead_letter_path = dead_letter_path or os.path.splitext(spill_path)[0] + ".dead.jsonl"
+        self.replay_interval = replay_interval
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._spill_lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._last_replay = 0.0
+        self._stats = {
+            "enqueued": 0,
+            "inserted": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "overflowed": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "dead_lettered": 0,
+            "queue_high_watermark": 0,
+            "last_flush_ms": None,
+            "last_error": None,
+        }
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += n
+
+    # ---------- Producer side ----------
+
+    def enqueue(self, record: dict) -> bool:
+        """Queue a record without blocking. Returns False if it went to the spill file."""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count("overflowed")
+            self._spill([record])
+            return False
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._stats["enqueued"] += 1
+            if depth > self._stats["queue_high_watermark"]:
+                self._stats["queue_high_watermark"] = depth
+        return True
+
+    # ---------- Database ----------
+
+    def _table(self):
+        if self._client is None:
+            from app.services.supabase_service import supabase
+            self._client = supabase
+        return self._client.table("calls")
+
+    def _insert(self, rows: List[dict]) -> Optional[Exception]:
+        """Insert one batch. Returns the error, or None on success."""
+        started = time.perf_counter()
+        try:
+            self._table().insert(rows).execute()
+        except Exception as e:
+            self._count("failed_batches")
+            self._stats["last_error"] = str(e)
+            print(f"Call log insert failed ({len(rows)} rows): {str(e)}")
+            return e
+        self._count("batches")
+        self._count("inserted", len(rows))
+        self._stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return None
+
+    def _write(self, rows: List[dict]) -> List[dict]:
+        """
+        Insert rows. If the database rejects the batch, retry row by row and
+        dead-letter the rows it still rejects. Returns the rows left unwritten
+        because the database is unreachable (the caller spills them).
+        """
+        error = self._insert(rows)
+        if error is None:
+            return []
+        if not rejects_rows(error):
+            return rows
+        if len(rows) == 1:
+            self._dead_letter(rows[0], error)
+            return []
+
+        for i, row in enumerate(rows):
+            error = self._insert([row])
+            if error is None:
+                continue
+            if not rejects_rows(error):
+                return rows[i:]
+            self._dead_letter(row, error)
+        return []
+
+    # ---------- Spill file ----------
+
+    @contextmanager
+    def _spill_guard(self):
+        """Held while appending to or renaming the spill file (threads and processes)."""
+        with self._spill_lock, _file_lock(self.spill_path + ".lock"):
+            yield
+
+    def _append_spill(self, rows: List[dict], path: Optional[str] = None) -> None:
+        path = path or self.spill_path
+        with self._spill_guard():
+            with open(path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, default=str) + "\n")
+
+    def _spill(self, rows: List[dict]) -> None:
+        if not rows:
+            return
+        self._append_spill(rows)
+        self._count("spilled", len(rows))
+
+    def _dead_letter(self, row: dict, error: Exception) -> None:
+        print(f"Call log row rejected, moved to {self.dead_letter_path}: {str(error)}")
+        self._append_spill([{
+            "record": row,
+            "error": str(error),
+            "rejected_at": datetime.now(timezone.utc).isoformat(),
+        }], self.dead_letter_path)
+        self._count("dead_lettered")
+
+    def spill_pending(self) -> bool:
+        return os.path.exists(self.spill_path) and os.path.getsize(self.spill_path) > 0
+
+    def replay_spill(self) -> int:
+        """
+        Insert spilled records, streaming the file in batches. Records that
+        cannot be written yet go back to the spill file. Only one thread or
+        process replays at a time; others return 0. Returns the number of
+        records replayed.
+        """
+        self._last_replay = time.monotonic()
+        replaying = self.spill_path + ".replay"
+        if not self._replay_lock.acquire(blocking=False):
+            return 0
+        try:
+            with _file_lock(self.spill_path + ".replay.lock", blocking=False) as owner:
+                if not owner:
+                    return 0
+                # Only the replay-lock owner touches .replay, so a leftover
+                # one is an interrupted replay of this or a dead process
+                with self._spill_guard():
+                    if not self.spill_pending() and not os.path.exists(replaying):
+                        return 0
+                    if os.path.exists(self.spill_path):
+                        if os.path.exists(replaying):
+                            with open(self.spill_path, encoding="utf-8") as src, \
+                                    open(replaying, "a", encoding="utf-8") as dst:
+                                shutil.copyfileobj(src, dst)
+                            os.remove(self.spill_path)
+                        else:
+                            os.replace(self.spill_path, replaying)
+
+                replayed = self._replay_file(replaying)
+                os.remove(replaying)
+        finally:
+            self._replay_lock.release()
+
+        self._count("replayed", replayed)
+        return replayed
+
+    def _replay_file(self, path: str) -> int:
+        replayed = 0
+        with open(path, encoding="utf-8") as f:
+            batch = []
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    batch.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Skipping corrupt call log line in {path}")
+                    continue
+                if len(batch) < self.batch_size:
+                    continue
+
+                unwritten = self._write(batch)
+                replayed += len(batch) - len(unwritten)
+                if unwritten:
+                    self._requeue(unwritten, f)
+                    return replayed
+                batch = []
+
+            if batch:
+                unwritten = self._write(batch)
+                replayed += len(batch) - len(unwritten)
+                if unwritten:
+                    self._requeue(unwritten, f)
+        return replayed
+
+    def _requeue(self, rows: List[dict], rest) -> None:
+        """Write rows and the unread rest of the replay file back to the spill file."""
+        self._append_spill(rows)
+        with self._spill_guard():
+            with open(self.spill_path, "a", encoding="utf-8") as dst:
+                shutil.copyfileobj(rest, dst)
+
+    # ---------- Worker ----------
+
+    def _next_batch(self) -> List[dict]:
+        """Collect up to batch_size records, waiting at most flush_interval."""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self) -> int:
+        """Write everything currently queued. Returns the number of records taken."""
+        taken = 0
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return taken
+            taken += len(batch)
+            self._spill(self._write(batch))
+
+    def _replay_safely(self) -> None:
+        try:
+            self.replay_spill()
+        except Exception as e:
+            print(f"Call log replay failed: {str(e)}")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                unwritten = self._write(batch)
+                if unwritten:
+                    self._spill(unwritten)
+                    continue
+            if (
+                self.spill_pending()
+                and time.monotonic() - self._last_replay >= self.replay_interval
+            ):
+                self._replay_safely()
+        self.flush()
+
+    def start(self, replay: bool = True) -> "CallLogPipeline":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._worker, args=(replay,), name="call-logger", daemon=True)
+            self._thread.start()
+        return self
+
+    def _worker(self, replay: bool) -> None:
+        if replay:
+            self._replay_safely()
+        self._run()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the worker after it drains the queue."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        else:
+            self.flush()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self) -> Dict[str, Any]:
+        """Throughput and backpressure counters."""
+        return {
+            **self._stats,
+            "running": self.running,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "spill_pending": self.spill_pending(),
+        }
+
+
+_pipeline: Optional[CallLogPipeline] = None
+_inline: Optional[CallLogPipeline] = None  # writer for when no pipeline is running
+
+
+def start_call_logging(**kwargs) -> CallLogPipeline:
+    """Start the shared pipeline (idempotent). Called from the app lifespan."""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = CallLogPipeline(**kwargs)
+    return _pipeline.start()
+
+
+def stop_call_logging() -> None:
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.stop()
+        _pipeline = None
+
+
+def call_log_stats() -> Dict[str, Any]:
+    if _pipeline is None:
+        return {"running": False}
+    return _pipeline.stats()
 
 
 def log_call(
@@ -11,8 +432,7 @@ def log_call(
     audio_path: str,
     advisory_snapshot: dict
 ):
-
-    supabase.table("calls").insert({
+    record = {
         "farmer_id": farmer_id,
         "phone": phone,
         "language": language,
@@ -20,5 +440,17 @@ def log_call(
         "crop_stage": crop_stage,
         "market_trend": market_trend,
         "audio_path": audio_path,
-        "advisory_snapshot": advisory_snapshot
-    }).execute()
+        "advisory_snapshot": advisory_snapshot,
+        # Stamped here so batched or replayed rows keep the call time
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+    if _pipeline is not None and _pipeline.running:
+        _pipeline.enqueue(record)
+        return
+
+    # No background pipeline (scripts, tests): write inline as before
+    global _inline
+    if _inline is None:
+        _inline = CallLogPipeline(max_queue=1)
+    _inline._spill(_inline._write([record]))
@@ -0,0 +1,33 @@
+"""
+Bounded executors for work that must not run on the event loop.
+
+CPU-heavy engine calls (pandas/numpy advisory, projection, simulation)
+go to a small dedicated thread pool so a burst of requests cannot
+oversubscribe the CPU; threads (not processes) keep the in-process cache
+shared. Blocking network calls to SDKs without async support (Gemini,
+gTTS) go to asyncio's default thread pool.
+"""
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="engine")
+
+
+async def run_cpu(func: Callable, *args, **kwargs) -> Any:
+    """Run a CPU-bound engine call on the bounded engine pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_cpu_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_io(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking I/O call (network SDKs, file writes) off the event loop."""
+    return await asyncio.to_thread(func, *args, **kwargs)
+
+
+def shutdown_executors() -> None:
+    _cpu_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,89 @@
+"""
+Polling watcher for market data files.
+Invalidates cached CSV frames and every value derived from them the
+moment a watched file is modified, replaced, created or removed.
+"""
+import os
+import fnmatch
+import threading
+from typing import Callable, Optional
+
+from app.services.cache import invalidate_file
+
+DEFAULT_POLL_INTERVAL = 2.0  # seconds
+
+
+def _stat_identity(path: str) -> Optional[tuple]:
+    """(inode, mtime_ns, size) of a file, or None if it is gone."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class FileWatcher:
+    """
+    Polls a directory with os.scandir and reports files whose identity
+    changed since the previous scan. Uses only stat calls, so a scan of
+    the market data directory costs microseconds.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        pattern: str = "*.csv",
+        interval: float = DEFAULT_POLL_INTERVAL,
+        on_change: Callable[[str], object] = invalidate_file,
+    ):
+        self.directory = os.path.abspath(directory)
+        self.pattern = pattern
+        self.interval = interval
+        self.on_change = on_change
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._known = self._current()
+
+    def _current(self) -> dict[str, tuple]:
+        files = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return files
+        for entry in entries:
+            if entry.is_file() and fnmatch.fnmatch(entry.name, self.pattern):
+                identity = _stat_identity(entry.path)
+                if identity is not None:
+                    files[entry.path] = identity
+        return files
+
+    def scan(self) -> list[str]:
+        """Compare against the previous scan; notify and return changed paths."""
+        current = self._current()
+        changed = [
+            path for path in set(current) | set(self._known)
+            if current.get(path) != self._known.get(path)
+        ]
+        self._known = current
+        for path in changed:
+            try:
+                self.on_change(path)
+            except Exception as e:
+                print(f"File watcher callback failed for {path}: {str(e)}")
+        return changed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.scan()
+
+    def start(self) -> "FileWatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
@@ -0,0 +1,302 @@
+"""
+Streaming export of the calls table to chunked columnar / compressed files.
+
+Rows are read page by page with `iter_calls` (keyset pagination, date
+window filtered by Supabase) and written straight to the current chunk:
+Parquet row groups when pyarrow is installed, gzip JSONL otherwise.
+Memory is bounded by one page. Each finished chunk is renamed into place
+and the export's CallCursor saved to its state file, so an interrupted
+export resumes after the last complete chunk. An open-ended export (no
+end) picks up the rows logged since it last completed when it is run
+again, including rows inserted up to CALL_LOG_LATE_WINDOW after later
+ones (the cursor re-reads that window and skips ids already exported).
+"""
+import os
+import glob
+import gzip
+import json
+import uuid
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services.analytics_service import PAGE_SIZE, iso_utc, iter_new_calls
+from app.services.call_aggregates import CallCursor, parse_timestamp
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: JSONL export still works
+    pa = None
+    pq = None
+
+EXPORT_COLUMNS = [
+    "id",
+    "farmer_id",
+    "phone",
+    "language",
+    "crop",
+    "crop_stage",
+    "market_trend",
+    "audio_path",
+    "advisory_snapshot",
+    "created_at",
+]
+CHUNK_ROWS = 100_000
+STATE_FILE = "export_state.json"
+FORMATS = ("parquet", "jsonl.gz")
+
+
+def resolve_format(format: str = "auto") -> str:
+    if format == "auto":
+        return "parquet" if pa is not None else "jsonl.gz"
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS + ('auto',)}")
+    if format == "parquet" and pa is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow); use --format jsonl.gz")
+    return format
+
+
+# ---------- Chunk writers ----------
+
+class _JsonlChunk:
+    def __init__(self, path: str):
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+
+    def write(self, rows: List[dict]) -> None:
+        for row in rows:
+            self._file.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetChunk:
+    """One Parquet file; each written page becomes a row group."""
+
+    def __init__(self, path: str, columns: List[str]):
+        self.columns = columns
+        self.schema = pa.schema([
+            (c, pa.timestamp("us", tz="UTC") if c == "created_at" else pa.string())
+            for c in columns
+        ])
+        self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def _column(self, name: str, rows: List[dict]) -> list:
+        if name == "created_at":
+            return [parse_timestamp(r.get(name)) for r in rows]
+        values = []
+        for r in rows:
+            v = r.get(name)
+            if isinstance(v, (dict, list)):
+                v = json.dumps(v, ensure_ascii=False)
+            elif v is not None:
+                v = str(v)
+            values.append(v)
+        return values
+
+    def write(self, rows: List[dict]) -> None:
+        arrays = {c: self._column(c, rows) for c in self.columns}
+        self._writer.write_table(pa.Table.from_pydict(arrays, schema=self.schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+# ---------- State ----------
+
+def _load_state(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_state(path: str, state: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _clear_export(out_dir: str) -> None:
+    """Remove a previous export's state and chunk files (nothing else in the directory)."""
+    patterns = [STATE_FILE] + [f"calls-*.{fmt}" for fmt in FORMATS] + [f"calls-*.{fmt}.part" for fmt in FORMATS]
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(glob.escape(out_dir), pattern)):
+            os.remove(path)
+
+
+def export_calls(
+    out_dir: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    format: str = "auto",
+    chunk_rows: int = CHUNK_ROWS,
+    page_size: int = PAGE_SIZE,
+    columns: Optional[List[str]] = None,
+    resume: bool = True,
+    client=None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    progress: Optional[Callable[[dict], Any]] = None,
+) -> dict:
+    """
+    Export calls in [start, end) to `out_dir` as numbered chunk files.
+    Returns the export state (cursor, row count, files, completed).
+    With resume=False any previous export in `out_dir` is deleted first.
+    """
+    fmt = resolve_format(format)
+    columns = list(columns or EXPORT_COLUMNS)
+    os.makedirs(out_dir, exist_ok=True)
+    state_path = os.path.join(out_dir, STATE_FILE)
+
+    if not resume:
+        _clear_export(out_dir)
+
+    params = {"start": iso_utc(start), "end": iso_utc(end), "format": fmt, "columns": columns}
+    state = _load_state(state_path)
+    if state is not None and state["params"] != params:
+        raise ValueError(f"{state_path} belongs to a different export; use another directory or resume=False")
+    if state is None:
+        state = {"params": params, "cursor": None, "rows": 0, "files": [], "completed": False}
+        _save_state(state_path, state)
+    if state["completed"]:
+        if end is not None:
+            return state
+        # Open-ended: continue after the last exported row into new chunks
+        state["completed"] = False
+        state.pop("completed_at", None)
+
+    # Advanced as rows are written; saved to the state only with a finished chunk
+    if isinstance(state["cursor"], list):
+        # Older state files saved the (created_at, id) of the last row
+        state["cursor"] = {"latest": state["cursor"][0]}
+    cursor = CallCursor.from_dict(state["cursor"])
+    rows_iter = iter_new_calls(columns, cursor, start=start, end=end, page_size=page_size, client=client)
+
+    chunk = None
+    chunk_tmp = chunk_path = None
+    chunk_count = 0
+    page: List[dict] = []
+
+    def open_chunk():
+        nonlocal chunk, chunk_tmp, chunk_path, chunk_count
+        chunk_path = os.path.join(out_dir, f"calls-{len(state['files']):05d}.{fmt}")
+        chunk_tmp = chunk_path + ".part"
+        chunk = _ParquetChunk(chunk_tmp, columns) if fmt == "parquet" else _JsonlChunk(chunk_tmp)
+        chunk_count = 0
+
+    def write_page():
+        nonlocal chunk_count
+        if not page:
+            return
+        if chunk is None:
+            open_chunk()
+        chunk.write(page)
+        chunk_count += len(page)
+        for row in page:
+            cursor.advance(row)
+        page.clear()
+
+    def finish_chunk():
+        nonlocal chunk, chunk_count
+        if chunk is None:
+            return
+        chunk.close()
+        os.replace(chunk_tmp, chunk_path)
+        state["files"].append(os.path.basename(chunk_path))
+        state["rows"] += chunk_count
+        cursor.prune()
+        state["cursor"] = cursor.to_dict()
+        _save_state(state_path, state)
+        chunk = None
+        chunk_count = 0
+        if progress:
+            progress(state)
+
+    try:
+        for row in rows_iter:
+            page.append(row)
+            if len(page) >= page_size or chunk_count + len(page) >= chunk_rows:
+                write_page()
+                if chunk_count >= chunk_rows:
+                    finish_chunk()
+                if should_stop and should_stop():
+                    break
+        else:
+            write_page()
+            finish_chunk()
+            state["completed"] = True
+            state["completed_at"] = datetime.now(timezone.utc).isoformat()
+            _save_state(state_path, state)
+            return state
+        # Stopped early: keep the rows already written
+        write_page()
+        finish_chunk()
+        return state
+    finally:
+        if chunk is not None:
+            # Failed mid-chunk: discard it; resuming re-reads from the saved cursor
+            chunk.close()
+            os.remove(chunk_tmp)
+
+
+# ---------- Background jobs ----------
+
+_jobs: Dict[str, dict] = {}
+_jobs_lock = threading.Lock()
+
+
+def start_export_job(out_dir: str, **kwargs) -> str:
+    """Run export_calls on its own thread (one export per directory). Returns the job id."""
+    with _jobs_lock:
+        for job in _jobs.values():
+            if job["out_dir"] == out_dir and job["status"] == "running":
+                raise RuntimeError(f"An export into {out_dir} is already running ({job['id']})")
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "id": job_id,
+            "out_dir": out_dir,
+            "status": "running",
+            "rows": 0,
+            "files": [],
+            "error": None,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "_stop": threading.Event(),
+        }
+        _jobs[job_id] = job
+
+    def progress(state):
+        job["rows"] = state["rows"]
+        job["files"] = list(state["files"])
+
+    def run():
+        try:
+            state = export_calls(out_dir, should_stop=job["_stop"].is_set, progress=progress, **kwargs)
+            progress(state)
+            job["status"] = "completed" if state["completed"] else "cancelled"
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+            print(f"Call log export {job_id} failed: {str(e)}")
+        job["finished_at"] = datetime.now(timezone.utc).isoformat()
+
+    threading.Thread(target=run, name=f"export-{job_id}", daemon=True).start()
+    return job_id
+
+
+def get_export_job(job_id: str) -> Optional[dict]:
+    job = _jobs.get(job_id)
+    if job is None:
+        return None
+    return {k: v for k, v in job.items() if not k.startswith("_")}
+
+
+def cancel_export_job(job_id: str) -> bool:
+    """Ask a running export to stop after its current page."""
+    job = _jobs.get(job_id)
+    if job is None or job["status"] != "running":
+        return False
+    job["_stop"].set()
+    return True
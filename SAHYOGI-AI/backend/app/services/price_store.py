@@ -0,0 +1,149 @@
+"""
+Columnar binary store for market price CSVs.
+
+Each CSV is converted once into a directory of .npy column files that
+are memory-mapped on load:
+
+    price.npy     float64 prices
+    day.npy       int32 day offsets from meta["base_date"]
+    mandi.npy     int32 dictionary codes (multi-mandi files only)
+    district.npy  int32 dictionary codes (multi-mandi files only)
+    meta.json     source fingerprint, base date and code dictionaries
+
+Rows are stored sorted by date, so loaders read zero-copy views instead
+of re-parsing text. A store is rebuilt only when the source CSV's
+(inode, mtime, size) changes, and each build goes to its own versioned
+directory so concurrent workers never see a half-written store.
+"""
+import os
+import json
+import shutil
+import tempfile
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.cache import cached, file_fingerprint
+
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR")
+STORE_VERSION = 1
+DICTIONARY_COLUMNS = ("mandi", "district")
+
+
+class PriceTable:
+    """Memory-mapped columns of one price CSV."""
+
+    def __init__(self, path: str, meta: dict):
+        self.path = path
+        self.meta = meta
+        self.base_date = np.datetime64(meta["base_date"], "D")
+        self.price = _load_column(path, "price")
+        self.day = _load_column(path, "day")
+        self.codes = {c: _load_column(path, c) for c in meta["dictionaries"]}
+        self.dictionaries = meta["dictionaries"]
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    def dates(self) -> np.ndarray:
+        """Row dates as datetime64[D]."""
+        return self.base_date + self.day.astype("timedelta64[D]")
+
+    def categorical(self, column: str) -> pd.Categorical:
+        """Dictionary-encoded column as a pandas Categorical over the stored codes."""
+        return pd.Categorical.from_codes(self.codes[column], categories=self.dictionaries[column])
+
+
+def _load_column(path: str, name: str) -> np.ndarray:
+    # np.asarray drops the memmap subclass but keeps the mapped buffer
+    return np.asarray(np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r"))
+
+
+def _store_root(csv_path: str) -> str:
+    if PRICE_STORE_DIR:
+        return PRICE_STORE_DIR
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)), ".price_store")
+
+
+def _store_name(csv_path: str) -> str:
+    _, ino, mtime_ns, size = file_fingerprint(csv_path)
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return f"{stem}-v{STORE_VERSION}-{ino}-{mtime_ns}-{size}"
+
+
+def _read_meta(path: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_store(csv_path: str, target: str) -> None:
+    """Parse the CSV and write its columns into `target`."""
+    df = pd.read_csv(csv_path)
+    df["date"] = pd.to_datetime(df["date"])
+    df = df.sort_values("date", kind="stable").reset_index(drop=True)
+
+    dates = df["date"].values.astype("datetime64[D]")
+    base_date = dates.min() if len(dates) else np.datetime64("1970-01-01", "D")
+
+    np.save(os.path.join(target, "price.npy"), pd.to_numeric(df["price"], errors="coerce").to_numpy(np.float64))
+    np.save(os.path.join(target, "day.npy"), (dates - base_date).astype(np.int32))
+
+    dictionaries = {}
+    for column in DICTIONARY_COLUMNS:
+        if column in df.columns:
+            codes, uniques = pd.factorize(df[column].astype(str))
+            np.save(os.path.join(target, f"{column}.npy"), codes.astype(np.int32))
+            dictionaries[column] = [str(u) for u in uniques]
+
+    meta = {
+        "version": STORE_VERSION,
+        "source": os.path.abspath(csv_path),
+        "rows": len(df),
+        "base_date": str(base_date),
+        "dictionaries": dictionaries,
+    }
+    with open(os.path.join(target, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+
+def _remove_old_versions(root: str, csv_path: str, keep: str) -> None:
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    for entry in os.scandir(root):
+        if entry.name != keep and entry.name.startswith(f"{stem}-v") and entry.is_dir():
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def build_price_store(csv_path: str) -> str:
+    """Convert csv_path to columnar form if needed. Returns the store directory."""
+    root = _store_root(csv_path)
+    name = _store_name(csv_path)
+    target = os.path.join(root, name)
+    if _read_meta(target) is not None:
+        return target
+
+    os.makedirs(root, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f".{name}-", dir=root)
+    try:
+        _write_store(csv_path, tmp)
+        try:
+            os.rename(tmp, target)
+        except OSError:
+            # Another worker finished the same version first
+            if _read_meta(target) is None:
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    _remove_old_versions(root, csv_path, keep=name)
+    return target
+
+
+@cached(ttl=None, key_prefix="price_store")
+def open_price_table(csv_path: str) -> PriceTable:
+    """Memory-mapped columns for csv_path, building the store on first use."""
+    path = build_price_store(csv_path)
+    return PriceTable(path, _read_meta(path))
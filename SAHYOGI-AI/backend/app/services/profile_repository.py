@@ -0,0 +1,121 @@
+"""
+Read-through repository for farmer profiles (farmer row + soil card).
+
+A profile is fetched in one round-trip by embedding the related
+soil_health rows in the farmers query, then cached by phone for
+PROFILE_CACHE_TTL seconds. Registration and updates must call
+`invalidate_profile` so the next read goes back to Supabase.
+"""
+import os
+import asyncio
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.services.cache import get_cached, set_cached, invalidate_key, invalidate_prefix
+from app.services.supabase_service import get_async_client
+
+PROFILE_TTL = int(os.getenv("PROFILE_CACHE_TTL", "600"))  # 10 minutes
+PROFILE_SELECT = "*, soil_health(*)"
+BATCH_SIZE = 100  # phones per IN query, keeping the request URL short
+
+Profile = Tuple[dict, Optional[dict]]
+
+_inflight: Dict[str, "asyncio.Future"] = {}
+
+
+def _cache_key(phone: str) -> tuple:
+    return ("profile", phone)
+
+
+def _split_profile(row: dict) -> Profile:
+    """Separate the embedded soil_health rows from the farmer row."""
+    farmer = dict(row)
+    soil_rows = farmer.pop("soil_health", None)
+    if isinstance(soil_rows, list):
+        soil = soil_rows[0] if soil_rows else None
+    else:
+        soil = soil_rows
+    return farmer, soil
+
+
+async def _fetch_profile(phone: str) -> Optional[Profile]:
+    client = await get_async_client()
+    response = await (
+        client.table("farmers")
+        .select(PROFILE_SELECT)
+        .eq("phone", phone)
+        .execute()
+    )
+
+    if not response.data:
+        return None
+
+    profile = _split_profile(response.data[0])
+    set_cached(_cache_key(phone), profile, PROFILE_TTL)
+    return profile
+
+
+async def get_profile(phone: str) -> Optional[Profile]:
+    """
+    (farmer, soil) for a phone number, or None if the farmer is unknown.
+    Concurrent misses for the same phone share one query.
+    """
+    profile = get_cached(_cache_key(phone))
+    if profile is not None:
+        return profile
+
+    pending = _inflight.get(phone)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[phone] = future
+    try:
+        profile = await _fetch_profile(phone)
+        future.set_result(profile)
+        return profile
+    except BaseException as e:
+        future.set_exception(e)
+        # Mark retrieved so an unawaited failure is not logged as an error
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(phone, None)
+
+
+async def get_profiles(phones: Iterable[str]) -> Dict[str, Profile]:
+    """
+    Profiles for many phones: cache hits first, then one IN query per
+    BATCH_SIZE missing phones, caching each profile found. Unknown phones
+    are omitted from the result.
+    """
+    profiles: Dict[str, Profile] = {}
+    missing = []
+    for phone in dict.fromkeys(phones):
+        profile = get_cached(_cache_key(phone))
+        if profile is not None:
+            profiles[phone] = profile
+        else:
+            missing.append(phone)
+
+    if missing:
+        client = await get_async_client()
+        for i in range(0, len(missing), BATCH_SIZE):
+            response = await (
+                client.table("farmers")
+                .select(PROFILE_SELECT)
+                .in_("phone", missing[i:i + BATCH_SIZE])
+                .execute()
+            )
+            for row in response.data or []:
+                profile = _split_profile(row)
+                profiles[row["phone"]] = profile
+                set_cached(_cache_key(row["phone"]), profile, PROFILE_TTL)
+
+    return profiles
+
+
+def invalidate_profile(phone: Optional[str] = None) -> int:
+    """Drop one cached profile, or all of them when phone is None."""
+    if phone is None:
+        return invalidate_prefix("profile:")
+    return int(invalidate_key(_cache_key(phone)))
@@ -1,5 +1,7 @@
 import os
-from supabase import create_client, Client
+import asyncio
+from typing import Optional
+from supabase import create_client, acreate_client, Client, AsyncClient
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -36,3 +38,50 @@ def get_soil_by_farmer_id(farmer_id: str):
         return None
 
     return response.data[0]
+
+
+# ─── Async client for non-blocking access from async endpoints ───
+
+_async_client: Optional[AsyncClient] = None
+_async_client_lock = asyncio.Lock()
+
+
+async def get_async_client() -> AsyncClient:
+    """Lazily create the shared async Supabase client."""
+    global _async_client
+    if _async_client is None:
+        async with _async_client_lock:
+            if _async_client is None:
+                _async_client = await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+    return _async_client
+
+
+async def get_farmer_by_phone_async(phone: str):
+    """Async get_farmer_by_phone. Routes needing the soil card too use profile_repository.get_profile."""
+    client = await get_async_client()
+    response = await (
+        client.table("farmers")
+        .select("*")
+        .eq("phone", phone)
+        .execute()
+    )
+
+    if not response.data:
+        return None
+
+    return response.data[0]
+
+
+async def get_soil_by_farmer_id_async(farmer_id: str):
+    client = await get_async_client()
+    response = await (
+        client.table("soil_health")
+        .select("*")
+        .eq("farmer_id", farmer_id)
+        .execute()
+    )
+
+    if not response.data:
+        return None
+
+    return response.data[0]
@@ -1,5 +1,7 @@
+import re
 from datetime import date, timedelta
 from app.core.advice_engine import generate_full_advice
+from app.core.language import SEGMENT_TEMPLATES, format_advice_response, format_advice_segments
 
 
 def test_full_advice():
@@ -24,3 +26,34 @@ def test_full_advice():
     assert "crop_stage" in result
     assert "soil_advice" in result
     assert "market_advice" in result
+
+
+def test_advice_segments_match_narrative():
+    advice = {
+        "crop_stage": "Tillering",
+        "days_since_sowing": 45,
+        "soil_advice": ["Apply Nitrogen fertilizer (e.g., Urea) in recommended quantity."],
+        "market_trend": "rising",
+    }
+
+    def words(text):
+        return re.sub(r"[()।.]", " ", text).split()
+
+    for language in ("en", "hi", "or"):
+        segments = format_advice_segments(advice, language)
+        assert words(" ".join(segments)) == words(format_advice_response(advice, language))
+        assert "45" in segments
+
+
+def test_advice_response_uses_segment_templates(monkeypatch):
+    advice = {
+        "crop_stage": "Tillering",
+        "days_since_sowing": 45,
+        "soil_advice": ["Add compost."],
+        "market_trend": "stable",
+    }
+    templates = dict(SEGMENT_TEMPLATES["en"], soil="Soil tip:")
+    monkeypatch.setitem(SEGMENT_TEMPLATES, "en", templates)
+
+    assert "Soil tip: Add compost." in format_advice_response(advice, "en")
+    assert "Soil tip:" in format_advice_segments(advice, "en")
@@ -0,0 +1,155 @@
+from datetime import datetime, timezone
+
+from app.services.analytics_service import get_analytics_summary, get_call_timeseries, iter_calls, iter_new_calls
+from app.services.call_aggregates import CallCursor
+
+
+class StubResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class StubQuery:
+    """Evaluates the PostgREST filters iter_calls uses against in-memory rows."""
+
+    def __init__(self, client, columns):
+        self.client = client
+        self.columns = columns.split(",")
+        self.filters = []
+        self.limit_n = None
+
+    def gte(self, col, value):
+        self.filters.append(lambda r: r[col] >= value)
+        return self
+
+    def lt(self, col, value):
+        self.filters.append(lambda r: r[col] < value)
+        return self
+
+    def gt(self, col, value):
+        self.filters.append(lambda r: r[col] > value)
+        return self
+
+    def or_(self, expr):
+        # created_at.gt."T",and(created_at.eq."T",id.gt."I")
+        at = expr.split('"')[1]
+        last_id = expr.split('"')[5]
+        self.filters.append(lambda r: r["created_at"] > at or (r["created_at"] == at and r["id"] > last_id))
+        return self
+
+    def order(self, col):
+        return self
+
+    def limit(self, n):
+        self.limit_n = n
+        return self
+
+    def execute(self):
+        self.client.queries.append(self)
+        rows = sorted(self.client.rows, key=lambda r: (r["created_at"], r["id"]))
+        rows = [r for r in rows if all(f(r) for f in self.filters)][:self.limit_n]
+        return StubResponse([{c: r.get(c) for c in self.columns} for r in rows])
+
+
+class StubTable:
+    def __init__(self, client):
+        self.client = client
+
+    def select(self, columns):
+        return StubQuery(self.client, columns)
+
+
+class StubClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def table(self, name):
+        assert name == "calls"
+        return StubTable(self)
+
+
+def _rows():
+    rows = []
+    # Several calls share each timestamp so pages split inside a timestamp
+    for i in range(25):
+        rows.append({
+            "id": f"{i:04d}",
+            "created_at": f"2026-03-{10 + i // 5:02d}T0{i % 2}:00:00+00:00",
+            "language": "hi" if i % 3 else "en",
+            "crop": "wheat",
+            "crop_stage": "Tillering",
+            "market_trend": "rising",
+            "advisory_snapshot": {"large": "x" * 100},
+        })
+    return rows
+
+
+def test_iter_calls_keyset_pages_are_complete_and_projected():
+    client = StubClient(_rows())
+
+    rows = list(iter_calls(["language"], page_size=4, client=client))
+
+    assert sorted(r["id"] for r in rows) == [f"{i:04d}" for i in range(25)]
+    assert all(set(r) == {"language", "id", "created_at"} for r in rows)
+    assert len(client.queries) == 7
+    assert all(q.limit_n == 4 for q in client.queries)
+
+
+def test_iter_new_calls_rereads_the_late_window():
+    rows = sorted(_rows(), key=lambda r: (r["created_at"], r["id"]))
+    client = StubClient(rows[:20])
+    cursor = CallCursor(window=24 * 3600)
+    for row in iter_new_calls(["language"], cursor, page_size=4, client=client):
+        cursor.advance(row)
+
+    late = {**rows[0], "id": "late", "created_at": "2026-03-13T00:30:00+00:00"}
+    client.rows = rows + [late]
+    new = [r["id"] for r in iter_new_calls(["language"], cursor, page_size=4, client=client)]
+
+    assert new == ["late"] + [r["id"] for r in rows[20:]]
+    assert client.queries[-1].filters  # the window starts server-side
+
+
+def test_iter_calls_filters_window_server_side():
+    client = StubClient(_rows())
+    start = datetime(2026, 3, 11, tzinfo=timezone.utc)
+    end = datetime(2026, 3, 13, tzinfo=timezone.utc)
+
+    rows = list(iter_calls(["created_at"], start=start, end=end, page_size=3, client=client))
+
+    assert len(rows) == 10
+    assert all("2026-03-11" <= r["created_at"] < "2026-03-13" for r in rows)
+
+
+def test_windowed_summary():
+    client = StubClient(_rows())
+    summary = get_analytics_summary(
+        datetime(2026, 3, 10, tzinfo=timezone.utc),
+        datetime(2026, 3, 12, tzinfo=timezone.utc),
+        client=client,
+    )
+
+    assert summary["total_calls"] == 10
+    assert summary["calls_today"] == 5
+    assert summary["calls_by_language"] == {"en": 4, "hi": 6}
+
+
+def test_timeseries_zero_fills_buckets():
+    client = StubClient(_rows())
+
+    daily = get_call_timeseries(
+        datetime(2026, 3, 9, tzinfo=timezone.utc),
+        datetime(2026, 3, 16, tzinfo=timezone.utc),
+        client=client,
+    )
+    assert [p["calls"] for p in daily] == [0, 5, 5, 5, 5, 5, 0]
+
+    hourly = get_call_timeseries(
+        datetime(2026, 3, 10, tzinfo=timezone.utc),
+        datetime(2026, 3, 10, 3, tzinfo=timezone.utc),
+        bucket="hour",
+        client=client,
+    )
+    assert [p["calls"] for p in hourly] == [3, 2, 0]
+    assert hourly[1]["bucket_start"] == "2026-03-10T01:00:00+00:00"
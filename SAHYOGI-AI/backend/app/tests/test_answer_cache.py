@@ -0,0 +1,65 @@
+import time
+
+from app.ai.answer_cache import AnswerCache, answer_bucket, is_personal, normalize_question
+
+ADVICE = {"crop_stage": "Tillering", "soil_advice": ["Apply Nitrogen fertilizer (e.g., Urea)."]}
+
+
+def test_near_duplicate_questions_share_an_answer():
+    cache = AnswerCache()
+    bucket = answer_bucket("How to apply for PM-KISAN?", "en", "Wheat", ADVICE)
+    cache.store("How to apply for PM-KISAN?", bucket, "Apply at pmkisan.gov.in")
+
+    assert cache.lookup("how can I apply for pm kisan", bucket) == "Apply at pmkisan.gov.in"
+    assert cache.lookup("How do I control aphids?", bucket) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_buckets_separate_language_crop_and_stage():
+    cache = AnswerCache()
+    question = "How to control aphids?"
+    cache.store(question, answer_bucket(question, "en", "wheat", ADVICE), "Spray Imidacloprid")
+
+    assert cache.lookup(question, answer_bucket(question, "hi", "wheat", ADVICE)) is None
+    assert cache.lookup(question, answer_bucket(question, "en", "wheat", {**ADVICE, "crop_stage": "Flowering"})) is None
+    assert cache.lookup(question, answer_bucket(question, "en", "Wheat", ADVICE)) == "Spray Imidacloprid"
+
+
+def test_fertilizer_questions_also_keyed_on_soil_advice():
+    question = "How much urea should I apply?"
+    other_soil = {**ADVICE, "soil_advice": ["Nitrogen levels are sufficient."]}
+
+    assert answer_bucket(question, "en", "wheat", ADVICE) != answer_bucket(question, "en", "wheat", other_soil)
+    assert answer_bucket("Tell me about PM Kisan", "en", "wheat", ADVICE) == \
+        answer_bucket("Tell me about PM Kisan", "en", "wheat", other_soil)
+
+
+def test_price_questions_bypass_the_cache():
+    cache = AnswerCache()
+
+    assert is_personal("Should I sell now?")
+    assert is_personal("गेहूं का भाव क्या है?")
+    assert not is_personal("What is the minimum support price of wheat?")
+    assert answer_bucket("What price will I get next week?", "en", "wheat", ADVICE) is None
+    assert cache.lookup("What price will I get next week?", None) is None
+    assert cache.stats()["bypassed"] == 1
+
+
+def test_normalization_handles_indic_scripts():
+    assert normalize_question("पीएम किसान के लिए आवेदन कैसे करें?") == normalize_question("पीएम किसान लिए आवेदन करें।")
+
+
+def test_ttl_and_lru_eviction():
+    cache = AnswerCache(ttl=0.05, max_entries=2)
+    bucket = ("en", "wheat", "Tillering")
+    cache.store("How to control aphids?", bucket, "a")
+    cache.store("When to irrigate wheat?", bucket, "b")
+    cache.store("How to store grain?", bucket, "c")
+
+    assert cache.stats()["evictions"] == 1
+    assert cache.lookup("How to control aphids?", bucket) is None
+    assert cache.lookup("How to store grain?", bucket) == "c"
+
+    time.sleep(0.06)
+    assert cache.lookup("How to store grain?", bucket) is None
+    assert cache.stats()["expired"] == 1
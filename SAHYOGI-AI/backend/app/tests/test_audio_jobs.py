@@ -0,0 +1,59 @@
+import asyncio
+import threading
+
+from app.services import audio_jobs
+
+
+def test_job_reports_audio_url_when_ready():
+    release = threading.Event()
+
+    def render(text):
+        release.wait(5)
+        return f"/tmp/audio/{text}.mp3"
+
+    job = audio_jobs.submit_audio_job(render, "abc")
+    assert job["status"] in ("queued", "running")
+    assert job["audio_url"] is None
+    assert job["status_url"] == f"/api/v1/audio/jobs/{job['job_id']}"
+
+    release.set()
+    done = asyncio.run(audio_jobs.wait_for_audio_job(job["job_id"], 5))
+
+    assert done["status"] == "ready"
+    assert done["audio_url"] == "/api/v1/audio/abc.mp3"
+
+
+def test_failed_render_marks_job_failed():
+    def render():
+        raise RuntimeError("tts down")
+
+    job = audio_jobs.submit_audio_job(render)
+    done = asyncio.run(audio_jobs.wait_for_audio_job(job["job_id"], 5))
+
+    assert done["status"] == "failed"
+    assert done["error"] == "tts down"
+    assert done["audio_url"] is None
+
+
+def test_unknown_job_is_none():
+    assert asyncio.run(audio_jobs.wait_for_audio_job("missing", 0.1)) is None
+
+
+def test_chat_renders_do_not_hold_up_call_audio():
+    release = threading.Event()
+
+    def render_sentence():
+        release.wait(5)
+        return None
+
+    chat_jobs = [
+        audio_jobs.submit_audio_job(render_sentence, pool="chat")
+        for _ in range(audio_jobs.CHAT_AUDIO_WORKERS + 3)
+    ]
+
+    call_job = audio_jobs.submit_audio_job(lambda: "/tmp/audio/call.mp3")
+    done = asyncio.run(audio_jobs.wait_for_audio_job(call_job["job_id"], 2))
+
+    assert done["status"] == "ready"
+    assert audio_jobs.job_status(chat_jobs[-1]["job_id"])["status"] == "queued"
+    release.set()
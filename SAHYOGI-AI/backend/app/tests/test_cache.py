@@ -0,0 +1,195 @@
+import threading
+import time
+
+from app.services import cache
+
+
+def setup_function():
+    cache.clear_cache()
+    cache.reset_cache_stats()
+    cache.configure_cache(max_entries=1024, max_bytes=256 * 1024 * 1024)
+
+
+def test_lru_eviction_by_entry_count():
+    cache.configure_cache(max_entries=2)
+    cache.set_cached("a", 1)
+    cache.set_cached("b", 2)
+    cache.get_cached("a")          # "b" is now least recently used
+    cache.set_cached("c", 3)
+
+    assert cache.get_cached("b") is None
+    assert cache.get_cached("a") == 1
+    assert cache.cache_stats()["evictions"] == 1
+
+
+def test_eviction_by_bytes():
+    cache.configure_cache(max_bytes=10_000)
+    cache.set_cached("big1", "x" * 6_000)
+    cache.set_cached("big2", "y" * 6_000)
+
+    assert cache.get_cached("big1") is None
+    assert cache.cache_stats()["bytes"] <= 10_000
+
+
+def test_ttl_expiry():
+    cache.set_cached("k", "v", ttl=0)
+    time.sleep(0.01)
+
+    assert cache.get_cached("k") is None
+    assert cache.cache_stats()["expirations"] == 1
+
+
+def test_concurrent_misses_compute_once():
+    calls = []
+
+    @cache.cached(ttl=60, key_prefix="test")
+    def slow(x):
+        calls.append(x)
+        time.sleep(0.05)
+        return x * 2
+
+    threads = [threading.Thread(target=slow, args=(21,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == [21]
+    assert slow(21) == 42
+
+
+def test_waiters_share_leader_exception():
+    calls = []
+
+    @cache.cached(ttl=60, key_prefix="test")
+    def failing():
+        calls.append(1)
+        time.sleep(0.05)
+        raise ValueError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            failing()
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(errors) == 5
+
+
+def test_stale_while_revalidate():
+    counter = {"n": 0}
+
+    @cache.cached(ttl=0, key_prefix="test", stale_ttl=60)
+    def version():
+        counter["n"] += 1
+        return counter["n"]
+
+    assert version() == 1
+    time.sleep(0.01)
+    assert version() == 1          # stale value served, refresh started
+    for _ in range(100):
+        if counter["n"] == 2:
+            break
+        time.sleep(0.01)
+    assert counter["n"] == 2
+    assert cache.cache_stats()["stale_served"] >= 1
+
+
+def test_keys_distinguish_objects_with_same_repr(tmp_path):
+    calls = []
+
+    @cache.cached(ttl=60, key_prefix="test")
+    def identity(x):
+        calls.append(x)
+        return x
+
+    identity(1)
+    identity("1")
+    identity((1,))
+    identity([1])
+
+    assert len(calls) == 4
+
+
+def test_csv_path_key_follows_file_contents(tmp_path):
+    csv = tmp_path / "prices.csv"
+    csv.write_text("date,price\n2026-01-01,2100\n")
+
+    @cache.cached(ttl=60, key_prefix="test")
+    def read(path):
+        return open(path).read()
+
+    first = read(str(csv))
+    csv.write_text("date,price\n2026-01-01,2100\n2026-01-02,2110\n")
+
+    assert read(str(csv)) != first
+
+
+def test_array_arguments_require_opt_in():
+    import numpy as np
+
+    calls = []
+
+    @cache.cached(ttl=60, key_prefix="test")
+    def plain(arr):
+        calls.append(1)
+        return float(arr.sum())
+
+    @cache.cached(ttl=60, key_prefix="test", hash_arrays=True)
+    def hashed(arr):
+        calls.append(2)
+        return float(arr.sum())
+
+    arr = np.arange(10.0)
+    plain(arr)
+    plain(arr)
+    hashed(arr)
+    hashed(arr.copy())
+    hashed(arr + 1)
+
+    assert calls == [1, 1, 2, 2]
+    assert cache.cache_stats()["uncacheable"] == 2
+
+
+def test_invalidate_file_drops_derived_entries(tmp_path):
+    csv = tmp_path / "prices.csv"
+    csv.write_text("date,price\n2026-01-01,2100\n")
+
+    @cache.cached(ttl=None, key_prefix="test")
+    def derived(n):
+        return n * 2
+
+    @cache.cached(ttl=None, key_prefix="test")
+    def load(path):
+        return derived(len(open(path).read()))
+
+    load(str(csv))
+    assert cache.cache_stats()["entries"] == 2
+
+    assert cache.invalidate_file(str(csv)) == 2
+    assert cache.cache_stats()["entries"] == 0
+
+
+def test_file_watcher_reports_changes(tmp_path):
+    from app.services.file_watcher import FileWatcher
+
+    csv = tmp_path / "prices.csv"
+    csv.write_text("date,price\n")
+    changed = []
+    watcher = FileWatcher(str(tmp_path), on_change=changed.append)
+
+    assert watcher.scan() == []
+    csv.write_text("date,price\n2026-01-01,2100\n")
+    (tmp_path / "new.csv").write_text("date,price\n")
+
+    assert sorted(watcher.scan()) == sorted([str(csv), str(tmp_path / "new.csv")])
+    assert len(changed) == 2
@@ -0,0 +1,210 @@
+import threading
+from datetime import datetime, timezone
+
+from app.services import call_aggregates
+from app.services.call_aggregates import CallAggregates
+
+NOW = datetime(2026, 3, 15, 12, 0, tzinfo=timezone.utc)
+
+
+def _call(created_at, language="hi", crop="wheat", stage="Tillering", trend="rising"):
+    return {
+        "language": language,
+        "crop": crop,
+        "crop_stage": stage,
+        "market_trend": trend,
+        "created_at": created_at,
+    }
+
+
+def test_summary_counts_and_windows():
+    agg = CallAggregates()
+    agg.record_many([
+        _call("2026-03-15T09:10:00+00:00"),
+        _call("2026-03-15T09:40:00Z", language="en"),
+        _call("2026-03-10T18:00:00+00:00", trend="falling"),
+        _call("2026-02-20T09:00:00+00:00", crop="rice"),
+        _call("2025-12-01T09:00:00+00:00"),
+    ])
+
+    summary = agg.summary(now=NOW)
+
+    assert summary["total_calls"] == 5
+    assert summary["calls_today"] == 2
+    assert summary["calls_this_week"] == 3
+    assert summary["calls_this_month"] == 4
+    assert summary["peak_call_hour"] == 9
+    assert summary["calls_by_language"] == {"hi": 4, "en": 1}
+    assert summary["calls_by_crop"] == {"wheat": 4, "rice": 1}
+    assert summary["market_trend_distribution"] == {"rising": 4, "falling": 1}
+
+
+def test_compaction_keeps_all_time_counters():
+    agg = CallAggregates(retention_days=35)
+    agg.record(_call("2025-12-01T09:00:00+00:00"))
+    agg.record(_call("2026-03-15T10:00:00+00:00"))
+
+    assert agg.compact(now=NOW) == 1
+    summary = agg.summary(now=NOW)
+    assert summary["total_calls"] == 2
+    assert summary["calls_this_month"] == 1
+    assert summary["calls_by_crop"] == {"wheat": 2}
+
+
+def test_week_and_month_are_rolling_windows():
+    agg = CallAggregates()
+    agg.record_many([
+        _call("2026-03-08T13:00:00+00:00"),   # 6 days 23 h ago
+        _call("2026-03-08T11:00:00+00:00"),   # 7 days 1 h ago
+        _call("2026-02-13T12:30:00+00:00"),   # just inside 30 × 24 h
+        _call("2026-02-13T10:00:00+00:00"),
+    ])
+
+    summary = agg.summary(now=NOW)
+
+    assert summary["calls_today"] == 0
+    assert summary["calls_this_week"] == 1
+    assert summary["calls_this_month"] == 3
+
+
+def _row(i, created_at, **fields):
+    return {"id": i, **_call(created_at, **fields)}
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "aggregates.json")
+    agg = CallAggregates()
+    agg.catch_up([
+        _row(1, "2026-03-15T09:10:00+00:00"),
+        {"id": 2, "created_at": "2026-03-15T11:00:00+00:00"},   # missing fields
+    ])
+    agg.save(path)
+
+    loaded = CallAggregates.load(path)
+    assert loaded.summary(now=NOW) == agg.summary(now=NOW)
+    assert loaded.cursor.latest == "2026-03-15T11:00:00+00:00"
+    assert loaded.cursor.seen == {"2": "2026-03-15T11:00:00+00:00"}  # 1 is outside the late window
+
+
+def _reset(monkeypatch, live=None):
+    monkeypatch.setattr(call_aggregates, "_aggregates", live or CallAggregates())
+    monkeypatch.setattr(call_aggregates, "_ready", call_aggregates.threading.Event())
+    monkeypatch.setattr(call_aggregates, "_last_refresh", 0.0)
+
+
+def test_bootstrap_catches_up_from_cursor(tmp_path, monkeypatch):
+    path = str(tmp_path / "aggregates.json")
+    snapshot = CallAggregates()
+    snapshot.catch_up([_row("a", "2026-03-14T09:00:00+00:00")])
+    snapshot.save(path)
+
+    seen = []
+
+    def fetch(cursor):
+        seen.append(cursor.latest)
+        return [_row("b", "2026-03-15T09:00:00+00:00")]
+
+    _reset(monkeypatch)
+    live = call_aggregates.bootstrap_aggregates(path, fetch=fetch)
+
+    assert seen == ["2026-03-14T09:00:00+00:00"]
+    assert live.summary(now=NOW)["total_calls"] == 2
+    assert live.cursor.latest == "2026-03-15T09:00:00+00:00"
+    assert call_aggregates.get_aggregates() is live
+    assert call_aggregates.aggregates_ready()
+
+
+def _fetch_from(table):
+    """fetch() over in-memory rows, filtered like iter_new_calls."""
+    def fetch(cursor):
+        since = cursor.since()
+        rows = sorted(table, key=lambda r: (r["created_at"], r["id"]))
+        return [
+            r for r in rows
+            if (since is None or call_aggregates.parse_timestamp(r["created_at"]) >= since) and cursor.is_new(r)
+        ]
+    return fetch
+
+
+def test_refresh_reads_rows_logged_by_any_worker(tmp_path, monkeypatch):
+    # Two rows share a timestamp; the cursor still reads the second
+    table = [_row("a", "2026-03-15T09:00:00+00:00")]
+    fetch = _fetch_from(table)
+
+    _reset(monkeypatch)
+    call_aggregates.bootstrap_aggregates(str(tmp_path / "a.json"), fetch=fetch)
+
+    table += [_row("b", "2026-03-15T09:00:00+00:00", language="en"), _row("c", "2026-03-15T10:00:00+00:00")]
+    assert call_aggregates.refresh_aggregates(fetch=fetch, max_age=60) == 0   # too soon
+    assert call_aggregates.refresh_aggregates(fetch=fetch, max_age=0) == 2
+    assert call_aggregates.refresh_aggregates(fetch=fetch, max_age=0) == 0
+
+    summary = call_aggregates.get_aggregates().summary(now=NOW)
+    assert summary["total_calls"] == 3
+    assert summary["calls_by_language"] == {"hi": 2, "en": 1}
+
+
+def test_refresh_counts_rows_inserted_late(tmp_path, monkeypatch):
+    table = [_row("a", "2026-03-15T09:00:00+00:00"), _row("b", "2026-03-15T10:00:00+00:00")]
+    fetch = _fetch_from(table)
+    _reset(monkeypatch)
+    call_aggregates.bootstrap_aggregates(str(tmp_path / "a.json"), fetch=fetch)
+
+    # Stamped before the newest row read, inserted after (batched or replayed from the spill file)
+    table.append(_row("late", "2026-03-15T09:30:00+00:00", language="en"))
+    # Too late to be read: older than the cursor's window
+    table.append(_row("lost", "2026-03-15T08:00:00+00:00"))
+
+    assert call_aggregates.refresh_aggregates(fetch=fetch, max_age=0) == 1
+    assert call_aggregates.refresh_aggregates(fetch=fetch, max_age=0) == 0
+    summary = call_aggregates.get_aggregates().summary(now=NOW)
+    assert summary["total_calls"] == 3
+    assert summary["calls_by_language"] == {"hi": 2, "en": 1}
+
+
+def test_cursor_forgets_ids_outside_its_window():
+    cursor = call_aggregates.CallCursor(window=3600)
+    for row in [_row(1, "2026-03-15T08:00:00+00:00"), _row(2, "2026-03-15T09:30:00+00:00")]:
+        cursor.advance(row)
+    cursor.prune()
+
+    assert cursor.since() == datetime(2026, 3, 15, 8, 30, tzinfo=timezone.utc)
+    assert cursor.seen == {"2": "2026-03-15T09:30:00+00:00"}
+    assert not cursor.is_new({"id": 2}) and cursor.is_new({"id": 3})
+
+
+def test_failed_catch_up_keeps_live_counters(tmp_path, monkeypatch):
+    live = CallAggregates()
+    live.record(_call("2026-03-15T09:00:00+00:00"))
+    _reset(monkeypatch, live)
+
+    def fetch(cursor):
+        raise ConnectionError("database unavailable")
+
+    assert call_aggregates.bootstrap_aggregates(str(tmp_path / "a.json"), fetch=fetch) is None
+    assert call_aggregates.get_aggregates() is live
+    assert not call_aggregates.aggregates_ready()
+
+
+def test_ensure_aggregates_bootstraps_in_the_background(tmp_path, monkeypatch):
+    _reset(monkeypatch)
+    monkeypatch.setattr(call_aggregates, "SNAPSHOT_PATH", str(tmp_path / "a.json"))
+    monkeypatch.setattr(call_aggregates, "_bootstrapper", None)
+    monkeypatch.setattr(call_aggregates, "_last_bootstrap", 0.0)
+    release = threading.Event()
+
+    def slow_fetch(cursor):
+        release.wait(5)
+        return [_row("a", "2026-03-15T09:00:00+00:00")]
+
+    monkeypatch.setattr(call_aggregates, "_fetch_calls_after", slow_fetch)
+
+    # Returns at once while the catch-up is still reading
+    assert call_aggregates.ensure_aggregates().summary(now=NOW)["total_calls"] == 0
+    assert not call_aggregates.aggregates_ready()
+    call_aggregates.ensure_aggregates()  # no second bootstrap while one runs
+
+    release.set()
+    call_aggregates._bootstrapper.join(5)
+    assert call_aggregates.aggregates_ready()
+    assert call_aggregates.get_aggregates().summary(now=NOW)["total_calls"] == 1
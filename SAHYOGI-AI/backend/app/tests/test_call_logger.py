@@ -0,0 +1,195 @@
+import json
+import threading
+import time
+
+from app.services.call_logger import CallLogPipeline, _file_lock
+
+
+class StubTable:
+    def __init__(self, client):
+        self.client = client
+        self.rows = None
+
+    def insert(self, rows):
+        self.rows = rows
+        return self
+
+    def execute(self):
+        if self.client.fail or self.client.fail_after == len(self.client.batches):
+            raise ConnectionError("database unavailable")
+        if any(row["phone"] in self.client.reject for row in self.rows):
+            raise RejectedRow("null value in column violates not-null constraint")
+        with self.client.lock:
+            self.client.batches.append(list(self.rows))
+
+
+class RejectedRow(Exception):
+    code = "23502"  # not_null_violation, as raised by postgrest's APIError
+
+
+class StubClient:
+    """Minimal stand-in for the Supabase client's table().insert().execute() chain."""
+
+    def __init__(self, fail=False, reject=(), fail_after=None):
+        self.fail = fail
+        self.reject = set(reject)
+        self.fail_after = fail_after  # outage after this many batches
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def table(self, name):
+        assert name == "calls"
+        return StubTable(self)
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+def _record(i):
+    return {"phone": str(i), "crop": "wheat"}
+
+
+def test_flushes_in_batches(tmp_path):
+    client = StubClient()
+    pipeline = CallLogPipeline(client=client, batch_size=10, flush_interval=5, spill_path=str(tmp_path / "calls.jsonl"))
+    for i in range(25):
+        pipeline.enqueue(_record(i))
+
+    assert pipeline.flush() == 25
+    assert [len(b) for b in client.batches] == [10, 10, 5]
+    assert [r["phone"] for r in client.rows] == [str(i) for i in range(25)]
+
+
+def test_worker_flushes_by_interval_and_drains_on_stop(tmp_path):
+    client = StubClient()
+    pipeline = CallLogPipeline(client=client, batch_size=100, flush_interval=0.05, spill_path=str(tmp_path / "calls.jsonl")).start()
+    pipeline.enqueue(_record(1))
+
+    deadline = time.time() + 2
+    while not client.rows and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(client.rows) == 1
+
+    pipeline.enqueue(_record(2))
+    pipeline.stop()
+    assert len(client.rows) == 2
+    assert pipeline.stats()["inserted"] == 2
+
+
+def test_failed_batches_spill_and_replay(tmp_path):
+    spill = tmp_path / "calls.jsonl"
+    client = StubClient(fail=True)
+    pipeline = CallLogPipeline(client=client, batch_size=2, spill_path=str(spill))
+    for i in range(3):
+        pipeline.enqueue(_record(i))
+    pipeline.flush()
+
+    assert client.rows == []
+    assert [json.loads(line)["phone"] for line in spill.read_text().splitlines()] == ["0", "1", "2"]
+    assert pipeline.stats()["spilled"] == 3
+
+    # Database back: a fresh pipeline replays the spill file on startup
+    client.fail = False
+    restarted = CallLogPipeline(client=client, batch_size=2, spill_path=str(spill)).start()
+    restarted.stop()
+
+    assert [r["phone"] for r in client.rows] == ["0", "1", "2"]
+    assert not restarted.spill_pending()
+    assert restarted.stats()["replayed"] == 3
+
+
+def test_replay_keeps_records_that_still_fail(tmp_path):
+    spill = tmp_path / "calls.jsonl"
+    client = StubClient(fail=True)
+    pipeline = CallLogPipeline(client=client, spill_path=str(spill))
+    pipeline.enqueue(_record(1))
+    pipeline.flush()
+
+    assert pipeline.replay_spill() == 0
+    assert pipeline.spill_pending()
+    assert len(spill.read_text().splitlines()) == 1
+
+
+def test_full_queue_overflows_to_spill(tmp_path):
+    spill = tmp_path / "calls.jsonl"
+    pipeline = CallLogPipeline(client=StubClient(), max_queue=2, spill_path=str(spill))
+
+    assert pipeline.enqueue(_record(1))
+    assert pipeline.enqueue(_record(2))
+    assert not pipeline.enqueue(_record(3))
+
+    stats = pipeline.stats()
+    assert stats["overflowed"] == 1
+    assert stats["queue_depth"] == 2
+    assert stats["queue_high_watermark"] == 2
+    assert json.loads(spill.read_text())["phone"] == "3"
+
+
+def test_rejected_rows_are_dead_lettered_without_blocking_the_batch(tmp_path):
+    spill = tmp_path / "calls.jsonl"
+    client = StubClient(reject={"1"})
+    pipeline = CallLogPipeline(client=client, batch_size=3, spill_path=str(spill))
+    for i in range(3):
+        pipeline.enqueue(_record(i))
+    pipeline.flush()
+
+    assert [r["phone"] for r in client.rows] == ["0", "2"]
+    assert not pipeline.spill_pending()
+    dead = [json.loads(line) for line in (tmp_path / "calls.dead.jsonl").read_text().splitlines()]
+    assert [d["record"]["phone"] for d in dead] == ["1"]
+    assert "not-null" in dead[0]["error"]
+    assert pipeline.stats()["dead_lettered"] == 1
+
+
+def test_replay_streams_batches_and_requeues_rest_on_outage(tmp_path):
+    spill = tmp_path / "calls.jsonl"
+    spill.write_text("".join(json.dumps(_record(i)) + "\n" for i in range(7)))
+    client = StubClient(fail_after=2)
+    pipeline = CallLogPipeline(client=client, batch_size=2, spill_path=str(spill))
+
+    assert pipeline.replay_spill() == 4
+    assert [r["phone"] for r in client.rows] == ["0", "1", "2", "3"]
+    assert [json.loads(line)["phone"] for line in spill.read_text().splitlines()] == ["4", "5", "6"]
+    assert not (tmp_path / "calls.jsonl.replay").exists()
+
+
+def test_replay_skipped_while_another_process_replays(tmp_path):
+    spill = tmp_path / "calls.jsonl"
+    spill.write_text(json.dumps(_record(1)) + "\n")
+    client = StubClient()
+    pipeline = CallLogPipeline(client=client, spill_path=str(spill))
+
+    with _file_lock(str(spill) + ".replay.lock") as held:
+        assert held
+        assert pipeline.replay_spill() == 0
+    assert pipeline.spill_pending()
+
+    assert pipeline.replay_spill() == 1
+    assert [r["phone"] for r in client.rows] == ["1"]
+
+
+def test_failed_periodic_replay_keeps_worker_running(tmp_path):
+    spill = tmp_path / "calls.jsonl"
+    spill.write_text(json.dumps(_record(1)) + "\n")
+    client = StubClient()
+    pipeline = CallLogPipeline(client=client, flush_interval=0.02, replay_interval=0, spill_path=str(spill))
+
+    calls = []
+
+    def flaky_replay():
+        calls.append(1)
+        if len(calls) == 1:
+            raise FileNotFoundError("replay file claimed by another worker")
+        return CallLogPipeline.replay_spill(pipeline)
+
+    pipeline.replay_spill = flaky_replay
+    pipeline.start(replay=False)
+
+    deadline = time.time() + 2
+    while not client.rows and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert pipeline.running
+    assert [r["phone"] for r in client.rows] == ["1"]
+    pipeline.stop()
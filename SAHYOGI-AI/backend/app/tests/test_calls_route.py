@@ -0,0 +1,76 @@
+import os
+
+# The routers import the Supabase client, which is built at import time
+os.environ.setdefault("SUPABASE_URL", "https://test.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.test")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.ai import tts  # noqa: E402
+from app.api.v1 import calls  # noqa: E402
+from app.tests.test_tts_cache import _setup  # noqa: E402
+
+FARMER = {"id": "f1", "name": "Ram", "phone": "9999999999", "crop": "wheat", "sowing_date": "2026-01-01", "language": "en"}
+SOIL = {"nitrogen": "low", "phosphorus": "medium", "potassium": "medium", "ph": 6.5}
+
+
+def _simulate_call(monkeypatch, enhanced=None):
+    logged, queued = [], []
+
+    async def fake_get_profile(phone):
+        return FARMER, SOIL
+
+    def fake_submit(render, *args, **kwargs):
+        # Not run here: the audio pool could be backed up or shutting down
+        queued.append(render)
+        return {"job_id": "j1", "status": "queued", "audio_url": None, "error": None,
+                "status_url": "/api/v1/audio/jobs/j1"}
+
+    monkeypatch.setattr(calls, "get_profile", fake_get_profile)
+    monkeypatch.setattr(calls, "enhance_advisory", lambda *a, **k: enhanced)
+    monkeypatch.setattr(calls, "submit_audio_job", fake_submit)
+    monkeypatch.setattr(calls, "log_call", lambda **record: logged.append(record))
+
+    app = FastAPI()
+    app.include_router(calls.router, prefix="/api/v1/calls")
+    response = TestClient(app).post("/api/v1/calls/", json={"phone": "9999999999"})
+    assert response.status_code == 200
+    return logged, queued
+
+
+def test_call_is_logged_before_its_audio_renders(monkeypatch, tmp_path):
+    _setup(monkeypatch, tmp_path, [])
+
+    logged, queued = _simulate_call(monkeypatch)
+
+    assert len(queued) == 1
+    assert len(logged) == 1
+    assert logged[0]["phone"] == "9999999999"
+    # The stored URL names the content-addressed file the job will render
+    url = logged[0]["audio_path"]
+    assert url.startswith("/api/v1/audio/") and not (tmp_path / url.rsplit("/", 1)[1]).exists()
+    assert calls.audio_url_for(queued[0]()) == url
+    assert (tmp_path / url.rsplit("/", 1)[1]).exists()
+
+
+def test_logged_audio_url_survives_a_stitching_fallback(monkeypatch, tmp_path):
+    _setup(monkeypatch, tmp_path, [])
+
+    logged, queued = _simulate_call(monkeypatch)
+    monkeypatch.setattr(calls, "generate_segmented_audio", lambda segments, language: None)
+
+    assert calls.audio_url_for(queued[0]()) == logged[0]["audio_path"]
+    assert (tmp_path / logged[0]["audio_path"].rsplit("/", 1)[1]).exists()
+
+
+def test_enhanced_narrative_is_planned_as_full_text(monkeypatch, tmp_path):
+    calls_made = []
+    _setup(monkeypatch, tmp_path, calls_made)
+
+    logged, queued = _simulate_call(monkeypatch, enhanced="Sell half your wheat this week.")
+    queued[0]()
+
+    assert calls_made == ["Sell half your wheat this week."]
+    assert logged[0]["audio_path"] == calls.audio_url_for(tts.planned_audio_path("Sell half your wheat this week.", "en"))
@@ -0,0 +1,53 @@
+import asyncio
+import os
+
+# The routers import the Supabase client, which is built at import time
+os.environ.setdefault("SUPABASE_URL", "https://test.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.test")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from app.ai.answer_cache import AnswerCache  # noqa: E402
+from app.ai.prompts import build_chat_prompt  # noqa: E402
+from app.api.v1 import chat  # noqa: E402
+
+FARMER = {"id": "f1", "name": "Ram", "phone": "9999999999", "crop": "wheat", "district": "Sambalpur",
+          "sowing_date": "2026-01-01", "language": "en"}
+ADVICE = {
+    "crop_stage": "Tillering",
+    "days_since_sowing": 31,
+    "soil_advice": ["Apply Nitrogen fertilizer (e.g., Urea)."],
+    "market_trend": "rising",
+    "market_advice": "Hold for 7 days",
+}
+
+
+def _prepare(monkeypatch, question, projection):
+    async def fake_get_profile(phone):
+        return FARMER, None
+
+    monkeypatch.setattr(chat, "get_profile", fake_get_profile)
+    monkeypatch.setattr(chat, "generate_full_advice", lambda **kwargs: ADVICE)
+    monkeypatch.setattr(chat, "generate_market_projection", projection)
+    monkeypatch.setattr(chat, "answer_cache", AnswerCache())
+    return asyncio.run(chat.prepare_chat(chat.ChatRequest(phone=FARMER["phone"], question=question)))
+
+
+def test_shared_answer_prompt_has_only_bucket_inputs(monkeypatch):
+    def no_projection(path):
+        raise AssertionError("live market data requested")
+
+    prepared = _prepare(monkeypatch, "How much urea should I apply?", no_projection)
+
+    assert prepared["bucket"] is not None
+    prompt = build_chat_prompt(**prepared["context"])
+    for private in ("Ram", "Sambalpur", "2026-01-01", "Days Since Sowing", "rising", "Hold for 7 days", "₹"):
+        assert private not in prompt
+    assert "Tillering" in prompt and "Urea" in prompt
+
+
+def test_personal_question_keeps_the_full_context(monkeypatch):
+    prepared = _prepare(monkeypatch, "Should I sell my wheat now?", lambda path: {"current_price": 2400})
+
+    assert prepared["bucket"] is None
+    prompt = build_chat_prompt(**prepared["context"])
+    assert "Ram" in prompt and "Sambalpur" in prompt and "₹2400" in prompt and "Hold for 7 days" in prompt
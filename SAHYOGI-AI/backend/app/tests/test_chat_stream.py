@@ -0,0 +1,84 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key")  # gemini_chat builds its client at import
+
+from app.ai import gemini_chat, prompts  # noqa: E402
+
+ADVICE = {
+    "crop_stage": "Tillering",
+    "days_since_sowing": 30,
+    "soil_advice": ["Apply urea"],
+    "market_trend": "rising",
+    "market_advice": "Hold",
+}
+
+
+class FakeStreamingModels:
+    def __init__(self, pieces, fail_cached_after=None):
+        self.pieces = pieces
+        self.fail_cached_after = fail_cached_after
+        self.requests = []
+
+    def generate_content_stream(self, model, contents, config=None):
+        self.requests.append((contents, config))
+        for i, piece in enumerate(self.pieces):
+            if config is not None and self.fail_cached_after == i:
+                raise RuntimeError("cached content not found")
+            usage = SimpleNamespace(prompt_token_count=len(contents) // 4, cached_content_token_count=None)
+            yield SimpleNamespace(text=piece, usage_metadata=usage if i == len(self.pieces) - 1 else None)
+
+
+class FakeCaches:
+    def create(self, model, config):
+        return SimpleNamespace(name="cachedContents/1")
+
+
+def install(monkeypatch, models, cache_enabled=True):
+    monkeypatch.setattr(gemini_chat, "client", SimpleNamespace(models=models, caches=FakeCaches()))
+    monkeypatch.setattr(gemini_chat, "knowledge_cache", gemini_chat.KnowledgeContextCache())
+    monkeypatch.setattr(gemini_chat, "CONTEXT_CACHE_ENABLED", cache_enabled)
+
+
+def test_stream_yields_cleaned_pieces_and_records_once(monkeypatch):
+    models = FakeStreamingModels(["**Apply** urea. ", "Irrigate ", "now."])
+    install(monkeypatch, models)
+    before = prompts.prompt_stats()["modes"].get("cached", 0)
+
+    pieces = list(gemini_chat.stream_chat_with_context(ADVICE, "How much urea?"))
+
+    assert pieces == ["Apply urea. ", "Irrigate ", "now."]
+    assert len(models.requests) == 1
+    assert models.requests[0][1].cached_content == "cachedContents/1"
+    assert prompts.prompt_stats()["modes"]["cached"] == before + 1
+
+
+def test_stream_falls_back_inline_before_first_piece(monkeypatch):
+    models = FakeStreamingModels(["Answer."], fail_cached_after=0)
+    install(monkeypatch, models)
+
+    assert list(gemini_chat.stream_chat_with_context(ADVICE, "How much urea?")) == ["Answer."]
+    # Second request is the inline prompt, carrying the knowledge itself
+    assert [config for _, config in models.requests] == [models.requests[0][1], None]
+    assert "SAHYOGI" in models.requests[1][0]
+
+
+def test_stream_does_not_restart_after_partial_answer(monkeypatch):
+    models = FakeStreamingModels(["First. ", "Second."], fail_cached_after=1)
+    install(monkeypatch, models)
+
+    stream = gemini_chat.stream_chat_with_context(ADVICE, "How much urea?")
+    assert next(stream) == "First. "
+    with pytest.raises(RuntimeError):
+        next(stream)
+    assert len(models.requests) == 1
+
+
+def test_stream_without_context_cache_inlines_knowledge(monkeypatch):
+    models = FakeStreamingModels(["Answer."])
+    install(monkeypatch, models, cache_enabled=False)
+
+    assert "".join(gemini_chat.stream_chat_with_context(ADVICE, "When to irrigate wheat?")) == "Answer."
+    assert models.requests[0][1] is None
@@ -0,0 +1,78 @@
+import os
+import time
+import asyncio
+import threading
+
+# The routers import the Supabase client, which is built at import time
+os.environ.setdefault("SUPABASE_URL", "https://test.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.test")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.api.v1 import advice  # noqa: E402
+from app.services.executor import run_cpu, run_io  # noqa: E402
+
+
+def test_run_cpu_uses_engine_pool_and_passes_kwargs():
+    def work(a, b=0):
+        return threading.current_thread().name, a + b
+
+    name, total = asyncio.run(run_cpu(work, 2, b=3))
+
+    assert name.startswith("engine")
+    assert total == 5
+
+
+def test_blocking_calls_do_not_stall_event_loop():
+    async def scenario():
+        loop_thread = threading.get_ident()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        threads = await asyncio.gather(
+            run_cpu(lambda: time.sleep(0.2) or threading.get_ident()),
+            run_io(lambda: time.sleep(0.2) or threading.get_ident()),
+        )
+        task.cancel()
+        return loop_thread, threads, ticks
+
+    loop_thread, threads, ticks = asyncio.run(scenario())
+
+    assert loop_thread not in threads
+    assert ticks >= 5
+
+
+def _client(monkeypatch, profile):
+    async def fake_get_profile(phone):
+        return profile
+
+    monkeypatch.setattr(advice, "get_profile", fake_get_profile)
+    app = FastAPI()
+    app.include_router(advice.router, prefix="/api/v1/advice")
+    return TestClient(app)
+
+
+def test_async_advice_route(monkeypatch):
+    farmer = {"name": "Ram", "crop": "wheat", "sowing_date": "2026-01-01", "language": "en"}
+    soil = {"nitrogen": "low", "phosphorus": "medium", "potassium": "medium", "ph": 6.5}
+
+    response = _client(monkeypatch, (farmer, soil)).get("/api/v1/advice/9999999999")
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["farmer"] == "Ram"
+    assert data["structured"]["crop_stage"]
+    assert data["narrative"]
+
+
+def test_async_advice_route_unknown_farmer(monkeypatch):
+    response = _client(monkeypatch, None).get("/api/v1/advice/0000000000")
+
+    assert response.status_code == 404
@@ -0,0 +1,57 @@
+from app.ai.knowledge import AGRI_KNOWLEDGE
+from app.ai.knowledge_index import INDEX, KnowledgeIndex, answer_directly, build_chunks, render_chunks, retrieve
+
+
+def _top_title(question):
+    return INDEX.search(question)[0][0].title
+
+
+def test_chunks_cover_every_table_row_and_item():
+    chunks = build_chunks()
+    msp_rows = [c for c in chunks if c.title.startswith("MSP")]
+
+    assert len(msp_rows) == 6 + 17
+    assert len([c for c in chunks if c.title.startswith("Government Schemes")]) == 7
+    assert all(c.body in AGRI_KNOWLEDGE for c in chunks)
+
+
+def test_search_ranks_the_relevant_section_first():
+    assert _top_title("How much urea for wheat at tillering?").startswith("Fertilizer")
+    assert _top_title("गेहूं में कितना खाद डालें").startswith("Fertilizer")
+    assert _top_title("When should I irrigate?").startswith("Irrigation")
+    assert _top_title("How do I protect the crop from frost?").startswith("Weather")
+    assert "Aphid" in INDEX.search("aphid on leaves")[0][0].body
+    assert INDEX.search("hello there") == []
+
+
+def test_rendered_chunks_keep_table_header_once():
+    text = render_chunks(retrieve("paddy msp"))
+
+    assert text.startswith("## MSP — Kharif")
+    assert text.count("| Crop ") == 1
+    assert "2,300" in text and "2,320" in text
+    assert len(text) < len(AGRI_KNOWLEDGE) / 10
+
+
+def test_direct_msp_answers_in_farmer_language():
+    assert answer_directly("What is the MSP of wheat?") == "The MSP for Wheat (Rabi 2024-25) is ₹2,275 per quintal."
+    hindi = answer_directly("धान का समर्थन मूल्य क्या है?", "hi")
+    assert "₹2,300" in hindi and "₹2,320" in hindi and "प्रति क्विंटल" in hindi
+
+
+def test_direct_scheme_answer_only_in_english():
+    answer = answer_directly("Who can get a kisan credit card?")
+    assert answer.startswith("Kisan Credit Card (KCC):") and "4% interest" in answer
+    assert answer_directly("Who can get a kisan credit card?", "hi") is None
+
+
+def test_mixed_or_open_questions_go_to_the_llm():
+    assert answer_directly("MSP of wheat is known, but should I sell now or store?") is None
+    assert answer_directly("What is the MSP?") is None
+    assert answer_directly("How much urea now?") is None
+
+
+def test_index_over_custom_chunks():
+    index = KnowledgeIndex(build_chunks()[:6])
+
+    assert index.search("barley")[0][0].body.startswith("| Barley")
@@ -0,0 +1,128 @@
+import gzip
+import json
+
+import pytest
+
+from app.services import log_exporter
+from app.services.log_exporter import export_calls
+from app.tests.test_analytics_service import StubClient, _rows
+
+
+def _read_jsonl(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_jsonl_export_chunks_and_completes(tmp_path):
+    client = StubClient(_rows())
+
+    state = export_calls(str(tmp_path), format="jsonl.gz", chunk_rows=10, page_size=4, client=client)
+
+    assert state["completed"]
+    assert state["rows"] == 25
+    assert state["files"] == ["calls-00000.jsonl.gz", "calls-00001.jsonl.gz", "calls-00002.jsonl.gz"]
+    rows = [r for name in state["files"] for r in _read_jsonl(tmp_path / name)]
+    assert sorted(r["id"] for r in rows) == [f"{i:04d}" for i in range(25)]
+    assert rows[0]["advisory_snapshot"] == {"large": "x" * 100}
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_export_resumes_after_last_complete_chunk(tmp_path):
+    client = StubClient(_rows())
+    pages = []
+
+    def stop_after_second_page():
+        pages.append(1)
+        return len(pages) >= 3
+
+    first = export_calls(str(tmp_path), format="jsonl.gz", chunk_rows=8, page_size=4,
+                         client=client, should_stop=stop_after_second_page)
+    assert not first["completed"]
+    assert first["rows"] == 12
+
+    resumed = export_calls(str(tmp_path), format="jsonl.gz", chunk_rows=8, page_size=4, client=client)
+
+    assert resumed["completed"]
+    rows = [r for name in resumed["files"] for r in _read_jsonl(tmp_path / name)]
+    assert sorted(r["id"] for r in rows) == [f"{i:04d}" for i in range(25)]
+
+
+def test_failed_page_discards_partial_chunk(tmp_path):
+    client = StubClient(_rows())
+    original = client.table
+
+    calls = []
+
+    def flaky_table(name):
+        calls.append(name)
+        if len(calls) == 3:
+            raise ConnectionError("database unavailable")
+        return original(name)
+
+    client.table = flaky_table
+    with pytest.raises(ConnectionError):
+        export_calls(str(tmp_path), format="jsonl.gz", chunk_rows=100, page_size=4, client=client)
+
+    assert not list(tmp_path.glob("calls-*"))
+    state = json.loads((tmp_path / "export_state.json").read_text())
+    assert state["cursor"] is None and state["rows"] == 0
+
+    client.table = original
+    assert export_calls(str(tmp_path), format="jsonl.gz", chunk_rows=100, page_size=4, client=client)["rows"] == 25
+
+
+def test_resume_rejects_different_parameters(tmp_path):
+    export_calls(str(tmp_path), format="jsonl.gz", client=StubClient(_rows()))
+    with pytest.raises(ValueError):
+        export_calls(str(tmp_path), format="jsonl.gz", columns=["id"], client=StubClient(_rows()))
+
+
+def test_open_ended_export_picks_up_new_rows(tmp_path):
+    rows = sorted(_rows(), key=lambda r: (r["created_at"], r["id"]))
+    client = StubClient(rows[:20])
+
+    first = export_calls(str(tmp_path), format="jsonl.gz", chunk_rows=100, page_size=4, client=client)
+    assert first["completed"] and first["rows"] == 20
+
+    client.rows = rows
+    again = export_calls(str(tmp_path), format="jsonl.gz", chunk_rows=100, page_size=4, client=client)
+
+    assert again["completed"]
+    assert again["rows"] == 25
+    assert again["files"] == ["calls-00000.jsonl.gz", "calls-00001.jsonl.gz"]
+    assert [r["id"] for r in _read_jsonl(tmp_path / "calls-00001.jsonl.gz")] == [r["id"] for r in rows[20:]]
+
+
+def test_open_ended_export_picks_up_rows_inserted_late(tmp_path):
+    rows = sorted(_rows(), key=lambda r: (r["created_at"], r["id"]))
+    client = StubClient(rows)
+    export_calls(str(tmp_path), format="jsonl.gz", chunk_rows=100, page_size=4, client=client)
+
+    # Stamped before the newest exported row, inserted after the export ran
+    late = {**rows[-1], "id": "late", "created_at": "2026-03-14T00:30:00+00:00"}
+    client.rows = rows + [late]
+    again = export_calls(str(tmp_path), format="jsonl.gz", chunk_rows=100, page_size=4, client=client)
+
+    assert again["rows"] == 26
+    assert [r["id"] for r in _read_jsonl(tmp_path / again["files"][-1])] == ["late"]
+    assert export_calls(str(tmp_path), format="jsonl.gz", client=client)["rows"] == 26
+
+
+def test_no_resume_clears_previous_chunks(tmp_path):
+    export_calls(str(tmp_path), format="jsonl.gz", chunk_rows=5, page_size=5, client=StubClient(_rows()))
+    (tmp_path / "notes.txt").write_text("keep me")
+
+    state = export_calls(str(tmp_path), format="jsonl.gz", chunk_rows=10, page_size=5,
+                         columns=["id", "created_at"], resume=False, client=StubClient(_rows()))
+
+    assert state["files"] == ["calls-00000.jsonl.gz", "calls-00001.jsonl.gz", "calls-00002.jsonl.gz"]
+    assert sorted(p.name for p in tmp_path.glob("calls-*")) == state["files"]
+    assert (tmp_path / "notes.txt").exists()
+
+
+@pytest.mark.skipif(log_exporter.pa is None, reason="pyarrow not installed")
+def test_parquet_export(tmp_path):
+    state = export_calls(str(tmp_path), format="parquet", chunk_rows=10, page_size=4, client=StubClient(_rows()))
+    table = log_exporter.pq.read_table(tmp_path / state["files"][0])
+    assert table.num_rows == 10
+    assert str(table.schema.field("created_at").type) == "timestamp[us, tz=UTC]"
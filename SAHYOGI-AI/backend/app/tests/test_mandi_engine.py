@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from app.core.mandi_engine import compute_mandi_trends, per_mandi_trend
+
+
+def _synthetic_mandi_frame(seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2026-01-01", periods=20)
+    rows = []
+    for m, days in [("Rising", 20), ("Falling", 20), ("Flat", 20), ("Short", 10), ("Tiny", 4)]:
+        for i, d in enumerate(dates[-days:]):
+            slope = {"Rising": 8, "Falling": -8}.get(m, 0)
+            rows.append({"date": d, "mandi": m, "district": m, "price": 2400 + slope * i + rng.normal(0, 2)})
+    # Shuffle to make sure ordering is not assumed
+    return pd.DataFrame(rows).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def test_vectorized_trends_match_per_mandi_loop():
+    df = _synthetic_mandi_frame()
+
+    expected = {m: per_mandi_trend(df, m) for m in df["mandi"].unique()}
+
+    assert compute_mandi_trends(df) == expected
+    assert expected["Rising"] == "rising"
+    assert expected["Tiny"] == "insufficient_data"
+
+
+def test_mandi_index_lookups(tmp_path):
+    from app.core.mandi_index import get_mandi_index
+
+    csv = tmp_path / "multi_mandi.csv"
+    csv.write_text(
+        "date,mandi,district,price\n"
+        "2026-01-01,A,North,2400\n"
+        "2026-01-01,B,South,2500\n"
+        "2026-01-02,A,North,2450\n"
+        "2026-01-02,B,South,2450\n"
+        "2026-01-02,C,South,2300\n"
+    )
+
+    index = get_mandi_index(str(csv))
+
+    assert index.best() == (2450.0, "A")        # first mandi on a tie, like idxmax
+    assert index.worst() == (2300.0, "C")
+    assert index.mean_price() == (2450 + 2450 + 2300) / 3
+    assert index.local_price("South") == 2450.0
+    assert index.local_price("East") is None
+    assert index.district_mandis == {"North": ["A"], "South": ["B", "C"]}
+    assert index.mandis_on() == ["A", "B", "C"]
+    assert list(index.sorted_prices(0)) == [2400.0, 2500.0]
+
+
+def test_mandi_comparison_without_latest_prices(tmp_path):
+    from app.core.mandi_engine import mandi_price_comparison
+
+    csv = tmp_path / "multi_mandi.csv"
+    csv.write_text(
+        "date,mandi,district,price\n"
+        "2026-01-01,A,North,2400\n"
+        "2026-01-02,A,North,\n"
+    )
+
+    result = mandi_price_comparison(str(csv), "North")
+
+    assert result["best_mandi_price"] is None
+    assert result["worst_mandi_name"] is None
+    assert result["msp"] == 2275
+    assert result["fair_price"] is None
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from app.core.market_context import MarketContext, get_market_context
+
+
+def test_indicators_match_pandas():
+    prices = np.linspace(2000, 2300, 60) + np.sin(np.arange(60)) * 10
+    ctx = MarketContext(prices)
+    series = pd.Series(prices)
+
+    assert np.allclose(ctx.ema(14), series.ewm(span=14, adjust=False).mean())
+    assert np.isclose(ctx.std(14), series.iloc[-14:].std())
+    assert np.isclose(ctx.moving_average(7), series.iloc[-7:].mean())
+
+
+def test_indicators_are_memoized():
+    ctx = MarketContext(np.arange(1.0, 40.0))
+
+    assert ctx.ema(12) is ctx.ema(12)
+    assert ctx.polyfit(30, 2) is ctx.polyfit(30, 2)
+
+
+def test_context_shared_per_file():
+    path = "../data/market_prices/wheat_prices.csv"
+
+    assert get_market_context(path) is get_market_context(path)
@@ -6,3 +6,20 @@ def test_market_trend_rising():
     result = analyze_market_trend(prices)
 
     assert result["trend"] == "rising"
+
+
+def test_market_trend_accepts_arrays():
+    import numpy as np
+
+    prices = list(range(2000, 2035))
+
+    assert analyze_market_trend(np.array(prices, dtype=float)) == analyze_market_trend(prices)
+
+
+def test_analyze_market_file_includes_current_price():
+    from app.core.market_trends import analyze_market_file
+
+    result = analyze_market_file("../data/market_prices/wheat_prices.csv")
+
+    assert result["trend"] in ("rising", "falling", "stable")
+    assert isinstance(result["current_price"], float)
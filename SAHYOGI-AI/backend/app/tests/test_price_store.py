@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+
+from app.services.price_store import build_price_store, open_price_table
+
+
+def test_price_store_columns(tmp_path):
+    csv = tmp_path / "wheat_multi_mandi.csv"
+    csv.write_text(
+        "date,mandi,district,price\n"
+        "2026-01-02,Puri,Puri,2410\n"
+        "2026-01-01,Puri,Puri,2400\n"
+        "2026-01-01,Cuttack,Cuttack,2450\n"
+    )
+
+    table = open_price_table(str(csv))
+
+    assert table.price.dtype == np.float64
+    assert table.day.dtype == np.int32
+    assert list(table.day) == [0, 0, 1]          # stored in date order
+    assert list(table.price) == [2400.0, 2450.0, 2410.0]
+    assert list(table.categorical("mandi")) == ["Puri", "Cuttack", "Puri"]
+    assert str(table.dates()[-1]) == "2026-01-02"
+
+
+def test_price_store_rebuilds_only_on_change(tmp_path):
+    csv = tmp_path / "wheat_prices.csv"
+    csv.write_text("date,price\n2026-01-01,2100\n")
+
+    first = build_price_store(str(csv))
+    assert build_price_store(str(csv)) == first
+
+    csv.write_text("date,price\n2026-01-01,2100\n2026-01-02,2120\n")
+    second = build_price_store(str(csv))
+
+    assert second != first
+    assert not os.path.exists(first)
+    assert len(open_price_table(str(csv))) == 2
@@ -0,0 +1,189 @@
+import os
+import asyncio
+from types import SimpleNamespace
+
+# farmer.py imports the Supabase client, which is built at import time
+os.environ.setdefault("SUPABASE_URL", "https://test.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.test")
+
+from datetime import date  # noqa: E402
+
+from app.api.v1 import farmer as farmer_api  # noqa: E402
+from app.services import profile_repository, supabase_service  # noqa: E402
+from app.services.cache import get_cached, set_cached  # noqa: E402
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.filters = {}
+        self.row = None
+
+    def select(self, columns):
+        self.columns = columns
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def in_(self, column, values):
+        self.filters[column] = tuple(values)
+        return self
+
+    def insert(self, row):
+        self.row = row
+        return self
+
+    async def execute(self):
+        await asyncio.sleep(0.01)  # let concurrent callers overlap
+        rows = self.client.tables[self.table]
+        if self.row is not None:
+            row = {"id": f"{self.table}-{len(rows) + 1}", **self.row}
+            rows.append(row)
+            self.client.on_insert(self.table)
+            return SimpleNamespace(data=[row])
+
+        self.client.queries.append((self.table, self.columns, dict(self.filters)))
+        matches = [
+            r for r in rows
+            if all(r.get(k) in v if isinstance(v, tuple) else r.get(k) == v for k, v in self.filters.items())
+        ]
+        if self.table == "farmers" and "soil_health(*)" in self.columns:
+            matches = [
+                {**r, "soil_health": [s for s in self.client.tables["soil_health"] if s["farmer_id"] == r["id"]]}
+                for r in matches
+            ]
+        return SimpleNamespace(data=matches)
+
+
+class FakeAsyncClient:
+    def __init__(self, farmers=(), soil=()):
+        self.tables = {"farmers": list(farmers), "soil_health": list(soil)}
+        self.queries = []
+        self.on_insert = lambda table: None
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def install(monkeypatch, client):
+    async def get_client():
+        return client
+
+    monkeypatch.setattr(profile_repository, "get_async_client", get_client)
+    monkeypatch.setattr(supabase_service, "get_async_client", get_client)
+    monkeypatch.setattr(farmer_api, "get_async_client", get_client)
+    profile_repository.invalidate_profile()
+    return client
+
+
+FARMER = {"id": "f1", "phone": "9000000001", "name": "Ram", "crop": "wheat"}
+SOIL = {"id": "s1", "farmer_id": "f1", "nitrogen": "low"}
+
+
+def test_concurrent_gets_share_one_query(monkeypatch):
+    client = install(monkeypatch, FakeAsyncClient([FARMER], [SOIL]))
+
+    async def scenario():
+        return await asyncio.gather(*(profile_repository.get_profile("9000000001") for _ in range(5)))
+
+    profiles = asyncio.run(scenario())
+
+    assert len(client.queries) == 1
+    assert client.queries[0] == ("farmers", "*, soil_health(*)", {"phone": "9000000001"})
+    farmer, soil = profiles[0]
+    assert "soil_health" not in farmer
+    assert soil == SOIL
+    assert all(p == profiles[0] for p in profiles)
+
+    # Served from cache afterwards
+    asyncio.run(profile_repository.get_profile("9000000001"))
+    assert len(client.queries) == 1
+
+
+def test_profile_cached_with_profile_ttl(monkeypatch):
+    install(monkeypatch, FakeAsyncClient([FARMER], [SOIL]))
+    ttls = []
+    monkeypatch.setattr(profile_repository, "set_cached", lambda key, value, ttl: ttls.append(ttl))
+
+    asyncio.run(profile_repository.get_profile("9000000001"))
+
+    assert ttls == [profile_repository.PROFILE_TTL]
+
+
+def test_missing_farmer_is_not_cached(monkeypatch):
+    client = install(monkeypatch, FakeAsyncClient())
+
+    assert asyncio.run(profile_repository.get_profile("9000000002")) is None
+    assert asyncio.run(profile_repository.get_profile("9000000002")) is None
+    assert len(client.queries) == 2
+
+
+def test_farmer_without_soil_card(monkeypatch):
+    install(monkeypatch, FakeAsyncClient([FARMER]))
+
+    farmer, soil = asyncio.run(profile_repository.get_profile("9000000001"))
+
+    assert farmer["name"] == "Ram"
+    assert soil is None
+
+
+def test_get_profiles_batches_misses_into_one_query(monkeypatch):
+    farmers = [FARMER, {"id": "f2", "phone": "9000000002", "name": "Gita", "crop": "rice"}]
+    client = install(monkeypatch, FakeAsyncClient(farmers, [SOIL]))
+    asyncio.run(profile_repository.get_profile("9000000001"))
+
+    phones = ["9000000001", "9000000002", "9000000009", "9000000002"]
+    profiles = asyncio.run(profile_repository.get_profiles(phones))
+
+    assert set(profiles) == {"9000000001", "9000000002"}
+    assert profiles["9000000001"] == (FARMER, SOIL)
+    assert profiles["9000000002"][1] is None
+    # Only the two cache misses were queried, together
+    assert client.queries[1:] == [("farmers", "*, soil_health(*)", {"phone": ("9000000002", "9000000009")})]
+
+    # Each profile found is now cached for single lookups
+    asyncio.run(profile_repository.get_profile("9000000002"))
+    assert len(client.queries) == 2
+
+
+def test_async_row_getters(monkeypatch):
+    install(monkeypatch, FakeAsyncClient([FARMER], [SOIL]))
+
+    async def scenario():
+        return (
+            await supabase_service.get_farmer_by_phone_async("9000000001"),
+            await supabase_service.get_soil_by_farmer_id_async("f1"),
+            await supabase_service.get_farmer_by_phone_async("9000000009"),
+        )
+
+    assert asyncio.run(scenario()) == (FARMER, SOIL, None)
+
+
+def test_register_invalidates_profile(monkeypatch):
+    client = install(monkeypatch, FakeAsyncClient())
+
+    # A concurrent reader caches the profile between the farmer and soil inserts
+    def read_mid_registration(table):
+        if table == "farmers":
+            farmer = client.tables["farmers"][-1]
+            set_cached(("profile", "9000000003"), (farmer, None), profile_repository.PROFILE_TTL)
+
+    client.on_insert = read_mid_registration
+
+    registration = farmer_api.FarmerRegistration(
+        phone="9000000003", name="Sita", crop="rice", sowing_date=date(2026, 1, 1),
+        nitrogen="high", phosphorus="low", potassium="medium", ph=6.8,
+    )
+
+    async def scenario():
+        await farmer_api.register_farmer(registration)
+        return await profile_repository.get_profile("9000000003")
+
+    farmer, soil = asyncio.run(scenario())
+
+    assert farmer["name"] == "Sita"
+    assert soil["nitrogen"] == "high"
+    assert get_cached(("profile", "9000000003")) == (farmer, soil)
@@ -0,0 +1,122 @@
+import os
+import threading
+from types import SimpleNamespace
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key")  # gemini_chat builds its client at import
+
+from app.ai import gemini_chat, prompts  # noqa: E402
+from app.ai.knowledge import AGRI_KNOWLEDGE  # noqa: E402
+
+ADVICE = {
+    "crop_stage": "Tillering",
+    "days_since_sowing": 30,
+    "soil_advice": ["Apply urea"],
+    "market_trend": "rising",
+    "market_advice": "Hold",
+}
+
+
+class FakeModels:
+    def __init__(self, fail_cached=False):
+        self.requests = []
+        self.fail_cached = fail_cached
+
+    def generate_content(self, model, contents, config=None):
+        self.requests.append((contents, config))
+        if config is not None and self.fail_cached:
+            raise RuntimeError("cached content not found")
+        usage = SimpleNamespace(prompt_token_count=len(contents) // 4, cached_content_token_count=None)
+        return SimpleNamespace(text="**Answer**", usage_metadata=usage)
+
+
+class FakeCaches:
+    def __init__(self, fail=False):
+        self.created = []
+        self.fail = fail
+
+    def create(self, model, config):
+        if self.fail:
+            raise RuntimeError("content too small to cache")
+        self.created.append(config)
+        return SimpleNamespace(name=f"cachedContents/{len(self.created)}")
+
+
+def _fake_client(monkeypatch, cache_fails=False, fail_cached=False):
+    client = SimpleNamespace(models=FakeModels(fail_cached), caches=FakeCaches(cache_fails))
+    monkeypatch.setattr(gemini_chat, "client", client)
+    monkeypatch.setattr(gemini_chat, "knowledge_cache", gemini_chat.KnowledgeContextCache())
+    monkeypatch.setattr(gemini_chat, "CONTEXT_CACHE_ENABLED", True)
+    return client
+
+
+def test_prompt_without_knowledge_relies_on_cached_prefix():
+    cached = prompts.build_chat_prompt(ADVICE, "Any scheme for me?", "hi")
+    inline = prompts.build_chat_prompt(ADVICE, "Any scheme for me?", "hi", knowledge=AGRI_KNOWLEDGE)
+
+    assert "PM-KISAN" not in cached and "PM-KISAN" in inline
+    assert "Hindi" in cached and "Farmer's Question: Any scheme for me?" in cached
+    assert inline.endswith(cached[cached.index("--- FARMER-SPECIFIC DATA ---"):])
+
+
+def test_chat_uses_context_cache(monkeypatch):
+    client = _fake_client(monkeypatch)
+    before = prompts.prompt_stats()["modes"].get("cached", 0)
+
+    assert gemini_chat.chat_with_context(ADVICE, "MSP of wheat?") == "Answer"
+    gemini_chat.chat_with_context(ADVICE, "Fertilizer now?")
+
+    assert len(client.caches.created) == 1
+    assert client.caches.created[0].system_instruction == prompts.STATIC_PREFIX
+    contents, config = client.models.requests[0]
+    assert config.cached_content == "cachedContents/1"
+    assert "2,275" not in contents
+    assert prompts.prompt_stats()["modes"]["cached"] == before + 2
+
+
+def test_chat_retrieves_sections_when_cache_unavailable(monkeypatch):
+    client = _fake_client(monkeypatch, cache_fails=True)
+
+    gemini_chat.chat_with_context(ADVICE, "What is the MSP of wheat?")
+    gemini_chat.chat_with_context(ADVICE, "Hello")
+
+    retrieved, full = [contents for contents, _ in client.models.requests]
+    assert "2,275" in retrieved and "PM-KISAN" not in retrieved
+    assert "PM-KISAN" in full
+    assert prompts.prompt_stats()["recent"][-2]["mode"] == "retrieved"
+    assert prompts.prompt_stats()["recent"][-1]["mode"] == "full"
+
+
+def test_failed_cached_request_falls_back_inline(monkeypatch):
+    client = _fake_client(monkeypatch, fail_cached=True)
+
+    assert gemini_chat.chat_with_context(ADVICE, "MSP of wheat?") == "Answer"
+
+    assert [config is not None for _, config in client.models.requests] == [True, False]
+    assert "2,275" in client.models.requests[1][0]
+
+
+def test_context_cache_create_does_not_block_other_requests(monkeypatch):
+    client = _fake_client(monkeypatch)
+    started, release = threading.Event(), threading.Event()
+    create = client.caches.create
+
+    def slow_create(model, config):
+        started.set()
+        release.wait(5)
+        return create(model, config)
+
+    monkeypatch.setattr(client.caches, "create", slow_create)
+    names = []
+    creator = threading.Thread(target=lambda: names.append(gemini_chat.knowledge_cache.name()))
+    creator.start()
+    started.wait(5)
+
+    # Another request while the entry is being created answers inline right away
+    assert gemini_chat.chat_with_context(ADVICE, "MSP of wheat?") == "Answer"
+    assert client.models.requests[0][1] is None
+
+    release.set()
+    creator.join()
+    assert names == ["cachedContents/1"]
+    assert gemini_chat.knowledge_cache.name() == "cachedContents/1"
+    assert len(client.caches.created) == 1
@@ -0,0 +1,166 @@
+import threading
+import time
+
+from app.ai import gemini_explainer
+from app.ai.response_cache import ResponseCache, canonical_key, data_version
+
+
+def test_version_change_is_a_miss(tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm.sqlite3"))
+    cache.put("k", "advice v1", version="a")
+
+    assert cache.get("k", version="a") == "advice v1"
+    assert cache.get("k", version="b") is None
+    assert cache.get("k", version="a") == "advice v1"  # a miss, not a delete
+    assert cache.stats()["stale"] == 1
+
+
+def test_ttl_and_lru_trim(tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm.sqlite3"), ttl=0.05, max_entries=10)
+    for i in range(10):
+        cache.put(f"k{i}", str(i))
+    cache.get("k0")  # most recently used now
+    cache.put("k10", "10")
+
+    stats = cache.stats()
+    assert stats["entries"] == 9
+    assert cache.get("k0") == "0"
+    assert cache.get("k1") is None
+
+    time.sleep(0.06)
+    assert cache.get("k0") is None
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    ResponseCache(path).put("k", "saved")
+
+    assert ResponseCache(path).get("k") == "saved"
+
+
+def test_concurrent_misses_call_create_once(tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm.sqlite3"))
+    calls = []
+    started = threading.Event()
+
+    def create():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "text"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_create("k", create))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["text"] * 5
+    assert len(calls) == 1
+
+
+def test_followers_share_a_failed_create(tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm.sqlite3"))
+    calls = []
+
+    def create():
+        calls.append(1)
+        time.sleep(0.1)
+        return None  # the LLM is down
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_create("k", create))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [None] * 5
+    assert len(calls) == 1
+    assert cache.stats()["shared"] == 4
+
+
+def test_followers_get_the_leaders_error(tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm.sqlite3"))
+    calls = []
+
+    def create():
+        calls.append(1)
+        time.sleep(0.1)
+        raise RuntimeError("quota exceeded")
+
+    errors = []
+
+    def call():
+        try:
+            cache.get_or_create("k", create)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == ["quota exceeded"] * 3
+    assert len(calls) == 1
+
+
+def test_failure_is_negatively_cached(tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm.sqlite3"), negative_ttl=0.05)
+    calls = []
+
+    def create():
+        calls.append(1)
+        return None if len(calls) == 1 else "text"
+
+    assert cache.get_or_create("k", create) is None
+    assert cache.get_or_create("k", create) is None
+    assert len(calls) == 1
+    assert cache.stats()["negative_hits"] == 1
+
+    # A new data version, or the window passing, tries again
+    assert cache.get_or_create("k", create, version="v2") == "text"
+    time.sleep(0.06)
+    assert cache.get_or_create("k", create) == "text"
+    assert len(calls) == 3
+
+
+def test_enhance_advisory_cached_on_inputs(monkeypatch, tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm.sqlite3"))
+    prompts = []
+    monkeypatch.setattr(gemini_explainer, "client", object())
+    monkeypatch.setattr(gemini_explainer, "advisory_cache", cache)
+    monkeypatch.setattr(gemini_explainer, "_generate", lambda inputs: prompts.append(inputs) or f"day {inputs['days']}")
+
+    advice = {
+        "crop_stage": "Tillering",
+        "days_since_sowing": 31,
+        "soil_advice": ["Apply urea"],
+        "market_trend": "rising",
+        "market_advice": "Hold",
+        "market_price": 2400,  # not in the prompt, so not in the key
+    }
+    first = gemini_explainer.enhance_advisory(advice, "hi", "v1")
+    second = gemini_explainer.enhance_advisory({**advice, "market_price": 2500}, "hi", "v1")
+    assert first == second == "day 31"
+    assert len(prompts) == 1
+
+    gemini_explainer.enhance_advisory(advice, "hi", "v2")
+    assert len(prompts) == 2
+    # Each market file version keeps its own entry
+    gemini_explainer.enhance_advisory(advice, "hi", "v1")
+    assert len(prompts) == 2
+
+    monkeypatch.setattr(gemini_explainer, "ADVISORY_DAY_BUCKET", 7)
+    a = gemini_explainer.enhance_advisory({**advice, "days_since_sowing": 29}, "hi", "v2")
+    b = gemini_explainer.enhance_advisory({**advice, "days_since_sowing": 33}, "hi", "v2")
+    assert a == b == "day 28-34"
+    assert len(prompts) == 3
+
+
+def test_keys_and_versions():
+    assert canonical_key({"a": 1, "b": [1, 2]}) == canonical_key({"b": [1, 2], "a": 1})
+    assert data_version("/nonexistent/prices.csv") == ""
@@ -0,0 +1,302 @@
+import os
+import time
+import wave
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.ai import tts
+
+
+class FakeEngine(tts.TTSEngine):
+    """Writes the spoken text as the audio payload."""
+
+    name = "fake"
+    extension = "mp3"
+
+    def __init__(self, calls, payload=None, languages=("en", "hi")):
+        self.calls = calls
+        self.payload = payload or (lambda text: b"x" * 1000)
+        self.languages = languages
+
+    def voice_for(self, language):
+        return language if language in self.languages else None
+
+    def synthesize(self, text, voice, file_path):
+        self.calls.append(text)
+        file_path.write_bytes(self.payload(text))
+
+
+class FakeWavEngine(FakeEngine):
+    name = "fakewav"
+    extension = "wav"
+
+    def synthesize(self, text, voice, file_path):
+        self.calls.append(text)
+        with wave.open(str(file_path), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(text.encode().ljust(4, b"\0"))
+
+
+def _setup(monkeypatch, tmp_path, calls, max_bytes=10_000_000, engines=None):
+    engines = engines or [FakeEngine(calls)]
+    monkeypatch.setattr(tts, "AUDIO_DIR", tmp_path)
+    monkeypatch.setattr(tts, "AUDIO_CACHE_MAX_BYTES", max_bytes)
+    monkeypatch.setattr(tts, "_cached_bytes", None)
+    monkeypatch.setattr(tts, "_engine_down_until", {})
+    for engine in engines:
+        monkeypatch.setitem(tts.ENGINES, engine.name, engine)
+    monkeypatch.setattr(tts, "TTS_ENGINES", ",".join(e.name for e in engines))
+
+
+def test_identical_text_is_synthesized_once(monkeypatch, tmp_path):
+    calls = []
+    _setup(monkeypatch, tmp_path, calls)
+
+    first = tts.generate_audio("Your wheat  is in\nTillering stage.", "hi")
+    second = tts.generate_audio("Your wheat is in\nTillering stage. ", "hi")
+
+    assert first == second
+    assert len(calls) == 1
+    assert os.path.basename(first) == tts.audio_cache_key("Your wheat is in Tillering stage.", "hi", "fake") + ".mp3"
+
+
+def test_language_and_engine_are_part_of_the_key(monkeypatch, tmp_path):
+    calls = []
+    _setup(monkeypatch, tmp_path, calls)
+
+    assert tts.generate_audio("Namaste", "en") != tts.generate_audio("Namaste", "hi")
+    assert tts.audio_cache_key("Namaste", "hi", engine="pyttsx3") != tts.audio_cache_key("Namaste", "hi", engine="gtts")
+    assert len(calls) == 2
+
+
+def test_lru_eviction_keeps_directory_bounded(monkeypatch, tmp_path):
+    calls = []
+    _setup(monkeypatch, tmp_path, calls, max_bytes=3500)
+
+    paths = []
+    for i in range(3):
+        paths.append(tts.generate_audio(f"advice {i}", "en"))
+        os.utime(paths[-1], (1000 + i, 1000 + i))
+    tts.generate_audio("advice 0", "en")          # hit: now most recently used
+    tts.generate_audio("advice 3", "en")          # 4000 bytes > limit
+
+    remaining = sorted(p.name for p in tmp_path.iterdir())
+    assert os.path.basename(paths[1]) not in remaining
+    assert os.path.basename(paths[0]) in remaining
+    assert sum(p.stat().st_size for p in tmp_path.iterdir()) <= 3500
+
+
+def test_segmented_audio_reuses_phrase_clips(monkeypatch, tmp_path):
+    calls = []
+    _setup(monkeypatch, tmp_path, calls)
+
+    tts.ENGINES["fake"].payload = lambda text: b"ID3\x03\x00\x00\x00\x00\x00\x02hd" + text.encode() + b"|"
+
+    first = tts.generate_segmented_audio(["You are in Tillering", "45", "days since sowing"], "en")
+    second = tts.generate_segmented_audio(["You are in Tillering", "46", "days since sowing"], "en")
+
+    assert first != second
+    # Only the new day count was synthesized for the second narrative
+    assert calls == ["You are in Tillering", "45", "days since sowing", "46"]
+    with open(second, "rb") as f:
+        assert f.read() == b"You are in Tillering|46|days since sowing|"
+
+    assert tts.generate_segmented_audio(["You are in Tillering", "46", "days since sowing"], "en") == second
+    assert len(calls) == 4
+
+
+def test_falls_back_to_next_engine_per_language(monkeypatch, tmp_path):
+    local_calls, network_calls = [], []
+    local = FakeWavEngine(local_calls, languages=("en", "hi"))
+    network = FakeEngine(network_calls, languages=("en", "hi", "or"))
+    _setup(monkeypatch, tmp_path, [], engines=[local, network])
+
+    assert tts.generate_audio("Namaste", "hi").endswith(".wav")
+    assert tts.generate_audio("Namaskar", "or").endswith(".mp3")
+    assert local_calls == ["Namaste"]
+    assert network_calls == ["Namaskar"]
+
+
+def test_broken_local_engine_is_skipped(monkeypatch, tmp_path):
+    class BrokenEngine(FakeWavEngine):
+        name = "broken"
+
+        def synthesize(self, text, voice, file_path):
+            self.calls.append(text)
+            raise tts.EngineDown("no driver")
+
+    broken_calls, network_calls = [], []
+    _setup(monkeypatch, tmp_path, [], engines=[BrokenEngine(broken_calls), FakeEngine(network_calls)])
+
+    tts.generate_audio("one", "en")
+    tts.generate_audio("two", "en")
+
+    assert broken_calls == ["one"]
+    assert network_calls == ["one", "two"]
+
+
+def test_one_failed_synthesis_keeps_the_local_engine(monkeypatch, tmp_path):
+    class FlakyEngine(FakeWavEngine):
+        name = "flaky"
+
+        def synthesize(self, text, voice, file_path):
+            if text == "one":
+                self.calls.append(text)
+                raise TimeoutError("synthesis took over 30s")
+            super().synthesize(text, voice, file_path)
+
+    local_calls, network_calls = [], []
+    _setup(monkeypatch, tmp_path, [], engines=[FlakyEngine(local_calls), FakeEngine(network_calls)])
+
+    tts.generate_audio("one", "en")
+    tts.generate_audio("two", "en")
+
+    assert local_calls == ["one", "two"]
+    assert network_calls == ["one"]
+
+
+def test_wav_segments_are_stitched(monkeypatch, tmp_path):
+    calls = []
+    _setup(monkeypatch, tmp_path, calls, engines=[FakeWavEngine(calls)])
+
+    path = tts.generate_segmented_audio(["abcd", "efgh"], "en")
+
+    with wave.open(path, "rb") as w:
+        assert w.getframerate() == 16000
+        assert w.readframes(w.getnframes()) == b"abcdefgh"
+
+
+def _write_text_worker(text, voice, path):
+    with open(path, "wb") as f:
+        f.write(f"{voice}:{text}".encode())
+
+
+def _sleep_worker(text, voice, path):
+    time.sleep(float(text))
+    with open(path, "wb") as f:
+        f.write(text.encode())
+
+
+def _warm(engine, tmp_path):
+    """Start every worker process, so spawn time isn't counted below."""
+    with ThreadPoolExecutor(engine.workers) as pool:
+        list(pool.map(lambda i: engine.synthesize("0", "en", tmp_path / f"warm{i}.wav"), range(engine.workers)))
+
+
+def test_local_pool_timeout_excludes_queue_wait(tmp_path):
+    engine = tts.LocalPoolEngine(_sleep_worker, workers=1, timeout=60)
+    try:
+        _warm(engine, tmp_path)
+        engine.timeout = 1.5
+        # Each runs 0.6 s; the third waits 1.2 s for the single worker first
+        with ThreadPoolExecutor(3) as pool:
+            list(pool.map(lambda i: engine.synthesize("0.6", "en", tmp_path / f"{i}.wav"), range(3)))
+    finally:
+        engine.shutdown()
+
+    assert all((tmp_path / f"{i}.wav").exists() for i in range(3))
+
+
+def test_local_pool_timeout_fails_only_the_slow_synthesis(tmp_path):
+    engine = tts.LocalPoolEngine(_sleep_worker, workers=2, timeout=60)
+    try:
+        _warm(engine, tmp_path)
+        engine.timeout = 1.0
+        pool = engine._pool
+        with ThreadPoolExecutor(2) as threads:
+            slow = threads.submit(engine.synthesize, "5", "en", tmp_path / "slow.wav")
+            time.sleep(0.1)
+            engine.synthesize("0.1", "en", tmp_path / "fast.wav")
+            with pytest.raises(TimeoutError):
+                slow.result()
+        # The other worker still serves, in the same pool
+        engine.synthesize("0.1", "en", tmp_path / "after.wav")
+        assert engine._pool is pool
+
+        # Once every worker is stuck the pool is replaced and the engine reported down
+        with pytest.raises(tts.EngineDown):
+            engine.synthesize("5", "en", tmp_path / "stuck.wav")
+        assert engine._pool is None
+    finally:
+        engine.shutdown()
+
+
+def test_local_pool_engine_runs_in_worker_process(tmp_path):
+    engine = tts.LocalPoolEngine(_write_text_worker, workers=1, timeout=60)
+    try:
+        engine.synthesize("hello", "or", tmp_path / "clip.wav")
+    finally:
+        engine.shutdown()
+
+    assert (tmp_path / "clip.wav").read_bytes() == b"or:hello"
+
+
+def test_stream_yields_sentences_in_order(monkeypatch, tmp_path):
+    calls = []
+    engine = FakeEngine(calls, payload=lambda text: b"ID3\x00\x00\x00\x00\x00\x00\x00" + text.encode())
+    _setup(monkeypatch, tmp_path, calls, engines=[engine])
+
+    sentences = tts.split_sentences("Sow now. Irrigate weekly! Sell in March? बाजार बढ़ रहा है।")
+    media_type, stream = tts.open_audio_stream(sentences, "hi", workers=2)
+
+    assert media_type == "audio/mpeg"
+    assert calls == ["Sow now."]  # only the first sentence before the response starts
+    assert list(stream) == [s.encode() for s in sentences]
+
+
+def test_wav_stream_has_one_header(monkeypatch, tmp_path):
+    calls = []
+    _setup(monkeypatch, tmp_path, calls, engines=[FakeWavEngine(calls)])
+
+    media_type, stream = tts.open_audio_stream(["abcd", "efgh"], "en")
+    body = b"".join(stream)
+
+    assert media_type in ("audio/x-wav", "audio/wav")
+    assert body.count(b"RIFF") == 1
+    assert body.endswith(b"abcdefgh")
+
+
+def test_stream_none_when_no_engine_can_speak(monkeypatch, tmp_path):
+    calls = []
+    _setup(monkeypatch, tmp_path, calls, engines=[FakeEngine(calls, languages=("en",))])
+
+    assert tts.open_audio_stream(["Namaste."], "or") is None
+
+
+def _same_stripe_texts():
+    """Two texts whose cache keys share one of the striped locks."""
+    first = "Irrigate today."
+    stripe = tts._lock_for(tts.audio_cache_key(first, "en", "fake"))
+    for i in range(10_000):
+        other = f"Apply urea {i}."
+        if tts._lock_for(tts.audio_cache_key(other, "en", "fake")) is stripe:
+            return first, other
+
+
+def test_slow_render_does_not_block_its_lock_stripe(monkeypatch, tmp_path):
+    calls = []
+    release = threading.Event()
+    slow, fast = _same_stripe_texts()
+
+    def payload(text):
+        if text == slow:
+            release.wait(5)
+        return b"x" * 100
+
+    _setup(monkeypatch, tmp_path, calls, engines=[FakeEngine(calls, payload=payload)])
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        slow_futures = [pool.submit(tts.generate_audio, slow, "en") for _ in range(2)]
+        time.sleep(0.05)
+        assert tts.generate_audio(fast, "en")   # finishes while the slow render is running
+        assert not any(f.done() for f in slow_futures)
+        release.set()
+        paths = {f.result(timeout=5) for f in slow_futures}
+
+    assert len(paths) == 1
+    assert calls.count(slow) == 1   # the second caller waited for the first render
+    assert not list(tmp_path.glob("*.part"))
@@ -22,6 +22,8 @@ interface AnalyticsData {
     calls_by_crop: Record<string, number>;
     crop_stage_distribution: Record<string, number>;
     market_trend_distribution: Record<string, number>;
+    // False while the server is still catching up with the calls table
+    ready?: boolean;
 }
 
 export default function AnalyticsPage() {
@@ -115,6 +117,11 @@ export default function AnalyticsPage() {
             </header>
 
             <main className="max-w-[1400px] mx-auto px-8 py-10 space-y-8">
+                {data.ready === false && (
+                    <p className="text-amber-400/80 text-xs font-bold uppercase tracking-wider">
+                        Counts are still loading and may be incomplete
+                    </p>
+                )}
                 {/* ─── Stats Overview ─── */}
                 <div className="grid grid-cols-4 gap-5">
                     <StatCard label="Total Calls" value={data.total_calls} icon="📞" color="from-green-500 to-green-600" />
@@ -1,20 +1,28 @@
 "use client";
 
-import { useState, useRef } from "react";
+import { useState, useRef, useEffect } from "react";
 import { useFarmer } from "../../../context/FarmerContext";
 import { useChat } from "../../../hooks/useChat";
 import { useLanguage } from "../../../context/LanguageContext";
 
 export default function VoiceAssistant() {
   const { phone } = useFarmer();
-  const { messages, loading, latestAudioUrl, sendMessage } = useChat();
+  const { messages, loading, streaming, latestAudioUrls, sendMessage } = useChat();
   const { language } = useLanguage();
   const [input, setInput] = useState("");
   const audioRef = useRef<HTMLAudioElement | null>(null);
   const [isPlaying, setIsPlaying] = useState(false);
+  const busy = loading || streaming;
+  const latestAudioUrl = latestAudioUrls[0] || null;
+
+  // Clips for later sentences keep arriving while earlier ones play
+  const audioUrlsRef = useRef(latestAudioUrls);
+  useEffect(() => {
+    audioUrlsRef.current = latestAudioUrls;
+  }, [latestAudioUrls]);
 
   const handleSend = () => {
-    if (!input.trim() || loading) return;
+    if (!input.trim() || busy) return;
     sendMessage(phone, input.trim());
     setInput("");
   };
@@ -27,13 +35,24 @@ export default function VoiceAssistant() {
       audioRef.current = null;
     }
 
-    const audio = new Audio(latestAudioUrl);
-    audioRef.current = audio;
-    setIsPlaying(true);
+    // Play the sentence clips in order, stopping at one that isn't ready yet
+    const playFrom = (index: number) => {
+      const url = audioUrlsRef.current[index];
+      if (!url) {
+        audioRef.current = null;
+        setIsPlaying(false);
+        return;
+      }
+
+      const audio = new Audio(url);
+      audioRef.current = audio;
+      audio.play().catch(() => setIsPlaying(false));
+      audio.onended = () => playFrom(index + 1);
+      audio.onerror = () => playFrom(index + 1);
+    };
 
-    audio.play().catch(() => setIsPlaying(false));
-    audio.onended = () => setIsPlaying(false);
-    audio.onerror = () => setIsPlaying(false);
+    setIsPlaying(true);
+    playFrom(0);
   };
 
   const langMap: Record<string, string> = {
@@ -55,7 +74,7 @@ export default function VoiceAssistant() {
             Chat Assistant
           </h2>
         </div>
-        {loading && (
+        {busy && (
           <div className="w-4 h-4 border-2 border-green-600/30 border-t-green-600 rounded-full animate-spin"></div>
         )}
       </div>
@@ -69,12 +88,12 @@ export default function VoiceAssistant() {
           value={input}
           onChange={(e) => setInput(e.target.value)}
           onKeyDown={(e) => e.key === "Enter" && handleSend()}
-          disabled={loading}
+          disabled={busy}
           suppressHydrationWarning
         />
         <button
           onClick={handleSend}
-          disabled={loading || !input.trim()}
+          disabled={busy || !input.trim()}
           className="absolute right-2 top-1/2 -translate-y-1/2 bg-green-600 text-white w-8 h-8 rounded-xl flex items-center justify-center text-sm hover:bg-green-700 transition-colors disabled:opacity-40"
         >
           →
@@ -99,9 +118,9 @@ export default function VoiceAssistant() {
             </div>
           </>
         ) : (
-          messages.map((msg, idx) => (
+          messages.map((msg) => msg.text && (
             <div
-              key={idx}
+              key={msg.id}
               className={`flex ${msg.role === "user" ? "justify-end" : "justify-start"}`}
             >
               <div
@@ -1,7 +1,7 @@
 "use client";
 
 import { useState, useCallback } from "react";
-import { simulateCall, getAudioUrl } from "../services/api";
+import { simulateCall, getAudioUrl, waitForAudio } from "../services/api";
 
 export function useCall() {
     const [data, setData] = useState<Record<string, any> | null>(null);
@@ -23,6 +23,13 @@ export function useCall() {
             }
 
             setData(callData);
+
+            // Audio renders in the background; attach it once ready
+            if (!callData.audio_file && callData.audio_job) {
+                waitForAudio(callData.audio_job).then((url) => {
+                    if (url) setData((prev) => prev && { ...prev, audio_file: url });
+                });
+            }
         } catch (err: any) {
             setError(
                 err?.response?.data?.detail ||
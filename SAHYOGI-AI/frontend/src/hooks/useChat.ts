@@ -1,9 +1,10 @@
 "use client";
 
-import { useState, useCallback } from "react";
-import { sendChatMessage, getAudioUrl } from "../services/api";
+import { useState, useCallback, useRef } from "react";
+import { streamChatMessage, waitForAudio } from "../services/api";
 
 export interface ChatMessage {
+    id: number;
     role: "user" | "assistant";
     text: string;
     audioUrl?: string;
@@ -12,53 +13,81 @@ export interface ChatMessage {
 export function useChat() {
     const [messages, setMessages] = useState<ChatMessage[]>([]);
     const [loading, setLoading] = useState(false);
+    const [streaming, setStreaming] = useState(false);
     const [error, setError] = useState<string | null>(null);
-    const [latestAudioUrl, setLatestAudioUrl] = useState<string | null>(null);
+    // One clip per sentence, in order (a slot stays empty until its job finishes)
+    const [latestAudioUrls, setLatestAudioUrls] = useState<(string | null)[]>([]);
+    const nextId = useRef(0);
+    // Reply whose sentence clips fill latestAudioUrls; older streams' callbacks are ignored
+    const currentReplyId = useRef(0);
 
     const sendMessage = useCallback(async (phone: string, question: string) => {
         if (!phone || !question.trim()) return;
 
-        // Add user message immediately
-        setMessages((prev) => [...prev, { role: "user", text: question }]);
+        // Add user message and an empty reply that fills in as tokens arrive
+        // (ids are taken here: state updaters must stay pure, StrictMode runs them twice)
+        const userId = ++nextId.current;
+        const replyId = ++nextId.current;
+        currentReplyId.current = replyId;
+        setMessages((prev) => [
+            ...prev,
+            { id: userId, role: "user", text: question },
+            { id: replyId, role: "assistant", text: "" },
+        ]);
         setLoading(true);
+        setStreaming(true);
         setError(null);
-        setLatestAudioUrl(null);
+        setLatestAudioUrls([]);
 
-        try {
-            const res = await sendChatMessage(phone, question);
-            const chatData = res.data || res;
-
-            const audioUrl = chatData.audio_file
-                ? getAudioUrl(chatData.audio_file)
-                : undefined;
+        const updateReply = (update: (m: ChatMessage) => ChatMessage) =>
+            setMessages((prev) => prev.map((m) => (m.id === replyId ? update(m) : m)));
 
-            setLatestAudioUrl(audioUrl || null);
+        const fail = (errMsg: string) => {
+            setError(errMsg);
+            updateReply((m) => ({ ...m, text: m.text ? `${m.text}\n\nError: ${errMsg}` : `Error: ${errMsg}` }));
+        };
 
-            setMessages((prev) => [
-                ...prev,
-                {
-                    role: "assistant",
-                    text: chatData.text_response || "No response received.",
-                    audioUrl,
+        try {
+            await streamChatMessage(phone, question, {
+                onToken: (text) => {
+                    setLoading(false);
+                    updateReply((m) => ({ ...m, text: m.text + text }));
                 },
-            ]);
+                onAudio: ({ index, audio_job }) => {
+                    waitForAudio(audio_job).then((url) => {
+                        if (!url) return;
+                        if (index === 0) updateReply((m) => ({ ...m, audioUrl: url }));
+                        // A newer question has started: its clips own latestAudioUrls now
+                        if (currentReplyId.current !== replyId) return;
+                        setLatestAudioUrls((prev) => {
+                            const next = [...prev];
+                            next[index] = url;
+                            return next;
+                        });
+                    });
+                },
+                onDone: ({ text_response }) => {
+                    updateReply((m) => ({ ...m, text: text_response || m.text || "No response received." }));
+                },
+                onError: fail,
+            });
         } catch (err: any) {
-            const errMsg =
-                err?.response?.data?.message || err.message || "Chat request failed";
-            setError(errMsg);
-            setMessages((prev) => [
-                ...prev,
-                { role: "assistant", text: `Error: ${errMsg}` },
-            ]);
+            fail(err?.message || "Chat request failed");
         } finally {
-            setLoading(false);
+            if (currentReplyId.current === replyId) {
+                setLoading(false);
+                setStreaming(false);
+            }
         }
     }, []);
 
     const clearMessages = useCallback(() => {
+        currentReplyId.current = 0;
         setMessages([]);
-        setLatestAudioUrl(null);
+        setLatestAudioUrls([]);
     }, []);
 
-    return { messages, loading, error, latestAudioUrl, sendMessage, clearMessages };
+    const latestAudioUrl = latestAudioUrls[0] || null;
+
+    return { messages, loading, streaming, error, latestAudioUrl, latestAudioUrls, sendMessage, clearMessages };
 }
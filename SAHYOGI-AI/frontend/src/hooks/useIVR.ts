@@ -1,7 +1,7 @@
 "use client";
 
 import { useState, useCallback, useRef } from "react";
-import { simulateCall, sendChatMessage, simulateSell, getAudioUrl, getPacsQueue, bookPacsSlot } from "../services/api";
+import { simulateCall, sendChatMessage, simulateSell, getAudioUrl, waitForAudio, getPacsQueue, bookPacsSlot } from "../services/api";
 
 export type IVRState = "idle" | "calling" | "menu" | "advisory" | "market" | "chat" | "simulation" | "pacs";
 
@@ -111,6 +111,18 @@ export function useIVR() {
             setData((prev) => ({ ...prev, callData }));
             setState("menu");
 
+            // Advisory audio renders in the background while the menu plays
+            if (!callData.audio_file && callData.audio_job) {
+                waitForAudio(callData.audio_job).then((url) => {
+                    if (!url) return;
+                    setData((prev) =>
+                        prev.callData
+                            ? { ...prev, callData: { ...prev.callData, audio_file: url } }
+                            : prev
+                    );
+                });
+            }
+
             // Speak the IVR menu prompt first — advisory audio plays only when user picks option 1
             speakMenu();
         } catch (err: any) {
@@ -240,14 +252,15 @@ export function useIVR() {
             const res = await sendChatMessage(phone, question);
             const chatData = res.data || res;
 
+            const text = chatData.text_response || "No response received.";
             const audioUrl = chatData.audio_file
                 ? getAudioUrl(chatData.audio_file)
-                : undefined;
+                : (await waitForAudio(chatData.audio_job, 1)) || undefined;
 
             setData((prev) => ({
                 ...prev,
                 chatResponse: {
-                    text: chatData.text_response || "No response received.",
+                    text,
                     audioUrl,
                 },
             }));
@@ -256,7 +269,7 @@ export function useIVR() {
             if (audioUrl) {
                 playAudio(audioUrl);
             } else {
-                speak(chatData.text_response || "No response received.");
+                speak(text);
             }
         } catch (err: any) {
             setError(
@@ -27,6 +27,64 @@ export async function sendChatMessage(phone: string, question: string) {
   return res.data;
 }
 
+export interface ChatStreamHandlers {
+  onToken?: (text: string) => void;
+  onAudio?: (sentence: { index: number; text: string; audio_job: any }) => void;
+  onDone?: (data: { text_response: string; audio_jobs: any[] }) => void;
+  onError?: (message: string) => void;
+}
+
+// Server-sent events from /chat/stream: tokens as the answer is generated,
+// an audio job per finished sentence, then the full text
+export async function streamChatMessage(
+  phone: string,
+  question: string,
+  handlers: ChatStreamHandlers
+) {
+  const res = await fetch(`${API_BASE}/api/v1/chat/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ phone, question }),
+  });
+
+  if (!res.ok || !res.body) {
+    const body = await res.json().catch(() => null);
+    handlers.onError?.(body?.message || `Chat request failed (${res.status})`);
+    return;
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line
+    let end: number;
+    while ((end = buffer.indexOf("\n\n")) !== -1) {
+      const raw = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+
+      let event = "message";
+      let data = "";
+      for (const line of raw.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if (!data) continue;
+      const payload = JSON.parse(data);
+
+      if (event === "token") handlers.onToken?.(payload.text);
+      else if (event === "audio") handlers.onAudio?.(payload);
+      else if (event === "done") handlers.onDone?.(payload);
+      else if (event === "error") handlers.onError?.(payload.message);
+    }
+  }
+}
+
 // ─── Call Simulation ───
 export async function simulateCall(phone: string) {
   const res = await api.post("/api/v1/calls", { phone });
@@ -60,6 +118,36 @@ export function getAudioUrl(path: string) {
   return `${API_BASE}${path}`;
 }
 
+// ─── Background audio jobs ───
+export async function getAudioJob(jobId: string, wait = 0) {
+  const res = await api.get(`/api/v1/audio/jobs/${jobId}`, {
+    params: { wait },
+  });
+  return res.data;
+}
+
+// Long-poll an audio job until it finishes; resolves to the playable URL, or null
+export async function waitForAudio(
+  job: { job_id: string; audio_url?: string | null } | null | undefined,
+  attempts = 4
+): Promise<string | null> {
+  if (!job) return null;
+  if (job.audio_url) return getAudioUrl(job.audio_url);
+  for (let i = 0; i < attempts; i++) {
+    try {
+      const res = await getAudioJob(job.job_id, 15);
+      const status = res.data || res;
+      if (status.status === "ready" && status.audio_url) {
+        return getAudioUrl(status.audio_url);
+      }
+      if (status.status === "failed") return null;
+    } catch {
+      return null;
+    }
+  }
+  return null;
+}
+
 // ─── PACS Queue & Booking ───
 export async function getPacsList() {
   const res = await api.get("/api/v1/pacs/");
@@ -0,0 +1,65 @@
+"""
+Benchmark per-mandi trend computation: the per_mandi_trend loop vs the
+vectorized compute_mandi_trends, on synthetic all-India-sized datasets.
+
+Usage (from SAHYOGI-AI/backend):
+    python ../scripts/bench_mandi_trends.py [--mandis 200 1000 3000] [--days 60]
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from app.core.mandi_engine import compute_mandi_trends, per_mandi_trend  # noqa: E402
+
+
+def synthetic_mandi_data(num_mandis: int, days: int, seed: int = 42) -> pd.DataFrame:
+    """num_mandis × days rows of random-walk prices."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end="2026-02-23", periods=days)
+    names = [f"Mandi_{i:05d}" for i in range(num_mandis)]
+    prices = 2300 + np.cumsum(rng.normal(0, 15, size=(num_mandis, days)), axis=1)
+    return pd.DataFrame({
+        "date": np.tile(dates, num_mandis),
+        "mandi": pd.Categorical(np.repeat(names, days)),
+        "district": pd.Categorical(np.repeat(names, days)),
+        "price": prices.ravel(),
+    })
+
+
+def time_call(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mandis", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--days", type=int, default=60)
+    args = parser.parse_args()
+
+    print(f"{'mandis':>8} {'rows':>9} {'loop (s)':>10} {'vectorized (s)':>15} {'speedup':>8}")
+    for num_mandis in args.mandis:
+        df = synthetic_mandi_data(num_mandis, args.days)
+
+        def loop():
+            return {m: per_mandi_trend(df, m) for m in df["mandi"].unique()}
+
+        assert loop() == compute_mandi_trends(df), "vectorized result differs from loop"
+
+        loop_s = time_call(loop, repeat=1)
+        vec_s = time_call(lambda: compute_mandi_trends(df))
+        print(f"{num_mandis:>8} {len(df):>9} {loop_s:>10.4f} {vec_s:>15.4f} {loop_s / vec_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
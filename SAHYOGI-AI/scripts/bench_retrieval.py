@@ -0,0 +1,79 @@
+"""
+Benchmark the offline knowledge index: build time, BM25 search and
+direct-answer latency, and how much knowledge text a retrieved prompt
+carries compared with inlining the whole base.
+
+Usage (from SAHYOGI-AI/backend):
+    python ../scripts/bench_retrieval.py [--repeat 200] [--k 4]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from app.ai.knowledge import AGRI_KNOWLEDGE  # noqa: E402
+from app.ai.knowledge_index import KnowledgeIndex, answer_directly, build_chunks, render_chunks  # noqa: E402
+
+SAMPLE_QUESTIONS = [
+    "What is the MSP of wheat?",
+    "धान का समर्थन मूल्य क्या है?",
+    "How much urea should I apply at tillering?",
+    "गेहूं में कितना खाद डालें?",
+    "When should I irrigate my wheat?",
+    "Who is eligible for a kisan credit card?",
+    "How do I claim crop insurance after hailstorm?",
+    "Yellow stripes on leaves, what spray?",
+    "Termites are damaging roots",
+    "How should I store grain after harvest?",
+    "Should I sell now or wait for a better price?",
+    "Tell me about PM Kisan",
+]
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[max(0, int(len(samples) * q) - 1)]
+
+
+def timed(fn, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    build = timed(lambda: KnowledgeIndex(build_chunks()), 20)
+    index = KnowledgeIndex(build_chunks())
+    print(f"index: {len(index.chunks)} chunks, {len(index.postings)} terms, "
+          f"build p50 {statistics.median(build) * 1000:.2f} ms")
+
+    search, direct = [], []
+    for question in SAMPLE_QUESTIONS:
+        search += timed(lambda: index.search(question, args.k), args.repeat)
+        direct += timed(lambda: answer_directly(question), args.repeat)
+
+    print(f"{'':<8} {'p50 us':>9} {'p95 us':>9}")
+    for name, samples in (("search", search), ("direct", direct)):
+        print(f"{name:<8} {statistics.median(samples) * 1e6:>9.1f} {percentile(samples, 0.95) * 1e6:>9.1f}")
+
+    print(f"\n{'question':<46} {'chars':>6} {'direct':>7}")
+    for question in SAMPLE_QUESTIONS:
+        chunks = [c for c, _ in index.search(question, args.k)]
+        chars = len(render_chunks(chunks)) if chunks else len(AGRI_KNOWLEDGE)
+        print(f"{question[:46]:<46} {chars:>6} {'yes' if answer_directly(question) else '':>7}")
+    print(f"{'(whole knowledge base)':<46} {len(AGRI_KNOWLEDGE):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark TTS engines: per-request latency (sequential) and throughput
+(concurrent), synthesizing directly so the audio cache is bypassed.
+
+Usage (from SAHYOGI-AI/backend):
+    python ../scripts/bench_tts.py [--engines pyttsx3 gtts] [--language hi]
+                                   [--requests 20] [--concurrency 4]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from app.ai.tts import ENGINES, shutdown_tts  # noqa: E402
+from app.core.language import format_advice_response  # noqa: E402
+
+SAMPLE_ADVICE = {
+    "crop_stage": "Tillering",
+    "soil_advice": ["Apply Nitrogen fertilizer (e.g., Urea) in recommended quantity."],
+    "market_trend": "rising",
+}
+
+
+def sample_texts(language: str, n: int):
+    """Distinct narratives (varying day counts) so no engine can reuse work."""
+    return [
+        format_advice_response({**SAMPLE_ADVICE, "days_since_sowing": 20 + i}, language)
+        for i in range(n)
+    ]
+
+
+def bench_engine(engine, language: str, requests: int, concurrency: int) -> dict:
+    voice = engine.voice_for(language)
+    if voice is None:
+        return {"engine": engine.name, "error": f"no voice for '{language}'"}
+
+    texts = sample_texts(language, requests)
+    with tempfile.TemporaryDirectory() as tmp:
+        def synthesize(i_text):
+            i, text = i_text
+            path = Path(tmp) / f"{i}.{engine.extension}"
+            start = time.perf_counter()
+            engine.synthesize(text, voice, path)
+            return time.perf_counter() - start, path.stat().st_size
+
+        try:
+            # Warm-up: process pool start / voice lookup / connection setup
+            synthesize((-1, texts[0]))
+
+            latencies = [synthesize((i, t))[0] for i, t in enumerate(texts)]
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                sizes = [size for _, size in pool.map(synthesize, enumerate(texts, start=requests))]
+            wall = time.perf_counter() - start
+        except Exception as e:
+            return {"engine": engine.name, "error": str(e)}
+
+    latencies.sort()
+    return {
+        "engine": engine.name,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000,
+        "throughput": requests / wall,
+        "avg_kb": statistics.mean(sizes) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES))
+    parser.add_argument("--language", default="hi")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'engine':<10} {'p50 ms':>9} {'p95 ms':>9} {'req/s':>8} {'avg KB':>8}")
+    try:
+        for name in args.engines:
+            engine = ENGINES[name]
+            if not engine.available():
+                print(f"{name:<10} not installed")
+                continue
+            r = bench_engine(engine, args.language, args.requests, args.concurrency)
+            if "error" in r:
+                print(f"{name:<10} failed: {r['error']}")
+                continue
+            print(f"{name:<10} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['throughput']:>8.2f} {r['avg_kb']:>8.1f}")
+    finally:
+        shutdown_tts()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Export the calls table to chunked Parquet (with pyarrow) or gzip JSONL.
+
+Streams rows page by page, so memory stays flat for any table size.
+Re-running with the same arguments resumes after the last complete chunk;
+without --end it also exports the calls logged since the last run.
+
+Usage (from SAHYOGI-AI/backend):
+    python ../scripts/export_logs.py --out exports/2026-03 \
+        --start 2026-03-01 --end 2026-04-01 [--format parquet|jsonl.gz]
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from app.services.log_exporter import CHUNK_ROWS, export_calls  # noqa: E402
+from app.services.analytics_service import PAGE_SIZE  # noqa: E402
+
+
+def parse_datetime(value: str) -> datetime:
+    dt = datetime.fromisoformat(value)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="Output directory (holds chunks and export_state.json)")
+    parser.add_argument("--start", type=parse_datetime, help="Inclusive start (ISO date or datetime, UTC)")
+    parser.add_argument("--end", type=parse_datetime, help="Exclusive end (ISO date or datetime, UTC)")
+    parser.add_argument("--format", default="auto", choices=["auto", "parquet", "jsonl.gz"])
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--no-resume", action="store_true", help="Delete the previous export in --out and start over")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+
+    def progress(state):
+        elapsed = time.perf_counter() - started
+        print(f"{state['files'][-1]}: {state['rows']:,} rows ({state['rows'] / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    state = export_calls(
+        args.out,
+        start=args.start,
+        end=args.end,
+        format=args.format,
+        chunk_rows=args.chunk_rows,
+        page_size=args.page_size,
+        resume=not args.no_resume,
+        progress=progress,
+    )
+    print(f"Done: {state['rows']:,} rows in {len(state['files'])} files → {args.out}")
+
+
+if __name__ == "__main__":
+    main()